@@ -0,0 +1,68 @@
+from typing import List
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn, CreateIndex
+
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.db.session import Base
+
+
+def missing_columns(engine: Engine) -> list:
+    """Columns declared on the models that do not exist in the connected database."""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing.extend(column for column in table.columns if column.name not in existing)
+    return missing
+
+
+def add_missing_columns(engine: Engine) -> List[str]:
+    """Add declared columns that an existing deployment is missing.
+
+    SQLite cannot add a STORED generated column to an existing table, so those are
+    added as VIRTUAL there; they compute the same value and can be indexed the same.
+    """
+    added = []
+    with engine.begin() as conn:
+        for column in missing_columns(engine):
+            ddl = str(CreateColumn(column).compile(dialect=engine.dialect))
+            if engine.dialect.name == "sqlite" and column.computed is not None:
+                ddl = ddl.replace(" STORED", " VIRTUAL")
+            conn.exec_driver_sql(f"ALTER TABLE {column.table.name} ADD COLUMN {ddl}")
+            added.append(f"{column.table.name}.{column.name}")
+    return added
+
+
+def missing_indexes(engine: Engine) -> list:
+    """Indexes declared on the models that do not exist in the connected database."""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        missing.extend(index for index in table.indexes if index.name not in existing)
+    return missing
+
+
+def add_missing_indexes(engine: Engine) -> List[str]:
+    """Create declared indexes that an existing deployment is missing.
+
+    On MySQL the indexes are built with online DDL (``ALGORITHM=INPLACE, LOCK=NONE``)
+    so reads and writes on the table continue while the index is created.
+    """
+    created = []
+    with engine.begin() as conn:
+        for index in missing_indexes(engine):
+            ddl = str(CreateIndex(index).compile(dialect=engine.dialect))
+            if engine.dialect.name == "mysql":
+                ddl += " ALGORITHM=INPLACE LOCK=NONE"
+            conn.exec_driver_sql(ddl)
+            created.append(index.name)
+    return created
@@ -0,0 +1,331 @@
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import MetaData, inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.models.product import Product
+from app.models.sale import SALES_ID_SEQUENCE, Sale
+from app.services.cold_storage import COLD_STORAGE_DIR, forget_cold_months
+from app.services.rollups import apply_sales_to_rollups, remove_sales_from_rollups
+
+# Catch-all partition for sales past the last month created
+FUTURE_PARTITION = "p_future"
+SALE_COLUMNS = [column.name for column in Sale.__table__.columns]
+
+
+class Partition(NamedTuple):
+    name: str
+    # Exclusive upper bound of sale_date; None for the future partition
+    upper: Optional[datetime]
+    rows: Optional[int] = None
+
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def monthly_partitions(first: datetime, last: datetime) -> List[Partition]:
+    """One partition per month from ``first`` to ``last`` included."""
+    partitions, month = [], month_start(first)
+    while month <= last:
+        partitions.append(Partition(f"p{month:%Y%m}", add_months(month, 1)))
+        month = add_months(month, 1)
+    return partitions
+
+
+def is_partitioned(engine: Engine) -> bool:
+    """Monthly RANGE partitions on MySQL; the table-per-month view on SQLite."""
+    with engine.connect() as conn:
+        if conn.dialect.name == "mysql":
+            return bool(_mysql_partitions(conn))
+        if conn.dialect.name == "sqlite":
+            return "sales" in inspect(conn).get_view_names()
+    return False
+
+
+def list_partitions(engine: Engine) -> List[Partition]:
+    with engine.connect() as conn:
+        if conn.dialect.name == "mysql":
+            return _mysql_partitions(conn)
+        if conn.dialect.name == "sqlite":
+            return _sqlite_partitions(conn, count_rows=True)
+    raise ValueError(f"Sales partitioning is not supported for dialect {engine.dialect.name}")
+
+
+def enable_partitioning(engine: Engine, ahead_months: int = 3) -> List[Partition]:
+    """Split the sales table into monthly partitions, from the oldest sale's month to
+    ``ahead_months`` after the current one, plus the future partition.
+
+    MySQL: partitioned tables cannot have foreign keys and every unique key must contain
+    the partitioning column, so the foreign key to products is dropped and the primary
+    key becomes ``(id, sale_date)``. The table is rebuilt: run it in a maintenance window.
+    SQLite: the rows move to one table per month behind a ``sales`` view whose triggers
+    route inserts, updates and deletes to the right table.
+    """
+    if is_partitioned(engine):
+        raise ValueError("The sales table is already partitioned")
+    with engine.begin() as conn:
+        oldest = conn.exec_driver_sql("SELECT MIN(sale_date) FROM sales").scalar()
+        now = month_start(datetime.utcnow())
+        if isinstance(oldest, str):
+            oldest = datetime.fromisoformat(oldest)
+        partitions = monthly_partitions(min(oldest or now, now), add_months(now, ahead_months))
+        partitions.append(Partition(FUTURE_PARTITION, None))
+        if conn.dialect.name == "mysql":
+            _mysql_enable(conn, partitions)
+        elif conn.dialect.name == "sqlite":
+            _sqlite_enable(conn, partitions)
+        else:
+            raise ValueError(f"Sales partitioning is not supported for dialect {conn.dialect.name}")
+    return partitions
+
+
+def add_partitions(engine: Engine, ahead_months: int = 3) -> List[str]:
+    """Create the monthly partitions up to ``ahead_months`` after the current month
+    (split off the future partition, moving the rows that belong to them)."""
+    with engine.begin() as conn:
+        existing = _mysql_partitions(conn) if conn.dialect.name == "mysql" else _sqlite_partitions(conn)
+        if not existing:
+            raise ValueError("The sales table is not partitioned; run with --enable first")
+        months = [partition for partition in existing if partition.upper is not None]
+        first = months[-1].upper if months else month_start(datetime.utcnow())
+        new = monthly_partitions(first, add_months(month_start(datetime.utcnow()), ahead_months))
+        if not new:
+            return []
+        if conn.dialect.name == "mysql":
+            definitions = ", ".join(_mysql_definition(partition) for partition in new)
+            conn.exec_driver_sql(
+                f"ALTER TABLE sales REORGANIZE PARTITION {FUTURE_PARTITION} INTO "
+                f"({definitions}, PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE))"
+            )
+        else:
+            partitions = months + new + [Partition(FUTURE_PARTITION, None)]
+            columns = ", ".join(SALE_COLUMNS)
+            for position in range(len(months), len(months) + len(new)):
+                _sqlite_create_table(conn, partitions[position].name)
+                conn.exec_driver_sql(
+                    f"INSERT INTO sales_{partitions[position].name} ({columns}) SELECT {columns} "
+                    f"FROM sales_{FUTURE_PARTITION} WHERE {_sqlite_bounds('sale_date', partitions, position)}"
+                )
+            conn.exec_driver_sql(
+                f"DELETE FROM sales_{FUTURE_PARTITION} WHERE sale_date < '{_sqlite_datetime(new[-1].upper)}'"
+            )
+            _sqlite_create_view(conn, partitions)
+    return [partition.name for partition in new]
+
+
+def remove_partitions(
+    engine: Engine, before: datetime, archive: bool = True, cold_directory: str = COLD_STORAGE_DIR
+) -> List[str]:
+    """Take the months that end on or before ``before`` out of the sales table.
+
+    With ``archive`` each month is kept as its own table ``sales_archive_<partition>``
+    (MySQL: ``EXCHANGE PARTITION``, SQLite: a rename); otherwise it is dropped. Either
+    way it costs a metadata change instead of a DELETE of every row.
+
+    The removed sales are subtracted from the rollup tables and their months dropped from
+    the cold snapshot, so every read endpoint stops counting them together. On SQLite it
+    is one transaction; on MySQL the DDL commits implicitly and the rollups are updated
+    right after it (if that fails, run backfill_rollups.py).
+    """
+    with engine.begin() as conn:
+        existing = _mysql_partitions(conn) if conn.dialect.name == "mysql" else _sqlite_partitions(conn)
+        if not existing:
+            raise ValueError("The sales table is not partitioned; run with --enable first")
+        old = [partition for partition in existing if partition.upper is not None and partition.upper <= before]
+        # Aggregated before the rows go away
+        removed_sales = [sale for partition in old for sale in _daily_sales(conn, partition)]
+        for partition in old:
+            if conn.dialect.name == "mysql":
+                if archive:
+                    conn.exec_driver_sql(f"CREATE TABLE sales_archive_{partition.name} LIKE sales")
+                    conn.exec_driver_sql(f"ALTER TABLE sales_archive_{partition.name} REMOVE PARTITIONING")
+                    conn.exec_driver_sql(
+                        f"ALTER TABLE sales EXCHANGE PARTITION {partition.name} "
+                        f"WITH TABLE sales_archive_{partition.name}"
+                    )
+                conn.exec_driver_sql(f"ALTER TABLE sales DROP PARTITION {partition.name}")
+            elif archive:
+                conn.exec_driver_sql(f"ALTER TABLE sales_{partition.name} RENAME TO sales_archive_{partition.name}")
+            else:
+                conn.exec_driver_sql(f"DROP TABLE sales_{partition.name}")
+        if old and conn.dialect.name == "sqlite":
+            _sqlite_create_view(conn, [partition for partition in existing if partition not in old])
+        if old:
+            with Session(bind=conn) as db:
+                remove_sales_from_rollups(db, removed_sales, old[-1].upper)
+    if old:
+        forget_cold_months(old[-1].upper, cold_directory)
+    return [partition.name for partition in old]
+
+
+def _daily_sales(conn: Connection, partition: Partition) -> List[dict]:
+    """Totals per day and product of a partition's sales, as ``apply_sales_to_rollups``
+    takes them (sales without a date were never in the rollups)."""
+    source = f"sales PARTITION ({partition.name})" if conn.dialect.name == "mysql" else f"sales_{partition.name}"
+    rows = conn.exec_driver_sql(
+        f"SELECT product_id, DATE(sale_date), SUM(quantity), SUM(total_amount), COUNT(*) FROM {source} "
+        "WHERE sale_date IS NOT NULL GROUP BY product_id, DATE(sale_date)"
+    ).all()
+    return [
+        {
+            "product_id": product_id,
+            # A date on MySQL, an ISO string on SQLite
+            "sale_date": datetime.fromisoformat(str(day)),
+            "quantity": int(quantity),
+            "total_amount": float(total_amount),
+            "total_sales": count,
+        }
+        for product_id, day, quantity, total_amount, count in rows
+    ]
+
+
+def _mysql_partitions(conn: Connection) -> List[Partition]:
+    rows = conn.exec_driver_sql(
+        "SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'sales' AND PARTITION_NAME IS NOT NULL "
+        "ORDER BY PARTITION_ORDINAL_POSITION"
+    ).all()
+    return [
+        Partition(name, None if bound == "MAXVALUE" else datetime.fromisoformat(bound.strip("'")), rows)
+        for name, bound, rows in rows
+    ]
+
+
+def _mysql_definition(partition: Partition) -> str:
+    return f"PARTITION {partition.name} VALUES LESS THAN ('{partition.upper:%Y-%m-%d %H:%M:%S}')"
+
+
+def _mysql_enable(conn: Connection, partitions: List[Partition]):
+    for foreign_key in inspect(conn).get_foreign_keys("sales"):
+        conn.exec_driver_sql(f"ALTER TABLE sales DROP FOREIGN KEY {foreign_key['name']}")
+    # The partitioning column cannot be NULL: date those sales from created_at and add them
+    # to the rollups, which skip sales without a date
+    now = datetime.utcnow()
+    undated = conn.execute(
+        text("SELECT product_id, quantity, total_amount, COALESCE(created_at, :now) FROM sales WHERE sale_date IS NULL"),
+        {"now": now},
+    ).all()
+    if undated:
+        print(f"Setting sale_date from created_at for {len(undated)} sales without one and adding them to the rollups")
+        conn.execute(text("UPDATE sales SET sale_date = COALESCE(created_at, :now) WHERE sale_date IS NULL"), {"now": now})
+        with Session(bind=conn) as db:
+            apply_sales_to_rollups(db, [
+                {"product_id": product_id, "quantity": quantity, "total_amount": total_amount, "sale_date": sale_date}
+                for product_id, quantity, total_amount, sale_date in undated
+            ])
+    conn.exec_driver_sql(
+        "ALTER TABLE sales MODIFY sale_date DATETIME NOT NULL, "
+        "DROP PRIMARY KEY, ADD PRIMARY KEY (id, sale_date)"
+    )
+    definitions = ", ".join(_mysql_definition(partition) for partition in partitions if partition.upper)
+    conn.exec_driver_sql(
+        f"ALTER TABLE sales PARTITION BY RANGE COLUMNS(sale_date) "
+        f"({definitions}, PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE))"
+    )
+
+
+def _sqlite_datetime(value: datetime) -> str:
+    # The format SQLAlchemy stores DateTime columns in, so strings compare as dates
+    return f"{value:%Y-%m-%d %H:%M:%S.%f}"
+
+
+def _sqlite_partitions(conn: Connection, count_rows: bool = False) -> List[Partition]:
+    if "sales" not in inspect(conn).get_view_names():
+        return []
+    names = conn.exec_driver_sql(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'sales\\_p%' ESCAPE '\\' ORDER BY name"
+    ).scalars().all()
+    partitions = []
+    for table in names:
+        name = table[len("sales_"):]
+        upper = None if name == FUTURE_PARTITION else add_months(datetime.strptime(name, "p%Y%m"), 1)
+        rows = conn.exec_driver_sql(f"SELECT COUNT(*) FROM {table}").scalar() if count_rows else None
+        partitions.append(Partition(name, upper, rows))
+    # The future partition sorts before the months by name
+    return sorted(partitions, key=lambda partition: (partition.upper is None, partition.upper or datetime.min))
+
+
+def _sqlite_create_table(conn: Connection, name: str):
+    metadata = MetaData()
+    # The copy's foreign key needs the products table in its metadata
+    Product.__table__.to_metadata(metadata)
+    table = Sale.__table__.to_metadata(metadata, name=f"sales_{name}")
+    for index in table.indexes:
+        index.name = index.name.replace("ix_sales_", f"ix_sales_{name}_", 1)
+    table.create(conn)
+
+
+def _sqlite_bounds(column: str, partitions: List[Partition], position: int) -> str:
+    """SQL condition for the rows of ``partitions[position]``; the first partition also
+    takes anything older (and NULL dates), like MySQL's lowest RANGE partition."""
+    conditions = []
+    if position > 0:
+        conditions.append(f"{column} >= '{_sqlite_datetime(partitions[position - 1].upper)}'")
+    if partitions[position].upper is not None:
+        conditions.append(f"{column} < '{_sqlite_datetime(partitions[position].upper)}'")
+    condition = " AND ".join(conditions) or "1"
+    return f"({column} IS NULL OR {condition})" if position == 0 else condition
+
+
+def _sqlite_enable(conn: Connection, partitions: List[Partition]):
+    conn.exec_driver_sql(f"CREATE TABLE {SALES_ID_SEQUENCE} (id INTEGER PRIMARY KEY AUTOINCREMENT)")
+    conn.exec_driver_sql(f"INSERT INTO {SALES_ID_SEQUENCE} (id) SELECT MAX(id) FROM sales HAVING MAX(id) IS NOT NULL")
+    columns = ", ".join(SALE_COLUMNS)
+    for position, partition in enumerate(partitions):
+        _sqlite_create_table(conn, partition.name)
+        conn.exec_driver_sql(
+            f"INSERT INTO sales_{partition.name} ({columns}) SELECT {columns} FROM sales "
+            f"WHERE {_sqlite_bounds('sale_date', partitions, position)}"
+        )
+    conn.exec_driver_sql("DROP TABLE sales")
+    _sqlite_create_view(conn, partitions)
+
+
+def _sqlite_route(partitions: List[Partition], sale_id: str) -> List[str]:
+    """Trigger statements inserting ``NEW`` into the table of its month."""
+    columns = ", ".join(SALE_COLUMNS)
+    values = ", ".join(sale_id if column == "id" else f"NEW.{column}" for column in SALE_COLUMNS)
+    return [
+        f"INSERT INTO sales_{partition.name} ({columns}) SELECT {values} "
+        f"WHERE {_sqlite_bounds('NEW.sale_date', partitions, position)};"
+        for position, partition in enumerate(partitions)
+    ]
+
+
+def _sqlite_create_view(conn: Connection, partitions: List[Partition]):
+    """(Re)create the ``sales`` view over ``partitions`` and its routing triggers."""
+    columns = ", ".join(SALE_COLUMNS)
+    conn.exec_driver_sql("DROP VIEW IF EXISTS sales")
+    conn.exec_driver_sql("CREATE VIEW sales AS " + " UNION ALL ".join(
+        f"SELECT {columns} FROM sales_{partition.name}" for partition in partitions
+    ))
+
+    # Ids come from the sequence table unless given (the ORM allocates them before inserting).
+    # sqlite_sequence is only updated when the statement ends, so read the table itself.
+    next_id = f"(SELECT MAX(id) FROM {SALES_ID_SEQUENCE})"
+    delete_old = [f"DELETE FROM sales_{partition.name} WHERE id = OLD.id;" for partition in partitions]
+    triggers = {
+        "sales_insert": ("INSERT", [
+            f"INSERT INTO {SALES_ID_SEQUENCE} (id) SELECT NULL WHERE NEW.id IS NULL;",
+            f"INSERT OR IGNORE INTO {SALES_ID_SEQUENCE} (id) SELECT NEW.id WHERE NEW.id IS NOT NULL;",
+            *_sqlite_route(partitions, f"COALESCE(NEW.id, {next_id})"),
+            f"DELETE FROM {SALES_ID_SEQUENCE} WHERE id < {next_id};",
+        ]),
+        # A changed sale_date can move the row to another month
+        "sales_update": ("UPDATE", delete_old + _sqlite_route(partitions, "NEW.id")),
+        "sales_delete": ("DELETE", delete_old),
+    }
+    for name, (operation, statements) in triggers.items():
+        conn.exec_driver_sql(
+            f"CREATE TRIGGER {name} INSTEAD OF {operation} ON sales BEGIN\n  "
+            + "\n  ".join(statements) + "\nEND"
+        )
@@ -0,0 +1,111 @@
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.services.metrics import Histogram
+
+
+class PoolMetrics:
+    """Counters for one connection pool, fed by SQLAlchemy pool and engine events."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.checkout_wait_ms = Histogram()
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.connections_created = 0
+        self.invalidations = 0
+        self.pre_ping_failures = 0
+        self._lock = threading.Lock()
+
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "invalidate", self._on_invalidate)
+
+    def remove_listeners(self):
+        event.remove(self.pool, "connect", self._on_connect)
+        event.remove(self.pool, "checkout", self._on_checkout)
+        event.remove(self.pool, "invalidate", self._on_invalidate)
+
+    def _increment(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self._increment("connections_created")
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self._increment("checkouts")
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self._increment("invalidations")
+
+    def snapshot(self) -> dict:
+        return {
+            "pool_class": type(self.pool).__name__,
+            "pool_size": self.pool.size(),
+            "max_overflow": self.pool._max_overflow,
+            "timeout": self.pool.timeout(),
+            "checked_out": self.pool.checkedout(),
+            "checked_in": self.pool.checkedin(),
+            "overflow": self.pool.overflow(),
+            "checkouts": self.checkouts,
+            "checkout_timeouts": self.checkout_timeouts,
+            "connections_created": self.connections_created,
+            "invalidations": self.invalidations,
+            "pre_ping_failures": self.pre_ping_failures,
+            "checkout_wait_ms": self.checkout_wait_ms.snapshot(),
+        }
+
+
+class InstrumentedPoolMixin:
+    """Times every checkout, including the wait for a free connection, into ``metrics``."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics(self)
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.metrics._increment("checkout_timeouts")
+            raise
+        finally:
+            self.metrics.checkout_wait_ms.observe((time.perf_counter() - started) * 1000)
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep accumulating into the same metrics.
+        # The new pool inherits this pool's listeners, so drop the ones of the metrics it
+        # created for itself.
+        pool = super().recreate()
+        pool.metrics.remove_listeners()
+        pool.metrics = self.metrics
+        self.metrics.pool = pool
+        return pool
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(engine: Engine):
+    """Count failed pre-pings on ``engine`` (its pool must be an instrumented pool)."""
+    @event.listens_for(engine, "handle_error")
+    def count_pre_ping_failure(context):
+        metrics = getattr(engine.pool, "metrics", None)
+        if context.is_pre_ping and metrics is not None:
+            metrics._increment("pre_ping_failures")
+
+
+def pool_snapshot(engine: Engine):
+    metrics = getattr(engine.pool, "metrics", None)
+    return metrics.snapshot() if metrics is not None else None
@@ -0,0 +1,117 @@
+import itertools
+import os
+import threading
+import time
+from typing import List, Optional, Sequence
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+# A client that wrote is served from the primary for this many seconds afterwards, so it
+# reads its own writes despite replication lag (0 disables)
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+# A replica that failed is skipped for this long, then probed again
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "10"))
+
+# Cookie holding the time until which the client reads from the primary
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+
+def read_replica(endpoint):
+    """Let ``endpoint`` read from a replica when replicas are configured.
+
+    For GET endpoints that tolerate replication lag. Flushes and INSERT/UPDATE/DELETE
+    statements of the session still go to the primary.
+    """
+    endpoint.read_replica = True
+    return endpoint
+
+
+class RoutingSession(Session):
+    """Session that sends its reads to ``replica`` when one is given, and its flushes
+    and DML statements to the primary it is bound to."""
+
+    def __init__(self, *args, replica: Optional[Engine] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replica = replica
+
+    def get_bind(self, mapper=None, *, clause=None, **kwargs):
+        if self.replica is not None and not self._flushing and not getattr(clause, "is_dml", False):
+            return self.replica
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+class Replica:
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.healthy = True
+        self.retry_at = 0.0
+        self.failures = 0
+
+
+class ReplicaSet:
+    """Round-robin over the replica engines, skipping the ones that failed.
+
+    A replica is marked down when connecting to it fails or a connection to it is lost
+    (requests already using it fail), and probed with ``SELECT 1`` by the next request
+    after ``retry_seconds``. With every replica down, reads go to the primary.
+    """
+
+    def __init__(self, engines: Sequence[Engine] = (), retry_seconds: float = REPLICA_RETRY_SECONDS):
+        self.replicas: List[Replica] = [Replica(engine) for engine in engines]
+        self.retry_seconds = retry_seconds
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+        for replica in self.replicas:
+            event.listen(replica.engine, "handle_error", self._error_listener(replica))
+
+    def __len__(self) -> int:
+        return len(self.replicas)
+
+    def _error_listener(self, replica: Replica):
+        def on_error(context):
+            # No connection: connecting failed. Query errors (syntax, constraints) are not the replica's health
+            if context.is_disconnect or context.connection is None:
+                self.mark_down(replica, context.original_exception)
+        return on_error
+
+    def mark_down(self, replica: Replica, error: Exception = None):
+        with self._lock:
+            if replica.healthy:
+                print(f"Replica {replica.engine.url.render_as_string(hide_password=True)} marked down: {error}")
+            replica.healthy = False
+            replica.failures += 1
+            replica.retry_at = time.monotonic() + self.retry_seconds
+
+    def _probe(self, replica: Replica) -> bool:
+        with self._lock:
+            if time.monotonic() < replica.retry_at:
+                return False
+            # One request probes, the others keep skipping it meanwhile
+            replica.retry_at = time.monotonic() + self.retry_seconds
+        try:
+            with replica.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception:
+            return False
+        with self._lock:
+            replica.healthy = True
+        print(f"Replica {replica.engine.url.render_as_string(hide_password=True)} is back")
+        return True
+
+    def choose(self) -> Optional[Engine]:
+        """The next healthy replica, or None when there is none (read from the primary)."""
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self._turn) % len(self.replicas)]
+            if replica.healthy or self._probe(replica):
+                return replica.engine
+        return None
+
+
+def reads_own_writes(cookies) -> bool:
+    """Whether the client wrote recently enough that it must read from the primary."""
+    try:
+        return float(cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
@@ -1,9 +1,21 @@
 import os
+import time
 
 from dotenv import load_dotenv
+from fastapi import Request, Response
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
+from app.db.pool_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument_engine
+from app.db.replicas import (
+    READ_PRIMARY_COOKIE,
+    READ_YOUR_WRITES_SECONDS,
+    ReplicaSet,
+    RoutingSession,
+    reads_own_writes,
+)
+
 load_dotenv()
 
 # Get database connection parameters from environment variables
@@ -15,26 +27,124 @@ DB_NAME = os.getenv("MYSQL_DATABASE", "ecommerce_admin")
 # Use the DATABASE_URL environment variable if set, otherwise build it from components
 DATABASE_URL = os.getenv("DATABASE_URL", f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}")
 
+# "sync" serves requests from the threadpool with SessionLocal, "async" uses the
+# async engine below and async versions of the routers.
+DB_MODE = os.getenv("DB_MODE", "sync").lower()
+
+# Async drivers used in place of the sync ones when ASYNC_DATABASE_URL is not set
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+mysqlconnector": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def to_async_url(url: str) -> str:
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(DATABASE_URL))
+
+# Comma-separated read replicas for the endpoints marked with @read_replica (sync mode only)
+REPLICA_DATABASE_URLS = [url.strip() for url in os.getenv("REPLICA_DATABASE_URLS", "").split(",") if url.strip()]
+
+# Connection pool sizing (per engine, per worker process)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+
+# mysql-connector: pure Python implementation or the C extension
+MYSQL_USE_PURE = os.getenv("MYSQL_USE_PURE", "True").lower() == "true"
+
 print(f"Using database URL: {DATABASE_URL.replace(DB_PASSWORD, '********')}")
 
+def connect_args_for(url: str) -> dict:
+    if url.startswith("sqlite"):
+        return {"check_same_thread": False} if "aiosqlite" not in url else {}
+    if url.startswith("mysql+mysqlconnector"):
+        return {
+            "connect_timeout": 30,  # Longer timeout for initial connection
+            "use_pure": MYSQL_USE_PURE
+        }
+    return {"connect_timeout": 30}
 
-engine = create_engine(
-    DATABASE_URL,
-    pool_recycle=3600,  
-    pool_pre_ping=True, 
-    connect_args={
-        "connect_timeout": 30,  # Longer timeout for initial connection
-        "use_pure": True 
+def engine_options(url: str, poolclass) -> dict:
+    options = {
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+        "connect_args": connect_args_for(url),
     }
-)
+    # In-memory SQLite keeps a single connection per thread and takes no pool sizing
+    if not (url.split("://", 1)[1] in ("", "/:memory:") or "mode=memory" in url):
+        options.update(
+            poolclass=poolclass,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+        )
+    return options
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL, InstrumentedQueuePool))
+instrument_engine(engine)
+
+replica_engines = []
+for replica_url in REPLICA_DATABASE_URLS:
+    replica_engines.append(create_engine(replica_url, **engine_options(replica_url, InstrumentedQueuePool)))
+    instrument_engine(replica_engines[-1])
+replicas = ReplicaSet(replica_engines)
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=RoutingSession)
+
+# Created lazily so the async driver is only required when DB_MODE=async
+async_engine = None
+AsyncSessionLocal = None
+
+def get_async_sessionmaker() -> async_sessionmaker:
+    global async_engine, AsyncSessionLocal
+    if AsyncSessionLocal is None:
+        async_engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            **engine_options(ASYNC_DATABASE_URL, InstrumentedAsyncQueuePool)
+        )
+        instrument_engine(async_engine.sync_engine)
+        # Objects stay usable after commit: attribute refreshes cannot do IO outside the session
+        AsyncSessionLocal = async_sessionmaker(
+            bind=async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession
+        )
+    return AsyncSessionLocal
+
+def dispose_engines_after_fork():
+    """Drop the pooled connections inherited from the parent process without closing
+    them (they still belong to the parent), so each worker opens its own."""
+    engine.dispose(close=False)
+    for replica_engine in replica_engines:
+        replica_engine.dispose(close=False)
+    if async_engine is not None:
+        async_engine.sync_engine.dispose(close=False)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+def get_db(request: Request, response: Response):
+    replica = None
+    if replicas and request.method in SAFE_METHODS:
+        if getattr(request.scope.get("endpoint"), "read_replica", False) and not reads_own_writes(request.cookies):
+            replica = replicas.choose()
+    elif replicas and READ_YOUR_WRITES_SECONDS > 0:
+        # Until the replicas have caught up with this write, the client reads from the primary
+        response.set_cookie(
+            READ_PRIMARY_COOKIE, str(round(time.time() + READ_YOUR_WRITES_SECONDS, 3)),
+            max_age=int(READ_YOUR_WRITES_SECONDS) + 1, httponly=True, samesite="lax"
+        )
+    db = SessionLocal(replica=replica)
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
@@ -1,12 +1,17 @@
 import os
-import time
-import mysql.connector
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.db.session import Base, engine, get_db
-from app.routers import categories, inventory, products, sales
+from app.db.session import DB_MODE, engine
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.instrumentation import InstrumentationMiddleware
+from app.routers import categories, health, inventory, metrics, products, sales
+from app.routers.async_support import make_async_router
+from app.services.columnar import ANALYTICS_ENGINE
+from app.services.pagination import NEXT_CURSOR_HEADER
+from app.services.prometheus import worker_metrics
+from app.services.readiness import readiness
 
 load_dotenv()
 
@@ -23,49 +28,40 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "Server-Timing"],
 )
 
+# gzip/brotli according to Accept-Encoding
+app.add_middleware(CompressionMiddleware)
+
+# Outermost: per-route latency, SQL and response size for GET /metrics and Server-Timing
+app.add_middleware(InstrumentationMiddleware)
+
 # Environment variables
 API_HOST = os.getenv("API_HOST", "0.0.0.0")
 API_PORT = int(os.getenv("API_PORT", "8000"))
 DEBUG = os.getenv("DEBUG", "True").lower() == "true"
 
-# Create database tables on startup
+# Database checks, schema creation (CREATE_SCHEMA_ON_STARTUP) and pool warm-up run in
+# the background, so startup never blocks the event loop; GET /health/ready reports progress
 @app.on_event("startup")
 async def startup_event():
-    # Get database connection parameters from environment variables
-    db_host = os.getenv("MYSQL_HOST", "db")
-    db_user = os.getenv("MYSQL_USER", "root")
-    db_password = os.getenv("MYSQL_PASSWORD", "password123")
-    db_name = os.getenv("MYSQL_DATABASE", "ecommerce_admin")
-    
-    print(f"Connecting to database: {db_host}/{db_name} as user {db_user}")
-    
-    # Attempt to connect multiple times with a delay (useful for container startup)
-    max_retries = 5
-    retry_delay = 5  # seconds
-    
-    for attempt in range(max_retries):
-        try:
-            # Create tables in the database
-            print(f"Attempt {attempt + 1}/{max_retries} to create tables")
-            Base.metadata.create_all(bind=engine)
-            print("Database tables created successfully")
-            return
-        except Exception as e:
-            print(f"Error during database initialization (attempt {attempt + 1}): {e}")
-            if attempt < max_retries - 1:
-                print(f"Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-            else:
-                print("Max retries reached. Could not initialize database.")
-                raise e
+    readiness.start(engine, load_columnar=ANALYTICS_ENGINE == "columnar")
+    worker_metrics.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    readiness.stop()
+    worker_metrics.stop()
 
-# Include routers
-app.include_router(categories.router)
-app.include_router(products.router)
-app.include_router(inventory.router)
-app.include_router(sales.router)
+# Include routers, as async versions when DB_MODE=async
+for router_module in (categories, products, inventory, sales):
+    if DB_MODE == "async":
+        app.include_router(make_async_router(router_module.router))
+    else:
+        app.include_router(router_module.router)
+app.include_router(metrics.router)
+app.include_router(health.router)
 
 @app.get("/")
 async def root():
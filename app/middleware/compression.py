@@ -0,0 +1,132 @@
+import os
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; clients asking for it get gzip instead
+    brotli = None
+
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "500"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# Already compressed, or must reach the client unbuffered
+EXCLUDED_CONTENT_TYPES = ("text/event-stream", "image/", "application/gzip", "application/zip")
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Best encoding we support from an Accept-Encoding header, honouring q-values."""
+    offered = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        offered[name.strip()] = quality
+
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    candidates = [
+        (offered.get(encoding, offered.get("*", 0.0)), -rank, encoding)
+        for rank, encoding in enumerate(supported)
+    ]
+    quality, _, encoding = max(candidates)
+    return encoding if quality > 0 else None
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, body: bytes, final: bool) -> bytes:
+        # Streaming chunks are flushed so each one reaches the client as it is produced
+        if self.encoding == "br":
+            data = self._brotli.process(body)
+            return data + (self._brotli.finish() if final else self._brotli.flush())
+        data = self._zlib.compress(body)
+        return data + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """Compress responses with brotli or gzip according to the client's Accept-Encoding.
+
+    Bodies under ``minimum_size`` are sent as they are; streamed responses are
+    compressed chunk by chunk. Event streams and already encoded bodies are skipped.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = (
+                    "content-encoding" in headers
+                    or message["status"] in (204, 206, 304)
+                    or content_type.startswith(EXCLUDED_CONTENT_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    start = message  # held until the first body chunk decides
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(raw=start["headers"])
+                headers.add_vary_header("Accept-Encoding")
+                if more_body or len(body) >= self.minimum_size:
+                    compressor = _Compressor(encoding)
+                    headers["Content-Encoding"] = encoding
+                    # The encoded bytes differ from what a strong ETag was computed over
+                    etag = headers.get("etag")
+                    if etag and not etag.startswith("W/"):
+                        headers["ETag"] = f"W/{etag}"
+                    if "content-length" in headers:
+                        del headers["Content-Length"]
+                    if not more_body:
+                        body = compressor.compress(body, final=True)
+                        headers["Content-Length"] = str(len(body))
+                        await send(start)
+                        start = None
+                        await send({**message, "body": body})
+                        return
+                await send(start)
+                start = None
+            if compressor is not None:
+                body = compressor.compress(body, final=not more_body)
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_compressed)
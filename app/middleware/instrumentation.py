@@ -0,0 +1,80 @@
+import time
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.query_audit import query_auditor
+from app.services.request_metrics import (
+    SLOW_REQUEST_MS,
+    RequestTimings,
+    current_timings,
+    log_slow_request,
+    request_metrics,
+)
+
+
+def _route_label(scope: Scope) -> str:
+    # The route template, not the path, so /products/1 and /products/2 share a series
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class InstrumentationMiddleware:
+    """Record latency, SQL statements and time, serialization time and response size per
+    route into ``request_metrics`` (served by ``GET /metrics``).
+
+    Every response carries a ``Server-Timing`` header with the time up to the response
+    start and its database and serialization parts. Requests slower than
+    ``SLOW_REQUEST_MS`` are logged with the SQL they ran. In query audit mode each
+    request's statements also go through ``query_auditor``.
+    """
+
+    def __init__(self, app: ASGIApp, slow_request_ms: float = SLOW_REQUEST_MS):
+        self.app = app
+        self.slow_request_ms = slow_request_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings(audit=query_auditor.enabled)
+        token = current_timings.set(timings)
+        started = time.perf_counter()
+        status = 500
+        response_bytes = 0
+
+        async def send_instrumented(message: Message):
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed = (time.perf_counter() - started) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'app;dur={elapsed:.1f}, db;dur={timings.db_ms:.1f};desc="{timings.statements} queries", '
+                    f"serialize;dur={timings.serialize_ms:.1f}"
+                )
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_instrumented)
+        finally:
+            current_timings.reset(token)
+            duration = (time.perf_counter() - started) * 1000
+            request_metrics.observe(
+                scope["method"], _route_label(scope), status, duration, timings, response_bytes
+            )
+            if duration >= self.slow_request_ms:
+                log_slow_request(scope["method"], scope["path"], status, duration, timings)
+            if timings.audited is not None:
+                # EXPLAINs run on blocking connections: keep them off the event loop
+                await run_in_threadpool(
+                    query_auditor.audit,
+                    f"{scope['method']} {scope['path']}",
+                    timings.audited,
+                    getattr(getattr(scope.get("route"), "endpoint", None), "query_budget", None)
+                )
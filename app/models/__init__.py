@@ -1,7 +1,24 @@
 from app.models.category import Category
 from app.models.inventory import Inventory
+from app.models.low_stock_event import LowStockEvent
 from app.models.product import Product
 from app.models.sale import Sale
+from app.models.sale_rollup import (
+    DailySaleRollup,
+    MonthlySaleRollup,
+    WeeklySaleRollup,
+    YearlySaleRollup,
+)
 
 # This ensures all models are imported and available
-__all__ = ["Product", "Category", "Sale", "Inventory"] 
\ No newline at end of file
+__all__ = [
+    "Product",
+    "Category",
+    "Sale",
+    "Inventory",
+    "LowStockEvent",
+    "DailySaleRollup",
+    "WeeklySaleRollup",
+    "MonthlySaleRollup",
+    "YearlySaleRollup",
+] 
\ No newline at end of file
@@ -16,4 +16,4 @@ class Category(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
-    products = relationship("Product", back_populates="category") 
\ No newline at end of file
+    products = relationship("Product", back_populates="category", lazy="raise") 
\ No newline at end of file
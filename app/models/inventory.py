@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer
+from sqlalchemy import Boolean, Column, Computed, DateTime, ForeignKey, Integer
 from sqlalchemy.orm import relationship
 
 from app.db.session import Base
@@ -13,6 +13,8 @@ class Inventory(Base):
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False, unique=True)
     quantity = Column(Integer, nullable=False, default=0)
     low_stock_threshold = Column(Integer, nullable=False, default=10)
+    # Maintained by the database on every write, so low-stock lookups are an index seek
+    is_low_stock = Column(Boolean, Computed("quantity <= low_stock_threshold", persisted=True), index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -0,0 +1,21 @@
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer
+
+from app.db.session import Base
+
+
+class LowStockEvent(Base):
+    """A product crossing its low stock threshold, in either direction.
+
+    Written in the same transaction as the stock change, so the event feed never
+    reports a change that was rolled back and never misses one that committed.
+    """
+    __tablename__ = "low_stock_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    is_low_stock = Column(Boolean, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    low_stock_threshold = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -13,11 +13,12 @@ class Product(Base):
     name = Column(String(100), nullable=False)
     description = Column(Text)
     price = Column(Float, nullable=False)
-    category_id = Column(Integer, ForeignKey("categories.id"))
+    category_id = Column(Integer, ForeignKey("categories.id"), index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    # Relationships with string references
-    category = relationship("Category", back_populates="products", lazy="joined")
-    inventory = relationship("Inventory", back_populates="product", uselist=False, lazy="joined")
-    sales = relationship("Sale", back_populates="product", lazy="joined") 
\ No newline at end of file
+    # Relationships with string references. Nothing is eager-loaded by default and
+    # collections raise on access; queries opt in with joinedload()/selectinload().
+    category = relationship("Category", back_populates="products")
+    inventory = relationship("Inventory", back_populates="product", uselist=False)
+    sales = relationship("Sale", back_populates="product", lazy="raise") 
\ No newline at end of file
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer
+
+from app.db.session import Base
+
+
+class SaleRollupMixin:
+    """Pre-aggregated sales totals per time bucket and product."""
+
+    bucket_start = Column(DateTime, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    revenue = Column(Float, nullable=False, default=0)
+    quantity = Column(Integer, nullable=False, default=0)
+    total_sales = Column(Integer, nullable=False, default=0)
+
+
+class DailySaleRollup(SaleRollupMixin, Base):
+    __tablename__ = "sales_rollup_daily"
+
+
+class WeeklySaleRollup(SaleRollupMixin, Base):
+    __tablename__ = "sales_rollup_weekly"
+
+
+class MonthlySaleRollup(SaleRollupMixin, Base):
+    __tablename__ = "sales_rollup_monthly"
+
+
+class YearlySaleRollup(SaleRollupMixin, Base):
+    __tablename__ = "sales_rollup_yearly"
@@ -0,0 +1,82 @@
+import inspect
+
+from fastapi import APIRouter, Depends
+from fastapi.params import Depends as DependsParam
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_async_db, get_db
+
+
+def _session_parameter(endpoint):
+    for name, parameter in inspect.signature(endpoint).parameters.items():
+        if isinstance(parameter.default, DependsParam) and parameter.default.dependency is get_db:
+            return name
+    return None
+
+
+def keep_sync(endpoint):
+    """Leave ``endpoint`` on the sync engine in async mode.
+
+    For handlers whose response outlives the handler (streaming), which cannot hold a
+    session borrowed through ``AsyncSession.run_sync``.
+    """
+    endpoint.keep_sync = True
+    return endpoint
+
+
+def async_endpoint(endpoint):
+    """Async version of a sync endpoint that takes ``db: Session = Depends(get_db)``.
+
+    The handler receives an ``AsyncSession`` and runs the original endpoint body through
+    ``AsyncSession.run_sync``: the ORM code is unchanged, but every database round-trip
+    is awaited on the event loop through the async driver instead of blocking a
+    threadpool worker. Endpoints without a session dependency, or marked with
+    ``keep_sync``, are returned unchanged.
+    """
+    session_name = _session_parameter(endpoint)
+    if session_name is None or getattr(endpoint, "keep_sync", False):
+        return endpoint
+
+    async def handler(**kwargs):
+        db: AsyncSession = kwargs.pop(session_name)
+        return await db.run_sync(lambda session: endpoint(**kwargs, **{session_name: session}))
+
+    signature = inspect.signature(endpoint)
+    handler.__signature__ = signature.replace(parameters=[
+        parameter.replace(annotation=AsyncSession, default=Depends(get_async_db))
+        if name == session_name else parameter
+        for name, parameter in signature.parameters.items()
+    ])
+    handler.__name__ = endpoint.__name__
+    handler.__doc__ = endpoint.__doc__
+    if hasattr(endpoint, "query_budget"):
+        handler.query_budget = endpoint.query_budget
+    return handler
+
+
+def make_async_router(router: APIRouter) -> APIRouter:
+    """Copy of ``router`` with every session-using endpoint replaced by its async version."""
+    async_router = APIRouter()
+    for route in router.routes:
+        if not isinstance(route, APIRoute):
+            async_router.routes.append(route)
+            continue
+        async_router.add_api_route(
+            route.path,
+            async_endpoint(route.endpoint),
+            response_model=route.response_model,
+            status_code=route.status_code,
+            tags=route.tags,
+            dependencies=route.dependencies,
+            summary=route.summary,
+            description=route.description,
+            response_description=route.response_description,
+            responses=route.responses,
+            deprecated=route.deprecated,
+            methods=route.methods,
+            operation_id=route.operation_id,
+            response_class=route.response_class,
+            name=route.name,
+        )
+    return async_router
@@ -0,0 +1,106 @@
+import functools
+import hashlib
+import inspect
+from datetime import datetime
+from enum import Enum
+from typing import Callable, Iterable
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from app.db.replicas import reads_own_writes
+from app.services.cache import CachedResponse, response_cache
+from app.services.request_metrics import timed_serialization
+
+
+def _normalize(value) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return str(value.value)
+    return str(value)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in (candidate.removeprefix("W/") for candidate in candidates)
+
+
+def _respond(entry: CachedResponse, request: Request, status: str) -> Response:
+    headers = {**entry.headers, "ETag": entry.etag, "Cache-Control": "no-cache", "X-Cache": status}
+    if _etag_matches(request.headers.get("if-none-match", ""), entry.etag):
+        response_cache._increment("not_modified")
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+def cached(response_model, tags: Callable[..., Iterable[str]]):
+    """Cache the serialized response of a read endpoint in ``response_cache``.
+
+    Entries are keyed by endpoint and its validated arguments (so parameter order and
+    equivalent spellings share an entry) and tagged with ``tags(**arguments)`` for
+    invalidation by writes. Responses carry an ETag; ``If-None-Match`` gets a 304.
+    Headers the endpoint sets on its ``Response`` parameter are cached with the body.
+
+    Requests whose session reads from a replica, and clients that must read their own
+    writes, bypass the cache (``X-Cache: BYPASS``): a replica may not have caught up
+    with writes that already invalidated the cache.
+    """
+    adapter = TypeAdapter(response_model)
+
+    def decorator(endpoint):
+        signature = inspect.signature(endpoint)
+        response_name = next(
+            (name for name, parameter in signature.parameters.items() if parameter.annotation is Response),
+            None
+        )
+        session_name = next(
+            (name for name, parameter in signature.parameters.items() if parameter.annotation is Session),
+            None
+        )
+        key_names = [
+            name for name, parameter in signature.parameters.items()
+            if parameter.annotation not in (Response, Request, Session)
+        ]
+
+        def render(*args, **kwargs) -> CachedResponse:
+            result = endpoint(*args, **kwargs)
+            if isinstance(result, Response):
+                # Already serialized by the endpoint (fast JSON path)
+                body = result.body
+                headers = {
+                    name: value for name, value in result.headers.items()
+                    if name not in ("content-length", "content-type")
+                }
+            else:
+                with timed_serialization():
+                    body = adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+                headers = dict(kwargs[response_name].headers) if response_name else {}
+            return CachedResponse(body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"', headers)
+
+        @functools.wraps(endpoint)
+        def wrapper(*args, cache_request: Request, **kwargs):
+            on_replica = session_name and getattr(kwargs[session_name], "replica", None) is not None
+            if on_replica or reads_own_writes(cache_request.cookies):
+                return _respond(render(*args, **kwargs), cache_request, "BYPASS")
+
+            key = f"{endpoint.__module__}.{endpoint.__name__}?" + "&".join(
+                f"{name}={_normalize(kwargs.get(name))}" for name in sorted(key_names)
+            )
+            entry = response_cache.get(key)
+            if entry is not None:
+                return _respond(entry, cache_request, "HIT")
+
+            generation = response_cache.generation
+            entry = render(*args, **kwargs)
+            response_cache.set(key, entry, tags(**{name: kwargs.get(name) for name in key_names}), generation)
+            return _respond(entry, cache_request, "MISS")
+
+        wrapper.__signature__ = signature.replace(parameters=[
+            *signature.parameters.values(),
+            inspect.Parameter("cache_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+        ])
+        return wrapper
+
+    return decorator
@@ -1,11 +1,17 @@
-from typing import List
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 
+from app.db.replicas import read_replica
 from app.db.session import get_db
 from app.models.category import Category
+from app.routers.caching import cached
 from app.schemas.category import CategoryCreate, CategoryResponse
+from app.services.cache import response_cache
+from app.services.fast_json import field_selector, row_response, rows_response, schema_columns
+from app.services.pagination import paginate, set_next_cursor
+from app.services.query_audit import query_budget
 
 router = APIRouter(
     prefix="/categories",
@@ -13,28 +19,45 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=CategoryResponse)
+@query_budget(2)
 def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
     db_category = Category(**category.model_dump())
     db.add(db_category)
     db.commit()
     db.refresh(db_category)
+    response_cache.invalidate("categories", f"category:{db_category.id}")
     return db_category
 
 @router.get("/{category_id}", response_model=CategoryResponse)
-def get_category(category_id: int, db: Session = Depends(get_db)):
-    category = db.query(Category).filter(Category.id == category_id).first()
+@query_budget(1)
+@cached(CategoryResponse, tags=lambda category_id, **_: [f"category:{category_id}"])
+def get_category(
+    category_id: int,
+    fields: Tuple[str, ...] = Depends(field_selector(CategoryResponse)),
+    db: Session = Depends(get_db)
+):
+    category = db.query(*schema_columns(Category, CategoryResponse, fields)).filter(Category.id == category_id).first()
     if not category:
         raise HTTPException(
             status_code=404,
             detail=f"Category with id {category_id} not found"
         )
-    return category
+    return row_response(category, CategoryResponse, fields)
 
 @router.get("/", response_model=List[CategoryResponse])
+@read_replica
+@query_budget(1)
+@cached(List[CategoryResponse], tags=lambda **_: ["categories"])
 def list_categories(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Tuple[str, ...] = Depends(field_selector(CategoryResponse)),
     db: Session = Depends(get_db)
 ):
-    categories = db.query(Category).offset(skip).limit(limit).all()
-    return categories 
\ No newline at end of file
+    sort_key = [Category.id]
+    columns = schema_columns(Category, CategoryResponse, fields, tuple(sort_key))
+    categories = paginate(db.query(*columns), sort_key, skip, limit, cursor).all()
+    set_next_cursor(response, categories, sort_key, limit)
+    return rows_response(categories, CategoryResponse, response, fields) 
\ No newline at end of file
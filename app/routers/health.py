@@ -0,0 +1,23 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.schemas.health import LivenessResponse, ReadinessResponse
+from app.services.readiness import readiness
+
+router = APIRouter(
+    prefix="/health",
+    tags=["health"]
+)
+
+@router.get("/live", response_model=LivenessResponse)
+async def get_liveness():
+    """The process is serving requests; it may not be ready for traffic yet."""
+    return {"status": "alive"}
+
+@router.get("/ready", response_model=ReadinessResponse, responses={503: {"model": ReadinessResponse}})
+async def get_readiness():
+    """Database reachable and connection pools warmed: 200, otherwise 503 with progress."""
+    snapshot = readiness.snapshot()
+    if not readiness.ready:
+        return JSONResponse(status_code=503, content=snapshot)
+    return snapshot
@@ -1,11 +1,21 @@
-from typing import List
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import true
 from sqlalchemy.orm import Session
 
+from app.db.replicas import read_replica
 from app.db.session import get_db
 from app.models.inventory import Inventory
+from app.routers.async_support import keep_sync
 from app.schemas.inventory import InventoryResponse, InventoryUpdate
+from app.services.cache import response_cache
+from app.services.fast_json import field_selector, rows_response, schema_columns
+from app.services.inventory import record_stock_change
+from app.services.low_stock_feed import low_stock_events
+from app.services.pagination import paginate, set_next_cursor
+from app.services.query_audit import query_budget
 
 router = APIRouter(
     prefix="/inventory",
@@ -13,13 +23,14 @@ router = APIRouter(
 )
 
 @router.patch("/{product_id}", response_model=InventoryResponse)
+@query_budget(4)
 def update_inventory(
     product_id: int,
     inventory_update: InventoryUpdate,
     db: Session = Depends(get_db)
 ):
-    # Get the inventory item
-    inventory = db.query(Inventory).filter(Inventory.product_id == product_id).first()
+    # Get the inventory item, locked so the threshold crossing is judged on current stock
+    inventory = db.query(Inventory).filter(Inventory.product_id == product_id).with_for_update().first()
     if not inventory:
         raise HTTPException(
             status_code=404,
@@ -27,39 +38,63 @@ def update_inventory(
         )
     
     # Update the inventory
+    was_low = inventory.quantity <= inventory.low_stock_threshold
     update_data = inventory_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(inventory, field, value)
-    
+    record_stock_change(db, product_id, was_low, inventory.quantity, inventory.low_stock_threshold)
+
     db.commit()
     db.refresh(inventory)
+    response_cache.invalidate(f"product:{product_id}")
     return inventory
 
 @router.get("/low-stock", response_model=List[InventoryResponse])
+@read_replica
+@query_budget(1)
 def list_low_stock(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Tuple[str, ...] = Depends(field_selector(InventoryResponse)),
+    db: Session = Depends(get_db)
+):
+    sort_key = [Inventory.id]
+    columns = schema_columns(Inventory, InventoryResponse, fields, tuple(sort_key))
+    low_stock_items = paginate(
+        db.query(*columns).filter(Inventory.is_low_stock == true()),
+        sort_key, skip, limit, cursor
+    ).all()
+    set_next_cursor(response, low_stock_items, sort_key, limit)
+    return rows_response(low_stock_items, InventoryResponse, response, fields)
+
+@router.get("/low-stock/events", response_class=StreamingResponse)
+@keep_sync
+def stream_low_stock_events(
+    last_event_id: Optional[int] = Header(None),
     db: Session = Depends(get_db)
 ):
-    low_stock_items = (
-        db.query(Inventory)
-        .filter(Inventory.quantity <= Inventory.low_stock_threshold)
-        .offset(skip)
-        .limit(limit)
-        .all()
+    """Server-sent events (``low_stock`` / ``restocked``) whenever a product crosses its threshold."""
+    return StreamingResponse(
+        low_stock_events(db.get_bind(), last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
-    return low_stock_items
 
 @router.get("/", response_model=List[InventoryResponse])
+@read_replica
+@query_budget(1)
 def list_inventory(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Tuple[str, ...] = Depends(field_selector(InventoryResponse)),
     db: Session = Depends(get_db)
 ):
-    inventory = (
-        db.query(Inventory)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
-    return inventory 
\ No newline at end of file
+    sort_key = [Inventory.id]
+    columns = schema_columns(Inventory, InventoryResponse, fields, tuple(sort_key))
+    inventory = paginate(db.query(*columns), sort_key, skip, limit, cursor).all()
+    set_next_cursor(response, inventory, sort_key, limit)
+    return rows_response(inventory, InventoryResponse, response, fields) 
\ No newline at end of file
@@ -0,0 +1,40 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.db import session
+from app.db.pool_metrics import pool_snapshot
+from app.schemas.metrics import CacheMetricsResponse, DatabasePoolsResponse, ReplicaPoolResponse
+from app.services import prometheus
+from app.services.cache import response_cache
+from app.services.request_metrics import PROMETHEUS_CONTENT_TYPE
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["metrics"]
+)
+
+@router.get("", response_class=PlainTextResponse)
+def get_prometheus_metrics():
+    """Request, connection pool and cache metrics in the Prometheus text format, summed
+    over all workers when METRICS_MULTIPROC_DIR is set."""
+    return PlainTextResponse("\n".join(prometheus.render_lines()) + "\n", media_type=PROMETHEUS_CONTENT_TYPE)
+
+@router.get("/db-pool", response_model=DatabasePoolsResponse)
+def get_db_pool_metrics():
+    return DatabasePoolsResponse(
+        primary=pool_snapshot(session.engine),
+        async_primary=pool_snapshot(session.async_engine.sync_engine) if session.async_engine else None,
+        replicas=[
+            ReplicaPoolResponse(
+                url=replica.engine.url.render_as_string(hide_password=True),
+                healthy=replica.healthy,
+                failures=replica.failures,
+                pool=pool_snapshot(replica.engine),
+            )
+            for replica in session.replicas.replicas
+        ]
+    )
+
+@router.get("/cache", response_model=CacheMetricsResponse)
+def get_cache_metrics():
+    return CacheMetricsResponse(**response_cache.stats())
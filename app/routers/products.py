@@ -1,13 +1,19 @@
-from typing import List
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 
+from app.db.replicas import read_replica
 from app.db.session import get_db
 from app.models.category import Category
 from app.models.inventory import Inventory
 from app.models.product import Product
+from app.routers.caching import cached
 from app.schemas.product import ProductCreate, ProductResponse
+from app.services.cache import response_cache
+from app.services.fast_json import field_selector, row_response, rows_response, schema_columns
+from app.services.pagination import paginate, set_next_cursor
+from app.services.query_audit import query_budget
 
 router = APIRouter(
     prefix="/products",
@@ -15,25 +21,40 @@ router = APIRouter(
 )
 
 @router.get("/{product_id}", response_model=ProductResponse)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    product = db.query(Product).filter(Product.id == product_id).first()
+@query_budget(1)
+@cached(ProductResponse, tags=lambda product_id, **_: [f"product:{product_id}"])
+def get_product(
+    product_id: int,
+    fields: Tuple[str, ...] = Depends(field_selector(ProductResponse)),
+    db: Session = Depends(get_db)
+):
+    product = db.query(*schema_columns(Product, ProductResponse, fields)).filter(Product.id == product_id).first()
     if not product:
         raise HTTPException(
             status_code=404,
             detail=f"Product with id {product_id} not found"
         )
-    return product
+    return row_response(product, ProductResponse, fields)
 
 @router.get("/", response_model=List[ProductResponse])
+@read_replica
+@query_budget(1)
 def list_products(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Tuple[str, ...] = Depends(field_selector(ProductResponse)),
     db: Session = Depends(get_db)
 ):
-    products = db.query(Product).offset(skip).limit(limit).all()
-    return products
+    sort_key = [Product.id]
+    columns = schema_columns(Product, ProductResponse, fields, tuple(sort_key))
+    products = paginate(db.query(*columns), sort_key, skip, limit, cursor).all()
+    set_next_cursor(response, products, sort_key, limit)
+    return rows_response(products, ProductResponse, response, fields)
 
 @router.post("/", response_model=ProductResponse)
+@query_budget(4)
 def create_product(product: ProductCreate, db: Session = Depends(get_db)):
     # Check if category exists
     category = db.query(Category).filter(Category.id == product.category_id).first()
@@ -64,5 +85,6 @@ def create_product(product: ProductCreate, db: Session = Depends(get_db)):
     # Commit both product and inventory
     db.commit()
     db.refresh(db_product)
+    response_cache.invalidate(f"product:{db_product.id}")
     
     return db_product 
\ No newline at end of file
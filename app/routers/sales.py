@@ -1,37 +1,181 @@
-from datetime import datetime, timedelta
-from enum import Enum
-from typing import List, Optional
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.db.replicas import read_replica
 from app.db.session import get_db
+from app.models.product import Product
 from app.models.sale import Sale
-from app.schemas.sale import ComparisonResponse, RevenueResponse, SaleCreate, SaleResponse
+from app.routers.async_support import keep_sync
+from app.routers.caching import cached
+from app.schemas.sale import (
+    AnalyticsEngine,
+    BulkSaleResponse,
+    CategoryRevenueResponse,
+    ComparisonResponse,
+    ExportFormat,
+    IntervalType,
+    MultiPeriodComparisonResponse,
+    PeriodComparison,
+    PeriodRevenue,
+    RankingMetric,
+    RevenueResponse,
+    SaleCreate,
+    SaleResponse,
+    TopProductResponse,
+)
+from app.services.analytics import revenue_by_category, top_products
+from app.services.bulk_sales import (
+    BULK_SALES_CHUNK_SIZE,
+    BULK_SALES_MAX_ROWS,
+    ingest_sales,
+    parse_ndjson_line,
+)
+from app.services.cache import response_cache, revenue_tags, sale_tags
+from app.services.cold_storage import available_cold_sales, compare_periods_with_cold
+from app.services.columnar import ANALYTICS_ENGINE, ColumnarSales, columnar_sales, record_sales
+from app.services.columnar import available as columnar_available
+from app.services.comparison import Period, PeriodTotals, compare_periods, percentage_change
+from app.services.export import MEDIA_TYPES, stream_export
+from app.services.fast_json import field_selector, rows_response, schema_columns
+from app.services.inventory import decrement_stock
+from app.services.pagination import paginate, set_next_cursor
+from app.services.query_audit import query_budget
+from app.services.rollups import (
+    apply_sale_to_rollups,
+    bucket_start,
+    format_bucket,
+    next_bucket_start,
+)
+from app.services.timeseries import resolve_timezone, revenue_series, to_local, utc_range
+
+# Largest page served by list_sales; full result sets go through /sales/export
+MAX_PAGE_SIZE = 1000
+
+# Engine that actually answered an analytics request
+ANALYTICS_ENGINE_HEADER = "X-Analytics-Engine"
+
+EXPORT_COLUMNS = (
+    Sale.id, Sale.product_id, Sale.quantity, Sale.unit_price,
+    Sale.total_amount, Sale.sale_date, Sale.created_at, Sale.updated_at,
+)
 
 router = APIRouter(
     prefix="/sales",
     tags=["sales"]
 )
 
-class IntervalType(str, Enum):
-    DAILY = "daily"
-    WEEKLY = "weekly"
-    MONTHLY = "monthly"
-    YEARLY = "yearly"
-
 @router.get("/revenue", response_model=List[RevenueResponse])
+@read_replica
+@query_budget(1)
+@cached(List[RevenueResponse], tags=lambda start_date, end_date, tz, **_: _revenue_cache_tags(start_date, end_date, tz))
 def get_revenue_by_interval(
+    response: Response,
     interval: IntervalType = Query(..., description="Time interval for revenue aggregation"),
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
+    tz: str = Query("UTC", description="IANA time zone to bucket in; naive dates are local to it"),
+    engine: AnalyticsEngine = Query(AnalyticsEngine(ANALYTICS_ENGINE), description="sql or the in-memory columnar engine"),
+    db: Session = Depends(get_db)
+):
+    """Revenue per calendar bucket in `tz`, with every bucket of the range present (zero when empty)."""
+    zone = _parse_timezone(tz)
+    store = _analytics_store(engine, response)
+    # Naive like every other default date of this router: the current local time in `tz`
+    start_date, end_date = _default_range(interval, start_date, end_date or datetime.now(zone).replace(tzinfo=None))
+    try:
+        series = revenue_series(
+            db, interval, start_date, end_date, zone, store, None if store else available_cold_sales()
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{e}; request a coarser interval or a shorter range"
+        )
+    return [
+        RevenueResponse(
+            interval=format_bucket(bucket, interval),
+            bucket_start=bucket,
+            revenue=revenue,
+            total_sales=total_sales
+        )
+        for bucket, revenue, total_sales in series
+    ]
+
+def _analytics_store(engine: AnalyticsEngine, response: Response) -> Optional[ColumnarSales]:
+    """The columnar engine when requested and loaded; None (SQL) otherwise."""
+    store = columnar_sales if engine == AnalyticsEngine.COLUMNAR and columnar_available() else None
+    response.headers[ANALYTICS_ENGINE_HEADER] = AnalyticsEngine.COLUMNAR.value if store else AnalyticsEngine.SQL.value
+    return store
+
+def _parse_timezone(name: str):
+    try:
+        return resolve_timezone(name)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+
+def _revenue_cache_tags(start_date: Optional[datetime], end_date: Optional[datetime], tz: str) -> List[str]:
+    # Sales are tagged by their UTC month
+    if start_date is None or end_date is None:
+        return revenue_tags(None, None)
+    return revenue_tags(*utc_range(start_date, end_date, resolve_timezone(tz)))
+
+@router.get("/top-products", response_model=List[TopProductResponse])
+@read_replica
+@query_budget(2)
+@cached(List[TopProductResponse], tags=lambda start_date, end_date, **_: revenue_tags(start_date, end_date))
+def get_top_products(
+    response: Response,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    interval: Optional[IntervalType] = Query(None, description="Rank products within each bucket"),
+    limit: int = Query(10, ge=1, le=100, description="Products per ranking"),
+    order_by: RankingMetric = RankingMetric.REVENUE,
+    category_id: Optional[int] = None,
+    engine: AnalyticsEngine = Query(AnalyticsEngine(ANALYTICS_ENGINE), description="sql or the in-memory columnar engine"),
+    db: Session = Depends(get_db)
+):
+    """Best selling products over the range (default: the last 30 days), or per `interval` bucket."""
+    store = _analytics_store(engine, response)
+    start_date, end_date = _default_range(interval, _naive_utc(start_date), _naive_utc(end_date))
+    return top_products(db, start_date, end_date, interval, limit, order_by, category_id, store)
+
+@router.get("/revenue-by-category", response_model=List[CategoryRevenueResponse])
+@read_replica
+@query_budget(1)
+@cached(List[CategoryRevenueResponse], tags=lambda start_date, end_date, **_: revenue_tags(start_date, end_date))
+def get_revenue_by_category(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    interval: Optional[IntervalType] = Query(None, description="Split the totals per bucket"),
     db: Session = Depends(get_db)
 ):
+    """Revenue per category over the range (default: the last 30 days), or per `interval` bucket."""
+    start_date, end_date = _default_range(interval, _naive_utc(start_date), _naive_utc(end_date))
+    return revenue_by_category(db, start_date, end_date, interval)
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Offsets are converted to naive UTC, like stored sale dates, so either bound may have one
+    return to_local(value, timezone.utc) if value else value
+
+def _default_range(
+    interval: Optional[IntervalType],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime]
+) -> Tuple[datetime, datetime]:
+    """Fill in a missing range: up to now, over a window suited to ``interval``."""
     if not end_date:
         end_date = datetime.now()
     if not start_date:
-        if interval == IntervalType.DAILY:
+        if interval is None or interval == IntervalType.DAILY:
             start_date = end_date - timedelta(days=30)
         elif interval == IntervalType.WEEKLY:
             start_date = end_date - timedelta(weeks=12)
@@ -39,128 +183,268 @@ def get_revenue_by_interval(
             start_date = end_date - timedelta(days=365)
         else:
             start_date = end_date - timedelta(days=365*5)
+    return start_date, end_date
 
-    dialect = db.bind.dialect.name
-    if interval == IntervalType.DAILY:
-        if dialect == "sqlite":
-            date_expr = func.strftime("%Y-%m-%d", Sale.sale_date)
-        else:
-            date_expr = func.date_format(Sale.sale_date, "%Y-%m-%d")
-    elif interval == IntervalType.WEEKLY:
-        if dialect == "sqlite":
-            date_expr = func.strftime("%Y-%W", Sale.sale_date)
-        else:
-            date_expr = func.date_format(Sale.sale_date, "%Y-%U")
-    elif interval == IntervalType.MONTHLY:
-        if dialect == "sqlite":
-            date_expr = func.strftime("%Y-%m", Sale.sale_date)
-        else:
-            date_expr = func.date_format(Sale.sale_date, "%Y-%m")
-    else:  # YEARLY
-        if dialect == "sqlite":
-            date_expr = func.strftime("%Y", Sale.sale_date)
-        else:
-            date_expr = func.date_format(Sale.sale_date, "%Y")
-
-    revenue_data = db.query(
-        date_expr.label("interval"),
-        func.sum(Sale.total_amount).label("revenue"),
-        func.count(Sale.id).label("total_sales")
-    ).filter(
-        Sale.sale_date >= start_date,
-        Sale.sale_date <= end_date
-    ).group_by(
-        date_expr
-    ).all()
-
-    return [
-        RevenueResponse(
-            interval=item.interval,
-            revenue=item.revenue,
-            total_sales=item.total_sales
-        )
-        for item in revenue_data
-    ]
+def _filter_sales(query, start_date, end_date, product_id, min_amount, max_amount):
+    """Apply the ``list_sales`` filters to an ORM query or a ``select()``."""
+    if start_date:
+        query = query.filter(Sale.sale_date >= start_date)
+    if end_date:
+        query = query.filter(Sale.sale_date <= end_date)
+    if product_id:
+        query = query.filter(Sale.product_id == product_id)
+    if min_amount:
+        query = query.filter(Sale.total_amount >= min_amount)
+    if max_amount:
+        query = query.filter(Sale.total_amount <= max_amount)
+    return query
 
 @router.get("/", response_model=List[SaleResponse])
+@read_replica
+@query_budget(1)
 def list_sales(
+    response: Response,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE, description="Use /sales/export for more rows"),
+    cursor: Optional[str] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     product_id: Optional[int] = None,
     min_amount: Optional[float] = None,
     max_amount: Optional[float] = None,
+    fields: Tuple[str, ...] = Depends(field_selector(SaleResponse)),
     db: Session = Depends(get_db)
 ):
-    query = db.query(Sale)
-    
-    # Apply filters
-    if start_date:
-        query = query.filter(Sale.sale_date >= start_date)
-    if end_date:
-        query = query.filter(Sale.sale_date <= end_date)
-    if product_id:
-        query = query.filter(Sale.product_id == product_id)
-    if min_amount:
-        query = query.filter(Sale.total_amount >= min_amount)
-    if max_amount:
-        query = query.filter(Sale.total_amount <= max_amount)
-    
-    # Apply pagination
-    sales = query.order_by(Sale.sale_date.desc()).offset(skip).limit(limit).all()
-    return sales
+    sort_key = [Sale.sale_date, Sale.id]
+    query = _filter_sales(
+        db.query(*schema_columns(Sale, SaleResponse, fields, tuple(sort_key))),
+        start_date, end_date, product_id, min_amount, max_amount
+    )
+
+    # Apply pagination, newest first
+    sales = paginate(query, sort_key, skip, limit, cursor, descending=True).all()
+    set_next_cursor(response, sales, sort_key, limit)
+    return rows_response(sales, SaleResponse, response, fields)
+
+@router.get("/export", response_class=StreamingResponse)
+@read_replica
+@query_budget(1)
+@keep_sync
+def export_sales(
+    format: ExportFormat = ExportFormat.CSV,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    product_id: Optional[int] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    db: Session = Depends(get_db)
+):
+    """Stream every sale matching the ``list_sales`` filters, newest first, as CSV or NDJSON."""
+    statement = _filter_sales(
+        select(*EXPORT_COLUMNS),
+        start_date, end_date, product_id, min_amount, max_amount
+    ).order_by(Sale.sale_date.desc(), Sale.id.desc())
+
+    # The body is produced after this handler returns, on a connection of its own
+    return StreamingResponse(
+        stream_export(db.get_bind(), statement, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="sales.{format.value}"'}
+    )
 
 @router.get("/compare", response_model=ComparisonResponse)
+@read_replica
+@query_budget(1)
 def compare_revenue(
+    response: Response,
     current_start: datetime = Query(..., description="Start date of current period"),
     current_end: datetime = Query(..., description="End date of current period"),
     previous_start: Optional[datetime] = None,
     previous_end: Optional[datetime] = None,
+    engine: AnalyticsEngine = Query(AnalyticsEngine(ANALYTICS_ENGINE), description="sql or the in-memory columnar engine"),
     db: Session = Depends(get_db)
 ):
+    store = _analytics_store(engine, response)
+    # Naive UTC, so dates with and without an offset can be mixed
+    current_start, current_end, previous_start, previous_end = (
+        value and to_local(value, timezone.utc)
+        for value in (current_start, current_end, previous_start, previous_end)
+    )
     # Calculate previous period if not provided
     if not previous_start or not previous_end:
         period_days = (current_end - current_start).days
         previous_end = current_start - timedelta(days=1)
         previous_start = previous_end - timedelta(days=period_days)
 
-    # Get current period revenue
-    current_revenue = db.query(func.sum(Sale.total_amount)).filter(
-        Sale.sale_date >= current_start,
-        Sale.sale_date <= current_end
-    ).scalar() or 0
-
-    # Get previous period revenue
-    previous_revenue = db.query(func.sum(Sale.total_amount)).filter(
-        Sale.sale_date >= previous_start,
-        Sale.sale_date <= previous_end
-    ).scalar() or 0
-
-    # Calculate percentage change
-    if previous_revenue == 0:
-        percentage_change = 100 if current_revenue > 0 else 0
-    else:
-        percentage_change = ((current_revenue - previous_revenue) / previous_revenue) * 100
+    periods = [Period(current_start, current_end), Period(previous_start, previous_end)]
+    current, previous = _period_totals(db, periods, store)
 
     return ComparisonResponse(
-        current_period={
-            "start_date": current_start,
-            "end_date": current_end,
-            "revenue": current_revenue
-        },
-        previous_period={
-            "start_date": previous_start,
-            "end_date": previous_end,
-            "revenue": previous_revenue
-        },
-        percentage_change=percentage_change
+        current_period=_period_revenue(current_start, current_end, current),
+        previous_period=_period_revenue(previous_start, previous_end, previous),
+        percentage_change=percentage_change(current.revenue, previous.revenue)
+    )
+
+@router.get("/compare/periods", response_model=MultiPeriodComparisonResponse)
+@read_replica
+@query_budget(1)
+def compare_revenue_periods(
+    response: Response,
+    period: Optional[List[str]] = Query(
+        None,
+        description="Period as 'start/end' ISO timestamps (inclusive); repeat for each period"
+    ),
+    interval: Optional[IntervalType] = Query(
+        None,
+        description="Compare the last `count` calendar intervals instead of explicit periods"
+    ),
+    count: int = Query(4, ge=1, le=366),
+    end_date: Optional[datetime] = None,
+    engine: AnalyticsEngine = Query(AnalyticsEngine(ANALYTICS_ENGINE), description="sql or the in-memory columnar engine"),
+    db: Session = Depends(get_db)
+):
+    store = _analytics_store(engine, response)
+    if period:
+        periods = [_parse_period(value) for value in period]
+    elif interval:
+        periods = _trailing_periods(interval, count, end_date or datetime.now())
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail="Either 'period' or 'interval' must be provided"
+        )
+
+    totals = _period_totals(db, periods, store)
+
+    results = []
+    for i, (bounds, period_totals) in enumerate(zip(periods, totals)):
+        change = None
+        if i > 0:
+            change = percentage_change(period_totals.revenue, totals[i - 1].revenue)
+        results.append(PeriodComparison(
+            **_period_revenue(bounds.start, bounds.end, period_totals).model_dump(),
+            percentage_change=change
+        ))
+    return MultiPeriodComparisonResponse(periods=results)
+
+def _period_totals(db: Session, periods: List[Period], store: Optional[ColumnarSales]) -> List[PeriodTotals]:
+    if store:
+        return store.period_totals(periods)
+    cold = available_cold_sales()
+    if cold:
+        return compare_periods_with_cold(db, periods, cold)
+    return compare_periods(db, periods)
+
+def _period_revenue(start: datetime, end: datetime, totals: PeriodTotals) -> PeriodRevenue:
+    return PeriodRevenue(
+        start_date=start,
+        end_date=end,
+        revenue=totals.revenue,
+        total_sales=totals.total_sales,
+        units_sold=totals.units_sold,
+        average_order_value=totals.average_order_value
     )
 
+def _parse_period(value: str) -> Period:
+    try:
+        start, end = value.split("/")
+        # Offsets are converted to naive UTC, like stored sale dates, so either side may have one
+        period = Period(
+            to_local(datetime.fromisoformat(start), timezone.utc),
+            to_local(datetime.fromisoformat(end), timezone.utc),
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid period '{value}', expected 'start/end' ISO timestamps"
+        )
+    if period.start > period.end:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid period '{value}', start is after end"
+        )
+    return period
+
+def _trailing_periods(interval: IntervalType, count: int, end_date: datetime) -> List[Period]:
+    """The ``count`` calendar buckets ending with the (partial) one containing ``end_date``."""
+    starts = [bucket_start(end_date, interval)]
+    while len(starts) < count:
+        starts.insert(0, bucket_start(starts[0] - timedelta(microseconds=1), interval))
+    periods = [
+        Period(start, next_bucket_start(start, interval), include_end=False)
+        for start in starts[:-1]
+    ]
+    periods.append(Period(starts[-1], end_date))
+    return periods
+
 @router.post("/", response_model=SaleResponse)
+@query_budget(8)
 def create_sale(sale: SaleCreate, db: Session = Depends(get_db)):
+    if not decrement_stock(db, sale.product_id, sale.quantity):
+        db.rollback()
+        if db.query(Product.id).filter(Product.id == sale.product_id).first() is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Product with id {sale.product_id} not found"
+            )
+        raise HTTPException(
+            status_code=409,
+            detail=f"Insufficient stock for product id {sale.product_id}"
+        )
+
     db_sale = Sale(**sale.model_dump())
     db.add(db_sale)
+    apply_sale_to_rollups(db, db_sale)
+    record_sales(db)
     db.commit()
+    response_cache.invalidate(*sale_tags(sale.product_id, sale.sale_date))
     db.refresh(db_sale)
-    return db_sale 
\ No newline at end of file
+    return db_sale
+
+async def read_bulk_sales(request: Request) -> List[Any]:
+    """Parse the bulk body: a JSON array, or NDJSON (one sale per line) streamed line by line."""
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        items, buffer = [], b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            items.extend(parse_ndjson_line(line) for line in lines if line.strip())
+            if len(items) > BULK_SALES_MAX_ROWS:
+                break
+        if buffer.strip():
+            items.append(parse_ndjson_line(buffer))
+    else:
+        try:
+            items = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail="Request body must be a JSON array or NDJSON"
+            )
+        if not isinstance(items, list):
+            raise HTTPException(
+                status_code=400,
+                detail="Request body must be a JSON array of sales"
+            )
+
+    if len(items) > BULK_SALES_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {BULK_SALES_MAX_ROWS} sales can be submitted per request"
+        )
+    return items
+
+@router.post("/bulk", response_model=BulkSaleResponse)
+@query_budget(None, allow_repeats=True)
+def create_sales_bulk(
+    items: List[Any] = Depends(read_bulk_sales),
+    chunk_size: int = Query(BULK_SALES_CHUNK_SIZE, ge=1, le=10000),
+    db: Session = Depends(get_db)
+):
+    """Insert many sales at once from a JSON array or an NDJSON stream of `SaleCreate` objects.
+
+    Rows are validated together and inserted in chunks of `chunk_size`; invalid rows are
+    reported by index in `errors` and do not prevent the others from being inserted.
+    """
+    return ingest_sales(db, items, chunk_size)
@@ -0,0 +1,17 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class LivenessResponse(BaseModel):
+    status: str
+
+class ReadinessResponse(BaseModel):
+    status: str
+    seconds_since_start: float
+    database_attempts: int
+    last_error: Optional[str] = None
+    schema_status: str
+    pool_target: int
+    pool_warmed: int
+    columnar: str
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional
 
 from pydantic import BaseModel, Field
@@ -18,4 +19,12 @@ class InventoryUpdate(BaseModel):
     low_stock_threshold: Optional[int] = None
 
 class InventoryResponse(InventoryBase, BaseResponse, TimestampMixin):
-    id: int 
\ No newline at end of file
+    id: int
+    is_low_stock: bool
+
+class LowStockEventResponse(BaseResponse):
+    product_id: int
+    is_low_stock: bool
+    quantity: int
+    low_stock_threshold: int
+    created_at: datetime 
\ No newline at end of file
@@ -0,0 +1,46 @@
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class HistogramSnapshot(BaseModel):
+    buckets: Dict[str, int]
+    count: int
+    sum: float
+
+class PoolMetricsResponse(BaseModel):
+    pool_class: str
+    pool_size: int
+    max_overflow: int
+    timeout: float
+    checked_out: int
+    checked_in: int
+    overflow: int
+    checkouts: int
+    checkout_timeouts: int
+    connections_created: int
+    invalidations: int
+    pre_ping_failures: int
+    checkout_wait_ms: HistogramSnapshot
+
+class ReplicaPoolResponse(BaseModel):
+    url: str
+    healthy: bool
+    failures: int
+    pool: Optional[PoolMetricsResponse] = None
+
+class DatabasePoolsResponse(BaseModel):
+    primary: Optional[PoolMetricsResponse] = None
+    async_primary: Optional[PoolMetricsResponse] = None
+    replicas: List[ReplicaPoolResponse] = []
+
+class CacheMetricsResponse(BaseModel):
+    backend: Optional[str] = None
+    entries: int
+    max_entries: Optional[int] = None
+    hits: int
+    misses: int
+    not_modified: int
+    invalidations: int
+    evictions: Optional[int] = None
+    expirations: Optional[int] = None
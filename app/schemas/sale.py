@@ -1,17 +1,44 @@
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Annotated, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import AfterValidator, BaseModel, Field
 
 from .base import BaseResponse, TimestampMixin
 
 
+def _naive_utc(value: datetime) -> datetime:
+    # Sale dates are stored as naive UTC: offsets are converted, naive values kept as UTC
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+SaleDate = Annotated[datetime, AfterValidator(_naive_utc)]
+
+class IntervalType(str, Enum):
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+    YEARLY = "yearly"
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+class AnalyticsEngine(str, Enum):
+    SQL = "sql"
+    COLUMNAR = "columnar"
+
+class RankingMetric(str, Enum):
+    REVENUE = "revenue"
+    QUANTITY = "quantity"
+
 class SaleBase(BaseModel):
     product_id: int
     quantity: int = Field(..., gt=0)
     unit_price: float = Field(..., gt=0)
     total_amount: float = Field(..., gt=0)
-    sale_date: datetime
+    sale_date: SaleDate
 
 class SaleCreate(SaleBase):
     pass
@@ -20,22 +47,60 @@ class SaleUpdate(BaseModel):
     quantity: Optional[int] = Field(None, gt=0)
     unit_price: Optional[float] = Field(None, gt=0)
     total_amount: Optional[float] = Field(None, gt=0)
-    sale_date: Optional[datetime] = None
+    sale_date: Optional[SaleDate] = None
 
 class SaleResponse(SaleBase, BaseResponse, TimestampMixin):
     id: int
 
 class RevenueResponse(BaseModel):
     interval: str
+    bucket_start: datetime
     revenue: float
     total_sales: int
 
+class TopProductResponse(BaseModel):
+    interval: Optional[str] = None
+    rank: int
+    product_id: int
+    product_name: str
+    category_id: Optional[int] = None
+    revenue: float
+    quantity: int
+    total_sales: int
+
+class CategoryRevenueResponse(BaseModel):
+    interval: Optional[str] = None
+    category_id: Optional[int] = None
+    category_name: Optional[str] = None
+    revenue: float
+    quantity: int
+    total_sales: int
+
 class PeriodRevenue(BaseModel):
     start_date: datetime
     end_date: datetime
     revenue: float
+    total_sales: int = 0
+    units_sold: int = 0
+    average_order_value: float = 0
+
+class PeriodComparison(PeriodRevenue):
+    percentage_change: Optional[float] = None
 
 class ComparisonResponse(BaseModel):
     current_period: PeriodRevenue
     previous_period: PeriodRevenue
-    percentage_change: float 
\ No newline at end of file
+    percentage_change: float 
+
+class MultiPeriodComparisonResponse(BaseModel):
+    periods: List[PeriodComparison]
+
+class BulkSaleError(BaseModel):
+    index: int
+    error: str
+
+class BulkSaleResponse(BaseModel):
+    received: int
+    inserted: int
+    failed: int
+    errors: List[BulkSaleError]
@@ -0,0 +1,247 @@
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import DateTime, Integer, func, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models.category import Category
+from app.models.product import Product
+from app.models.sale import Sale
+from app.schemas.sale import IntervalType, RankingMetric
+from app.services.comparison import Period, period_filter
+from app.services.columnar import ColumnarSales
+from app.services.rollups import ROLLUP_MODELS, bucket_start, bucket_starts, format_bucket, next_bucket_start
+
+# Rollup tables used to cover a range, coarsest first. Each level only takes the buckets
+# lying entirely inside what is left to cover, so weeks need not nest in months.
+COVER_INTERVALS = (IntervalType.YEARLY, IntervalType.MONTHLY, IntervalType.WEEKLY, IntervalType.DAILY)
+
+
+class Segment(NamedTuple):
+    """Part of a range read from one rollup table, or from raw sales when ``model`` is None.
+
+    ``bucket`` is the output bucket of every row in the segment. For the full buckets of
+    an interval-bucketed range it is None and each rollup row keeps its ``bucket_start``.
+    """
+    model: Optional[type]
+    period: Period
+    bucket: Optional[datetime] = None
+
+
+class Totals(NamedTuple):
+    revenue: float
+    quantity: int
+    total_sales: int
+
+
+def _cover(period: Period, intervals: Sequence[IntervalType], bucket: Optional[datetime]) -> List[Segment]:
+    """Cover ``period`` with the coarsest full rollup buckets, then finer ones at the edges."""
+    for position, interval in enumerate(intervals):
+        first = bucket_start(period.start, interval)
+        first_full = first if first == period.start else next_bucket_start(first, interval)
+        last = bucket_start(period.end, interval)
+        if first_full >= last:
+            continue
+
+        segments = [Segment(ROLLUP_MODELS[interval], Period(first_full, last, include_end=False), bucket)]
+        finer = intervals[position + 1:]
+        if period.start < first_full:
+            segments.extend(_cover(Period(period.start, first_full, include_end=False), finer, bucket))
+        if period.include_end or last < period.end:
+            segments.extend(_cover(Period(last, period.end, period.include_end), finer, bucket))
+        return segments
+    return [Segment(None, period, bucket)]
+
+
+def rollup_segments(start_date: datetime, end_date: datetime,
+                    interval: Optional[IntervalType] = None) -> List[Segment]:
+    """Split ``[start_date, end_date]`` into rollup and raw-sales segments.
+
+    Without ``interval`` the range is covered by as few rollup rows as possible (years,
+    then months, weeks and days) and only the partial days at either end are read from
+    raw sales. With ``interval`` the full buckets come from that interval's rollup table and
+    the partial buckets at either edge are covered by finer tables.
+    """
+    if start_date > end_date:
+        return []
+    if interval is None:
+        return _cover(Period(start_date, end_date), COVER_INTERVALS, None)
+
+    finer = COVER_INTERVALS[COVER_INTERVALS.index(interval) + 1:]
+    first = bucket_start(start_date, interval)
+    last = bucket_start(end_date, interval)
+    if first == last:
+        return _cover(Period(start_date, end_date), finer, first)
+
+    segments = []
+    first_full = first
+    if first != start_date:
+        first_full = next_bucket_start(first, interval)
+        segments.extend(_cover(Period(start_date, first_full, include_end=False), finer, first))
+    if first_full < last:
+        segments.append(Segment(ROLLUP_MODELS[interval], Period(first_full, last, include_end=False)))
+    segments.extend(_cover(Period(last, end_date), finer, last))
+    return segments
+
+
+def _segment_select(segment: Segment, per_bucket: bool, group_by: Optional[str], category_id: Optional[int]):
+    model = segment.model
+    if model is None:
+        product_id = Sale.product_id
+        measures = [func.sum(Sale.total_amount), func.sum(Sale.quantity), func.count(Sale.id)]
+        bounds = period_filter(segment.period)
+    else:
+        product_id = model.product_id
+        measures = [func.sum(model.revenue), func.sum(model.quantity), func.sum(model.total_sales)]
+        bounds = (model.bucket_start >= segment.period.start) & (model.bucket_start < segment.period.end)
+
+    keys = {"product": product_id, "category": Product.category_id, None: literal(None, Integer)}
+    bucket = model.bucket_start if per_bucket else literal(segment.bucket, DateTime)
+    statement = select(
+        bucket.label("bucket"),
+        keys[group_by].label("key"),
+        measures[0].label("revenue"),
+        measures[1].label("quantity"),
+        measures[2].label("total_sales"),
+    ).where(bounds)
+    if group_by == "category" or category_id is not None:
+        statement = statement.join(Product, Product.id == product_id)
+    if category_id is not None:
+        statement = statement.where(Product.category_id == category_id)
+    return statement.group_by(*([bucket] if per_bucket else []), *([keys[group_by]] if group_by else []))
+
+
+def totals_statement(
+    start_date: datetime,
+    end_date: datetime,
+    interval: Optional[IntervalType] = None,
+    group_by: Optional[str] = "product",
+    category_id: Optional[int] = None
+):
+    """``(bucket, key, revenue, quantity, total_sales)`` per bucket and ``group_by`` key.
+
+    ``group_by`` is ``"product"``, ``"category"`` or None (NULL key, totals per bucket
+    only). Buckets are NULL without ``interval``. The segments are combined with ``UNION ALL``
+    and merged by the database, so callers can rank or join the totals in the same
+    statement and only result rows leave the database.
+    """
+    segments = rollup_segments(start_date, end_date, interval)
+    if not segments:
+        # start after end: a raw segment matching nothing keeps the statement valid
+        segments = [Segment(None, Period(start_date, end_date))]
+    parts = union_all(*[
+        _segment_select(
+            segment,
+            interval is not None and segment.model is not None and segment.bucket is None,
+            group_by,
+            category_id
+        )
+        for segment in segments
+    ]).subquery()
+    return select(
+        parts.c.bucket,
+        parts.c.key,
+        func.sum(parts.c.revenue).label("revenue"),
+        func.sum(parts.c.quantity).label("quantity"),
+        func.sum(parts.c.total_sales).label("total_sales"),
+    ).group_by(parts.c.bucket, parts.c.key).having(func.sum(parts.c.total_sales) > 0)
+
+
+def sales_totals(
+    db: Session,
+    start_date: datetime,
+    end_date: datetime,
+    interval: Optional[IntervalType] = None,
+    group_by: Optional[str] = "product",
+    category_id: Optional[int] = None
+) -> Dict[Tuple[Optional[datetime], Optional[int]], Totals]:
+    """Totals per ``(bucket, key)`` for sales in the range, as in ``totals_statement``."""
+    statement = totals_statement(start_date, end_date, interval, group_by, category_id)
+    return {
+        (bucket, key): Totals(revenue, quantity, total_sales)
+        for bucket, key, revenue, quantity, total_sales in db.execute(statement)
+    }
+
+
+def _label(bucket: Optional[datetime], interval: Optional[IntervalType]) -> Optional[str]:
+    return format_bucket(bucket, interval) if bucket is not None else None
+
+
+def top_products(
+    db: Session,
+    start_date: datetime,
+    end_date: datetime,
+    interval: Optional[IntervalType] = None,
+    limit: int = 10,
+    order_by: RankingMetric = RankingMetric.REVENUE,
+    category_id: Optional[int] = None,
+    store: Optional[ColumnarSales] = None
+) -> List[dict]:
+    """The ``limit`` best selling products over the range, or within each bucket.
+
+    Ranked by the database with ``ROW_NUMBER()``, or in memory by the columnar ``store``;
+    ties go to the lower product id.
+    """
+    if store is not None:
+        starts = bucket_starts(start_date, end_date, interval) if interval else [None]
+        rows = store.top_products(
+            db, starts, starts[1:], start_date, end_date, limit, order_by, category_id
+        )
+    else:
+        totals = totals_statement(start_date, end_date, interval, category_id=category_id).subquery()
+        rank = func.row_number().over(
+            partition_by=totals.c.bucket,
+            order_by=(totals.c[order_by.value].desc(), totals.c.key)
+        )
+        ranked = select(totals, rank.label("rank")).subquery()
+        rows = db.execute(
+            select(
+                ranked.c.bucket, ranked.c.rank, Product.id, Product.name, Product.category_id,
+                ranked.c.revenue, ranked.c.quantity, ranked.c.total_sales,
+            )
+            .join(Product, Product.id == ranked.c.key)
+            .where(ranked.c.rank <= limit)
+            .order_by(ranked.c.bucket, ranked.c.rank)
+        )
+    return [
+        {
+            "interval": _label(bucket, interval),
+            "rank": rank,
+            "product_id": product_id,
+            "product_name": name,
+            "category_id": product_category_id,
+            "revenue": revenue,
+            "quantity": quantity,
+            "total_sales": total_sales,
+        }
+        for bucket, rank, product_id, name, product_category_id, revenue, quantity, total_sales in rows
+    ]
+
+
+def revenue_by_category(
+    db: Session,
+    start_date: datetime,
+    end_date: datetime,
+    interval: Optional[IntervalType] = None
+) -> List[dict]:
+    """Totals per category over the range, or within each bucket, highest revenue first."""
+    totals = totals_statement(start_date, end_date, interval, group_by="category").subquery()
+    rows = db.execute(
+        select(
+            totals.c.bucket, totals.c.key, Category.name,
+            totals.c.revenue, totals.c.quantity, totals.c.total_sales,
+        )
+        .outerjoin(Category, Category.id == totals.c.key)
+        .order_by(totals.c.bucket, totals.c.revenue.desc(), totals.c.key)
+    )
+    return [
+        {
+            "interval": _label(bucket, interval),
+            "category_id": category_id,
+            "category_name": name,
+            "revenue": revenue,
+            "quantity": quantity,
+            "total_sales": total_sales,
+        }
+        for bucket, category_id, name, revenue, quantity, total_sales in rows
+    ]
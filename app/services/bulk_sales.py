@@ -0,0 +1,153 @@
+import json
+import os
+from collections import defaultdict
+from typing import Any, Iterable, List, NamedTuple, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+from app.models.sale import Sale
+from app.schemas.sale import BulkSaleError, BulkSaleResponse, SaleCreate
+from app.services.cache import response_cache, sale_tags
+from app.services.columnar import record_sales
+from app.services.inventory import decrement_stock
+from app.services.rollups import apply_sales_to_rollups
+
+BULK_SALES_CHUNK_SIZE = int(os.getenv("BULK_SALES_CHUNK_SIZE", "1000"))
+BULK_SALES_MAX_ROWS = int(os.getenv("BULK_SALES_MAX_ROWS", "50000"))
+
+SALE_ADAPTER = TypeAdapter(SaleCreate)
+
+
+class InvalidLine(NamedTuple):
+    """Placeholder for an NDJSON line that is not valid JSON."""
+    error: str
+
+
+def parse_ndjson_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return InvalidLine(f"Invalid JSON: {e}")
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'row'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+def validate_sales(db: Session, items: List[Any]) -> Tuple[List[Tuple[int, dict]], List[BulkSaleError]]:
+    """Validate every item against ``SaleCreate`` and check all product ids in one query per 1000."""
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        if isinstance(item, InvalidLine):
+            errors.append(BulkSaleError(index=index, error=item.error))
+            continue
+        try:
+            valid.append((index, SALE_ADAPTER.validate_python(item).model_dump()))
+        except ValidationError as e:
+            errors.append(BulkSaleError(index=index, error=_format_validation_error(e)))
+
+    product_ids = sorted({row["product_id"] for _, row in valid})
+    existing = set()
+    for offset in range(0, len(product_ids), 1000):
+        existing.update(
+            product_id for (product_id,) in
+            db.query(Product.id).filter(Product.id.in_(product_ids[offset:offset + 1000]))
+        )
+
+    checked = []
+    for index, row in valid:
+        if row["product_id"] in existing:
+            checked.append((index, row))
+        else:
+            errors.append(BulkSaleError(index=index, error=f"Product with id {row['product_id']} not found"))
+    return checked, errors
+
+
+def _reserve_stock(db: Session, chunk: List[Tuple[int, dict]]) -> Tuple[List[Tuple[int, dict]], List[BulkSaleError]]:
+    """Decrement stock for a chunk: one conditional UPDATE per product (in product id
+    order) when it covers the whole demand, otherwise row by row in submission order
+    until stock runs out."""
+    by_product = defaultdict(list)
+    for index, row in chunk:
+        by_product[row["product_id"]].append((index, row))
+
+    accepted, rejected = [], []
+    # Lock products in id order so concurrent bulk requests cannot deadlock each other
+    for product_id, product_rows in sorted(by_product.items()):
+        if decrement_stock(db, product_id, sum(row["quantity"] for _, row in product_rows)):
+            accepted.extend(product_rows)
+            continue
+        for index, row in product_rows:
+            if decrement_stock(db, product_id, row["quantity"]):
+                accepted.append((index, row))
+            else:
+                rejected.append(BulkSaleError(index=index, error=f"Insufficient stock for product id {product_id}"))
+    return accepted, rejected
+
+
+def _insert_sales(db: Session, chunk: List[Tuple[int, dict]]) -> Tuple[List[dict], List[BulkSaleError]]:
+    accepted, rejected = _reserve_stock(db, chunk)
+    rows = [row for _, row in accepted]
+    if rows:
+        db.execute(insert(Sale), rows)
+        apply_sales_to_rollups(db, rows)
+        record_sales(db)
+    return rows, rejected
+
+
+def _invalidate_cache(rows: List[dict]):
+    if rows:
+        response_cache.invalidate(*{
+            tag for row in rows for tag in sale_tags(row["product_id"], row["sale_date"])
+        })
+
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    for offset in range(0, len(items), size):
+        yield items[offset:offset + size]
+
+
+def ingest_sales(db: Session, items: List[Any], chunk_size: int = BULK_SALES_CHUNK_SIZE) -> BulkSaleResponse:
+    """Validate and insert ``items`` in chunks, one executemany and one commit per chunk.
+
+    Stock is decremented in the same transaction as the insert; rows that would take a
+    product below zero are rejected. A chunk that fails in the database is rolled back
+    and retried row by row, so a bad row only costs its own insert and is reported with
+    its index; other rows and chunks are unaffected.
+    """
+    rows, errors = validate_sales(db, items)
+    inserted = 0
+    for chunk in _chunks(rows, chunk_size):
+        try:
+            chunk_inserted, rejected = _insert_sales(db, chunk)
+            db.commit()
+            _invalidate_cache(chunk_inserted)
+            inserted += len(chunk_inserted)
+            errors.extend(rejected)
+        except SQLAlchemyError:
+            db.rollback()
+            for index, row in chunk:
+                try:
+                    row_inserted, rejected = _insert_sales(db, [(index, row)])
+                    db.commit()
+                    _invalidate_cache(row_inserted)
+                    inserted += len(row_inserted)
+                    errors.extend(rejected)
+                except SQLAlchemyError as e:
+                    db.rollback()
+                    errors.append(BulkSaleError(index=index, error=str(getattr(e, "orig", None) or e)))
+
+    errors.sort(key=lambda error: error.index)
+    return BulkSaleResponse(
+        received=len(items),
+        inserted=inserted,
+        failed=len(errors),
+        errors=errors
+    )
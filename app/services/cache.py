@@ -0,0 +1,261 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+# Revenue entries spanning more months than this share the "sales:all" tag
+MAX_MONTH_TAGS = 120
+
+# memory (per process LRU), redis (shared by all workers) or none
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "60"))
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+    headers: Dict[str, str]
+
+
+class MemoryBackend:
+    """In-process LRU with a per-entry TTL and a tag index for invalidation."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value, tags)
+        self._tags: Dict[str, set] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key: str):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def generation(self) -> int:
+        return self._generation
+
+    def set(self, key: str, value: CachedResponse, tags: Iterable[str]):
+        tags = tuple(tags)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        with self._lock:
+            self._generation += 1
+            keys = set()
+            for tag in tags:
+                keys.update(self._tags.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self):
+        # The generation is kept: responses computed before the clear are still stale
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+
+class RedisBackend:
+    """Cache shared by every worker, in Redis or anything speaking the redis-py client API.
+
+    Expiry and eviction are left to Redis (``maxmemory-policy allkeys-lru``), so they
+    are not counted here.
+    """
+
+    evictions = None
+    expirations = None
+
+    def __init__(self, client, ttl: float = CACHE_TTL_SECONDS, prefix: str = "response-cache:"):
+        self.client = client
+        self.ttl = int(ttl)
+        self.prefix = prefix
+
+    def __len__(self):
+        return sum(1 for _ in self.client.scan_iter(match=f"{self.prefix}key:*"))
+
+    def generation(self) -> int:
+        """Invalidations so far, by any worker."""
+        return int(self.client.get(f"{self.prefix}generation") or 0)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        raw = self.client.get(f"{self.prefix}key:{key}")
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return CachedResponse(data["body"].encode(), data["etag"], data["headers"])
+
+    def set(self, key: str, value: CachedResponse, tags: Iterable[str]):
+        data = json.dumps({"body": value.body.decode(), "etag": value.etag, "headers": value.headers})
+        pipeline = self.client.pipeline()
+        pipeline.set(f"{self.prefix}key:{key}", data, ex=self.ttl)
+        for tag in tags:
+            pipeline.sadd(f"{self.prefix}tag:{tag}", key)
+            pipeline.expire(f"{self.prefix}tag:{tag}", self.ttl)
+        pipeline.execute()
+
+    def delete(self, key: str):
+        self.client.delete(f"{self.prefix}key:{key}")
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        # Bumped before removing the keys, see ResponseCache.set
+        self.client.incr(f"{self.prefix}generation")
+        removed = 0
+        for tag in tags:
+            tag_key = f"{self.prefix}tag:{tag}"
+            keys = [f"{self.prefix}key:{key.decode() if isinstance(key, bytes) else key}"
+                    for key in self.client.smembers(tag_key)]
+            if keys:
+                removed += self.client.delete(*keys)
+            self.client.delete(tag_key)
+        return removed
+
+    def clear(self):
+        # The generation is kept: responses computed before the clear are still stale
+        keys = [
+            key for key in self.client.scan_iter(match=f"{self.prefix}*")
+            if (key.decode() if isinstance(key, bytes) else key) != f"{self.prefix}generation"
+        ]
+        if keys:
+            self.client.delete(*keys)
+
+
+class ResponseCache:
+    """Serialized responses keyed by route and arguments, invalidated by tag.
+
+    Read endpoints tag their entries with what they depend on (``product:1``,
+    ``categories``, ``sales:2024-06``); writes invalidate exactly those tags after
+    committing. With no backend every lookup misses and nothing is stored.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def _increment(self, counter: str, amount: int = 1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        value = self.backend.get(key) if self.backend is not None else None
+        self._increment("misses" if value is None else "hits")
+        return value
+
+    @property
+    def generation(self) -> int:
+        """Bumped by every invalidation, in any worker sharing the backend: a response
+        computed across one is not stored."""
+        return self.backend.generation() if self.backend is not None else 0
+
+    def set(self, key: str, value: CachedResponse, tags: Iterable[str], generation: Optional[int] = None):
+        if self.backend is None or generation not in (None, self.generation):
+            return
+        self.backend.set(key, value, tags)
+        # Backends bump the generation before removing the invalidated keys, so an
+        # invalidation racing with this write either removed the entry or shows up here
+        if generation is not None and generation != self.generation:
+            self.backend.delete(key)
+
+    def invalidate(self, *tags: str):
+        if self.backend is not None:
+            self._increment("invalidations", self.backend.invalidate(tags))
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self) -> dict:
+        backend = self.backend
+        return {
+            "backend": type(backend).__name__ if backend is not None else None,
+            "entries": len(backend) if backend is not None else 0,
+            "max_entries": getattr(backend, "max_entries", None),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "invalidations": self.invalidations,
+            "evictions": getattr(backend, "evictions", None),
+            "expirations": getattr(backend, "expirations", None),
+        }
+
+
+def _utc(value: datetime) -> datetime:
+    """Naive UTC, like stored sale dates: month tags are UTC months."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def revenue_tags(start_date: Optional[datetime], end_date: Optional[datetime]) -> List[str]:
+    """One tag per calendar month (UTC) of a revenue range, so a sale only invalidates
+    the ranges that contain it. Open-ended and very long ranges depend on every sale."""
+    if start_date is None or end_date is None:
+        return ["sales:all"]
+    start_date, end_date = _utc(start_date), _utc(end_date)
+    months = (end_date.year - start_date.year) * 12 + end_date.month - start_date.month + 1
+    if not 0 < months <= MAX_MONTH_TAGS:
+        return ["sales:all"]
+    first = start_date.year * 12 + start_date.month - 1
+    return [f"sales:{month // 12}-{month % 12 + 1:02d}" for month in range(first, first + months)]
+
+
+def sale_tags(product_id: int, sale_date: datetime) -> List[str]:
+    """Tags invalidated by a sale: its month, open-ended revenue and the product's stock."""
+    return ["sales:all", f"sales:{_utc(sale_date):%Y-%m}", f"product:{product_id}"]
+
+
+def make_backend(name: str = CACHE_BACKEND):
+    if name == "none":
+        return None
+    if name == "redis":
+        # Only required when CACHE_BACKEND=redis
+        import redis
+        return RedisBackend(redis.Redis.from_url(CACHE_REDIS_URL))
+    return MemoryBackend()
+
+
+response_cache = ResponseCache(make_backend())
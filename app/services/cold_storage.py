@@ -0,0 +1,221 @@
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.sale import Sale
+from app.schemas.sale import IntervalType
+from app.services.columnar import epoch_micros
+from app.services.comparison import Period, PeriodTotals, compare_periods
+from app.services.rollups import bucket_start, bucket_starts, next_bucket_start
+
+try:
+    import numpy as np
+except ImportError:  # cold storage is optional; without numpy every query reads the sales table
+    np = None
+
+# Months compacted by compact_sales.py; queries use them once a manifest exists there
+COLD_STORAGE_DIR = os.getenv("COLD_STORAGE_DIR", "data/cold_sales")
+MANIFEST = "manifest.json"
+COLUMNS = (
+    ("sale_date", "int64"),
+    ("product_id", "int32"),
+    ("quantity", "int32"),
+    ("total_amount", "float64"),
+)
+# Ids this far below the highest one are checked for transactions still open when the
+# snapshot is taken (they commit later with a lower id); at most this many recent sales
+# are read from the table instead of the snapshot
+OPEN_TRANSACTION_WINDOW = 10000
+
+
+def compact_sales(db: Session, cutoff: datetime, directory: str = COLD_STORAGE_DIR) -> Dict[str, int]:
+    """Write every sale before the month of ``cutoff`` to one ``.npy`` file per column and month.
+
+    Months go to a fresh snapshot directory and the manifest is switched to it with an
+    atomic rename, so running workers never read a half-written snapshot. The sales
+    table is not modified (remove old months with partition_sales.py). Sales inserted
+    afterwards with an older ``sale_date`` are still read from the table: their id is
+    above the manifest's ``max_sale_id``. That is the id before the first one missing
+    among the last ``OPEN_TRANSACTION_WINDOW``, so a sale whose id was allocated before
+    the snapshot but committed after it is above it too.
+
+    Every read runs in ``db``'s transaction, so on MySQL (REPEATABLE READ) they all see
+    the same snapshot.
+    """
+    if np is None:
+        raise RuntimeError("Cold storage requires numpy")
+    cutoff = bucket_start(cutoff, IntervalType.MONTHLY)
+    max_sale_id, first_sale = db.query(func.max(Sale.id), func.min(Sale.sale_date)).one()
+    max_sale_id = max_sale_id or 0
+    # Ids below the highest that are not visible yet: open (or rolled back) transactions.
+    # The snapshot stops before the first one, so queries only need an id range.
+    recent_ids = set(db.execute(
+        select(Sale.id).where(Sale.id > max_sale_id - OPEN_TRANSACTION_WINDOW, Sale.id <= max_sale_id)
+    ).scalars())
+    max_sale_id = next(
+        (sale_id - 1 for sale_id in range(max(1, max_sale_id - OPEN_TRANSACTION_WINDOW + 1), max_sale_id)
+         if sale_id not in recent_ids),
+        max_sale_id
+    )
+    snapshot = f"snapshot-{datetime.utcnow():%Y%m%dT%H%M%S%f}"
+    os.makedirs(os.path.join(directory, snapshot))
+
+    months = {}
+    if first_sale is not None:
+        for month in bucket_starts(first_sale, cutoff, IntervalType.MONTHLY):
+            if month >= cutoff:
+                break
+            rows = db.execute(
+                select(Sale.sale_date, Sale.product_id, Sale.quantity, Sale.total_amount)
+                .where(Sale.sale_date >= month, Sale.sale_date < next_bucket_start(month, IntervalType.MONTHLY))
+                .where(Sale.id <= max_sale_id)
+                .order_by(Sale.sale_date)
+            ).all()
+            if not rows:
+                continue
+            name = f"{month:%Y-%m}"
+            os.makedirs(os.path.join(directory, snapshot, name))
+            values = list(zip(*rows))
+            values[0] = [epoch_micros(value) for value in values[0]]
+            for (column, dtype), column_values in zip(COLUMNS, values):
+                np.save(os.path.join(directory, snapshot, name, f"{column}.npy"), np.array(column_values, dtype=dtype))
+            months[name] = len(rows)
+
+    _write_manifest(directory, {
+        "snapshot": snapshot,
+        "cutoff": cutoff.isoformat(),
+        "max_sale_id": max_sale_id,
+        "created_at": datetime.utcnow().isoformat(),
+        "months": months,
+    })
+
+    # Readers that still map the previous snapshot keep their open files
+    for entry in os.listdir(directory):
+        if entry.startswith("snapshot-") and entry != snapshot:
+            shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+    return months
+
+
+def forget_cold_months(before: datetime, directory: str = COLD_STORAGE_DIR) -> List[str]:
+    """Drop the snapshot months before ``before`` from the manifest, once their sales
+    are taken out of the sales table (partition_sales.py). Returns the months dropped."""
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        manifest = json.load(f)
+    removed = sorted(name for name in manifest["months"] if datetime.strptime(name, "%Y-%m") < before)
+    if removed:
+        for name in removed:
+            del manifest["months"][name]
+        _write_manifest(directory, manifest)
+    return removed
+
+
+def _write_manifest(directory: str, manifest: dict):
+    # Atomic rename: workers never read a half-written manifest
+    temporary = os.path.join(directory, f"{MANIFEST}.tmp")
+    with open(temporary, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temporary, os.path.join(directory, MANIFEST))
+
+
+class ColdSales:
+    """Memory-mapped monthly sales snapshots written by ``compact_sales``.
+
+    Queries split a range into the cold part (before ``cutoff``, aggregated from the
+    mapped arrays) and the hot part (read from the sales table with ``hot_filter``).
+    """
+
+    def __init__(self, directory: str = COLD_STORAGE_DIR):
+        self.directory = directory
+        self.manifest: Optional[dict] = None
+        self._manifest_mtime: Optional[float] = None
+        self._months: Dict[str, Tuple] = {}
+
+    def refresh(self) -> bool:
+        """Pick up a new manifest if the compaction job wrote one; True when usable."""
+        if np is None:
+            return False
+        path = os.path.join(self.directory, MANIFEST)
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            self.manifest, self._manifest_mtime, self._months = None, None, {}
+            return False
+        if mtime != self._manifest_mtime:
+            with open(path) as f:
+                self.manifest = json.load(f)
+            self._manifest_mtime, self._months = mtime, {}
+        return True
+
+    @property
+    def cutoff(self) -> datetime:
+        return datetime.fromisoformat(self.manifest["cutoff"])
+
+    def hot_filter(self):
+        """Sales not in the snapshot: after the cutoff, or above its highest id."""
+        return or_(Sale.sale_date >= self.cutoff, Sale.id > self.manifest["max_sale_id"])
+
+    def _month(self, name: str) -> Tuple:
+        if name not in self._months:
+            base = os.path.join(self.directory, self.manifest["snapshot"], name)
+            self._months[name] = tuple(
+                np.load(os.path.join(base, f"{column}.npy"), mmap_mode="r") for column, _ in COLUMNS
+            )
+        return self._months[name]
+
+    def _slices(self, start: datetime, end: datetime, include_end: bool = True) -> Iterator[Tuple]:
+        """``(dates, product_ids, quantities, amounts)`` of each snapshot month in the range."""
+        for name in sorted(self.manifest["months"]):
+            month = datetime.strptime(name, "%Y-%m")
+            if month > end or next_bucket_start(month, IntervalType.MONTHLY) <= start:
+                continue
+            dates, product_ids, quantities, amounts = self._month(name)
+            low = np.searchsorted(dates, epoch_micros(start), side="left")
+            high = np.searchsorted(dates, epoch_micros(end), side="right" if include_end else "left")
+            if high > low:
+                yield dates[low:high], product_ids[low:high], quantities[low:high], amounts[low:high]
+
+    def bucket_totals(self, boundaries: Sequence[datetime], start: datetime, end: datetime) -> List[Tuple[float, int]]:
+        """``(revenue, sale count)`` of the snapshot per bucket, as ``ColumnarSales.bucket_totals``."""
+        edges = np.array([epoch_micros(boundary) for boundary in boundaries], dtype=np.int64)
+        revenue = np.zeros(len(edges) + 1)
+        counts = np.zeros(len(edges) + 1, dtype=np.int64)
+        for dates, _, _, amounts in self._slices(start, end):
+            buckets = np.searchsorted(edges, dates, side="right")
+            revenue += np.bincount(buckets, weights=amounts, minlength=len(edges) + 1)
+            counts += np.bincount(buckets, minlength=len(edges) + 1)
+        return [(float(r), int(c)) for r, c in zip(revenue, counts)]
+
+    def period_totals(self, periods: Sequence[Period]) -> List[PeriodTotals]:
+        totals = []
+        for period in periods:
+            revenue, total_sales, units_sold = 0.0, 0, 0
+            for _, _, quantities, amounts in self._slices(period.start, period.end, period.include_end):
+                revenue += float(amounts.sum())
+                total_sales += len(amounts)
+                units_sold += int(quantities.sum(dtype=np.int64))
+            totals.append(PeriodTotals(revenue, total_sales, units_sold))
+        return totals
+
+
+cold_sales = ColdSales()
+
+
+def available_cold_sales() -> Optional[ColdSales]:
+    return cold_sales if cold_sales.refresh() else None
+
+
+def compare_periods_with_cold(db: Session, periods: List[Period], cold: ColdSales) -> List[PeriodTotals]:
+    """``compare_periods`` over the hot rows plus the snapshot totals."""
+    hot = compare_periods(db, periods, cold.hot_filter())
+    return [
+        PeriodTotals(h.revenue + c.revenue, h.total_sales + c.total_sales, h.units_sold + c.units_sold)
+        for h, c in zip(hot, cold.period_totals(periods))
+    ]
@@ -0,0 +1,323 @@
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event, or_, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.models.product import Product
+from app.models.sale import Sale
+from app.schemas.sale import RankingMetric
+from app.services.comparison import Period, PeriodTotals
+
+try:
+    import numpy as np
+except ImportError:  # the columnar engine is optional; every endpoint falls back to SQL
+    np = None
+
+# Default engine of the analytics endpoints: "sql", or "columnar" to also load every
+# sale into memory at startup (about 24 bytes per sale). Requests can pick with ?engine=
+ANALYTICS_ENGINE = os.getenv("ANALYTICS_ENGINE", "sql").lower()
+COLUMNAR_LOAD_BATCH = 100000
+# Sales inserted by any process are merged into the arrays within this many seconds
+# (sales committed by this process right away)
+COLUMNAR_REFRESH_SECONDS = float(os.getenv("COLUMNAR_REFRESH_SECONDS", "1"))
+# Ids skipped by the sequence (transactions still open, or rolled back) are looked up
+# again by each refresh for this long; the newest ids of a full load are checked too
+COLUMNAR_GAP_SECONDS = float(os.getenv("COLUMNAR_GAP_SECONDS", "300"))
+COLUMNAR_GAP_WINDOW = 1000
+# Full reload interval, which also drops sales removed from the table (0: never)
+COLUMNAR_RELOAD_SECONDS = float(os.getenv("COLUMNAR_RELOAD_SECONDS", "0"))
+# Largest bucket x product-id matrix built directly by top-N queries
+MAX_DENSE_CELLS = 4000000
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def epoch_micros(value: datetime) -> int:
+    """Microseconds since the epoch of a naive UTC (or aware) datetime."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = value - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+class ColumnarSales:
+    """Sale dates, product ids, quantities and amounts as NumPy arrays sorted by date.
+
+    Ranges are located with ``searchsorted`` and aggregated with ``bincount``, so a query
+    costs one pass over the sales in its range and no database round-trip. ``refresh``
+    merges the sales inserted since the last load, whichever process wrote them: rows
+    above the highest id loaded, plus the ids it skipped (transactions that commit out
+    of id order). Sales are only inserted by the API; updates and deletes (archived
+    partitions) are picked up by the next full ``load``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._pending: List[dict] = []
+        self.loaded_at: Optional[float] = None
+        self.load_seconds = 0.0
+        self.refreshed_at: Optional[float] = None
+        self.last_id = 0
+        # Skipped id -> when it was first seen missing
+        self._gaps: Dict[int, float] = {}
+        self._dates = self._product_ids = self._quantities = self._amounts = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def __len__(self) -> int:
+        dates = self._columns()[0]
+        return 0 if dates is None else len(dates)
+
+    def load(self, bind: Engine, batch_size: int = COLUMNAR_LOAD_BATCH):
+        """(Re)load every sale from the database."""
+        if np is None:
+            raise RuntimeError("The columnar analytics engine requires numpy")
+        with self._refresh_lock:
+            self._load(bind, batch_size)
+
+    def _load(self, bind: Engine, batch_size: int):
+        started = time.perf_counter()
+        ids, dates, product_ids, quantities, amounts = [], [], [], [], []
+        statement = select(Sale.id, Sale.sale_date, Sale.product_id, Sale.quantity, Sale.total_amount) \
+            .where(Sale.sale_date.isnot(None))
+        with bind.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(statement)
+            for rows in result.partitions():
+                batch_ids, batch_dates, batch_products, batch_quantities, batch_amounts = zip(*rows)
+                ids.append(np.array(batch_ids, dtype=np.int64))
+                dates.append(np.array([epoch_micros(value) for value in batch_dates], dtype=np.int64))
+                product_ids.append(np.array(batch_products, dtype=np.int32))
+                quantities.append(np.array(batch_quantities, dtype=np.int32))
+                amounts.append(np.array(batch_amounts, dtype=np.float64))
+
+        columns = [
+            np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+            for parts, dtype in ((dates, np.int64), (product_ids, np.int32),
+                                 (quantities, np.int32), (amounts, np.float64))
+        ]
+        order = np.argsort(columns[0], kind="stable")
+        loaded_ids = np.concatenate(ids) if ids else np.empty(0, dtype=np.int64)
+        last_id = int(loaded_ids.max()) if len(loaded_ids) else 0
+        # The newest ids missing from the load may belong to transactions still open
+        recent = np.arange(max(1, last_id - COLUMNAR_GAP_WINDOW), last_id)
+        now = time.monotonic()
+        with self._lock:
+            self._dates, self._product_ids, self._quantities, self._amounts = (column[order] for column in columns)
+            self._pending = []
+            self.last_id = last_id
+            self._gaps = {int(sale_id): now for sale_id in np.setdiff1d(recent, loaded_ids)}
+            self.loaded_at = time.time()
+            self.refreshed_at = self.loaded_at
+        self.load_seconds = time.perf_counter() - started
+
+    def refresh(self, bind: Engine) -> int:
+        """Merge the sales inserted since the last load or refresh; returns how many."""
+        if not self.loaded:
+            return 0
+        if COLUMNAR_RELOAD_SECONDS and time.time() - self.loaded_at >= COLUMNAR_RELOAD_SECONDS:
+            self.load(bind)
+            return len(self)
+        with self._refresh_lock:
+            previous_id, gaps = self.last_id, list(self._gaps)
+            condition = Sale.id > previous_id
+            if gaps:
+                condition = or_(condition, Sale.id.in_(gaps))
+            statement = select(Sale.id, Sale.sale_date, Sale.product_id, Sale.quantity, Sale.total_amount) \
+                .where(condition)
+            with bind.connect() as conn:
+                rows = conn.execute(statement).all()
+
+            found = {row.id for row in rows}
+            last_id = max(found | {previous_id})
+            now = time.monotonic()
+            for sale_id in range(previous_id + 1, last_id):
+                if sale_id not in found:
+                    self._gaps[sale_id] = now
+            for sale_id in list(self._gaps):
+                if sale_id in found or now - self._gaps[sale_id] > COLUMNAR_GAP_SECONDS:
+                    del self._gaps[sale_id]
+            with self._lock:
+                self._pending.extend(row._asdict() for row in rows if row.sale_date is not None)
+                self.last_id = last_id
+                self.refreshed_at = time.time()
+        return len(rows)
+
+    def notify(self):
+        """Refresh as soon as possible (this process committed sales)."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def start_refreshing(self, bind: Engine):
+        """Refresh every ``COLUMNAR_REFRESH_SECONDS`` on the running event loop (blocking
+        work goes to the threadpool), and right away when woken by ``notify``."""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = self._loop.create_task(self._refresh_forever(bind))
+
+    async def _refresh_forever(self, bind: Engine):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), COLUMNAR_REFRESH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await run_in_threadpool(self.refresh, bind)
+            except Exception as e:
+                print(f"Could not refresh the columnar engine: {e}")
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        self._loop = self._task = None
+
+    def _columns(self):
+        with self._lock:
+            if self._pending:
+                pending, self._pending = self._pending, []
+                new_dates = np.array([epoch_micros(sale["sale_date"]) for sale in pending], dtype=np.int64)
+                order = np.argsort(new_dates, kind="stable")
+                # Insert after equal dates so the arrays stay sorted without a full re-sort
+                positions = np.searchsorted(self._dates, new_dates[order], side="right")
+                self._dates = np.insert(self._dates, positions, new_dates[order])
+                for name, key, dtype in (("_product_ids", "product_id", np.int32),
+                                         ("_quantities", "quantity", np.int32),
+                                         ("_amounts", "total_amount", np.float64)):
+                    values = np.array([pending[i][key] for i in order], dtype=dtype)
+                    setattr(self, name, np.insert(getattr(self, name), positions, values))
+            return self._dates, self._product_ids, self._quantities, self._amounts
+
+    def _slice(self, start: datetime, end: datetime, include_end: bool = True):
+        dates, product_ids, quantities, amounts = self._columns()
+        low = np.searchsorted(dates, epoch_micros(start), side="left")
+        high = np.searchsorted(dates, epoch_micros(end), side="right" if include_end else "left")
+        return dates[low:high], product_ids[low:high], quantities[low:high], amounts[low:high]
+
+    def bucket_totals(self, boundaries: Sequence[datetime], start: datetime, end: datetime) -> List[Tuple[float, int]]:
+        """``(revenue, sale count)`` per bucket of ``[start, end]`` split at ``boundaries``
+        (naive UTC), as ``timeseries.revenue_series_statement`` computes it."""
+        dates, _, _, amounts = self._slice(start, end)
+        edges = np.array([epoch_micros(boundary) for boundary in boundaries], dtype=np.int64)
+        buckets = np.searchsorted(edges, dates, side="right")
+        revenue = np.bincount(buckets, weights=amounts, minlength=len(edges) + 1)
+        counts = np.bincount(buckets, minlength=len(edges) + 1)
+        return [(float(r), int(c)) for r, c in zip(revenue, counts)]
+
+    def period_totals(self, periods: Sequence[Period]) -> List[PeriodTotals]:
+        """Counterpart of ``comparison.compare_periods``."""
+        totals = []
+        for period in periods:
+            _, _, quantities, amounts = self._slice(period.start, period.end, period.include_end)
+            totals.append(PeriodTotals(
+                revenue=float(amounts.sum()),
+                total_sales=len(amounts),
+                units_sold=int(quantities.sum(dtype=np.int64))
+            ))
+        return totals
+
+    def product_totals(self, boundaries: Sequence[datetime], start: datetime, end: datetime,
+                       product_filter: Optional[Sequence[int]] = None):
+        """Product ids and per-bucket, per-product revenue, quantity and sale count matrices.
+
+        Rows are the ``len(boundaries) + 1`` buckets, columns the returned product ids.
+        """
+        dates, product_ids, quantities, amounts = self._slice(start, end)
+        if product_filter is not None:
+            keep = np.isin(product_ids, np.asarray(product_filter, dtype=np.int32))
+            dates, product_ids, quantities, amounts = dates[keep], product_ids[keep], quantities[keep], amounts[keep]
+        edges = np.array([epoch_micros(boundary) for boundary in boundaries], dtype=np.int64)
+        largest = int(product_ids.max()) + 1 if len(product_ids) else 1
+        if (len(edges) + 1) * largest <= MAX_DENSE_CELLS:
+            products, columns = np.arange(largest), product_ids
+        else:
+            # Too many buckets x product ids: columns are the distinct products of the range
+            products, columns = np.unique(product_ids, return_inverse=True)
+        width = max(len(products), 1)
+        cells = np.searchsorted(edges, dates, side="right") * width + columns
+        size = (len(edges) + 1) * width
+        shape = (len(edges) + 1, width)
+        return (
+            products,
+            np.bincount(cells, weights=amounts, minlength=size).reshape(shape),
+            np.bincount(cells, weights=quantities, minlength=size).reshape(shape),
+            np.bincount(cells, minlength=size).reshape(shape),
+        )
+
+    def top_products(
+        self,
+        db: Session,
+        buckets: Sequence[Optional[datetime]],
+        boundaries: Sequence[datetime],
+        start: datetime,
+        end: datetime,
+        limit: int,
+        order_by: RankingMetric,
+        category_id: Optional[int] = None
+    ) -> List[Tuple[Optional[datetime], int, int, str, Optional[int], float, int, int]]:
+        """Rows shaped like ``analytics.top_products``' ranking query, for ``buckets``
+        (one per bucket of ``boundaries``)."""
+        product_filter = None
+        if category_id is not None:
+            product_filter = db.execute(select(Product.id).where(Product.category_id == category_id)).scalars().all()
+        products, revenue, quantity, counts = self.product_totals(boundaries, start, end, product_filter)
+        metric = revenue if order_by == RankingMetric.REVENUE else quantity
+
+        ranked = []
+        for position, bucket in enumerate(buckets):
+            sold = np.flatnonzero(counts[position])
+            # Highest metric first, lower product id on ties (lexsort's last key is primary)
+            order = sold[np.lexsort((products[sold], -metric[position][sold]))][:limit]
+            ranked.extend((position, rank, column) for rank, column in enumerate(order, start=1))
+
+        names: Dict[int, Tuple[str, Optional[int]]] = {}
+        if ranked:
+            names = {
+                product_id: (name, product_category_id)
+                for product_id, name, product_category_id in db.execute(
+                    select(Product.id, Product.name, Product.category_id)
+                    .where(Product.id.in_({int(products[column]) for _, _, column in ranked}))
+                )
+            }
+        return [
+            (buckets[position], rank, int(products[column]), *names[int(products[column])],
+             float(revenue[position, column]), int(quantity[position, column]), int(counts[position, column]))
+            for position, rank, column in ranked
+            if int(products[column]) in names
+        ]
+
+
+columnar_sales = ColumnarSales()
+
+
+def available() -> bool:
+    return np is not None and columnar_sales.loaded
+
+
+def record_sales(db: Session):
+    """Have the columnar engine pick up the sales inserted by ``db`` once it commits."""
+    if columnar_sales.loaded:
+        db.info["columnar_sales"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _refresh_after_commit(session):
+    if session.info.pop("columnar_sales", None):
+        columnar_sales.notify()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("columnar_sales", None)
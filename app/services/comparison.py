@@ -0,0 +1,72 @@
+from datetime import datetime
+from typing import List, NamedTuple
+
+from sqlalchemy import case, func, or_
+from sqlalchemy.orm import Session
+
+from app.models.sale import Sale
+
+
+class Period(NamedTuple):
+    start: datetime
+    end: datetime
+    include_end: bool = True
+
+
+class PeriodTotals(NamedTuple):
+    revenue: float
+    total_sales: int
+    units_sold: int
+
+    @property
+    def average_order_value(self) -> float:
+        return self.revenue / self.total_sales if self.total_sales else 0
+
+
+def period_filter(period: Period):
+    upper_bound = Sale.sale_date <= period.end if period.include_end else Sale.sale_date < period.end
+    return (Sale.sale_date >= period.start) & upper_bound
+
+
+def compare_periods(db: Session, periods: List[Period], where=None) -> List[PeriodTotals]:
+    """Totals for every period, computed in a single scan with conditional aggregation.
+
+    The WHERE clause is the union of the period ranges, so the database only reads the
+    rows that fall in at least one period; each row is then attributed to every period
+    containing it by ``CASE`` expressions inside the aggregates. ``where`` restricts the
+    sales further (e.g. to those not in cold storage).
+    """
+    if not periods:
+        return []
+
+    columns = []
+    for period in periods:
+        in_period = period_filter(period)
+        columns.extend([
+            func.sum(case((in_period, Sale.total_amount), else_=0)),
+            func.count(case((in_period, Sale.id))),
+            func.sum(case((in_period, Sale.quantity), else_=0)),
+        ])
+
+    query = db.query(*columns).filter(
+        or_(*[period_filter(period) for period in periods])
+    )
+    if where is not None:
+        query = query.filter(where)
+    row = query.one()
+
+    return [
+        PeriodTotals(
+            revenue=row[i * 3] or 0,
+            total_sales=row[i * 3 + 1] or 0,
+            units_sold=row[i * 3 + 2] or 0
+        )
+        for i in range(len(periods))
+    ]
+
+
+def percentage_change(current: float, previous: float) -> float:
+    if previous == 0:
+        return 100 if current > 0 else 0
+    return ((current - previous) / previous) * 100
+
@@ -0,0 +1,59 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import Iterator, Sequence
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import Select
+
+from app.schemas.sale import ExportFormat
+
+# Rows fetched from the server-side cursor (and written to the response) per batch
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+
+def _csv_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _csv_batches(columns: Sequence[str], batches: Iterator[Sequence]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows([_csv_value(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _ndjson_batches(columns: Sequence[str], batches: Iterator[Sequence]) -> Iterator[bytes]:
+    for rows in batches:
+        yield "".join(
+            json.dumps(dict(zip(columns, row)), default=datetime.isoformat) + "\n"
+            for row in rows
+        ).encode()
+
+
+def stream_export(bind: Engine, statement: Select, export_format: ExportFormat,
+                  batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """Encode the rows of ``statement`` batch by batch as they come off the cursor.
+
+    The statement runs on its own connection with ``stream_results`` (a server-side
+    cursor on MySQL), so memory is bounded by ``batch_size`` rows however many rows
+    match. The connection is held until the generator is exhausted or closed.
+    """
+    with bind.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(statement)
+        columns = list(result.keys())
+        encode = _csv_batches if export_format == ExportFormat.CSV else _ndjson_batches
+        yield from encode(columns, result.partitions())
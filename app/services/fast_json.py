@@ -0,0 +1,107 @@
+import json
+import os
+from datetime import date, datetime
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query, Response
+from pydantic import TypeAdapter, create_model
+
+from app.services.request_metrics import timed_serialization
+
+try:
+    import orjson
+except ImportError:  # same output through the stdlib encoder, only slower
+    orjson = None
+
+# "fast" encodes database rows as they are; "validated" passes them through the
+# response schema first (slower, for debugging schema/database mismatches)
+RESPONSE_MODE = os.getenv("RESPONSE_MODE", "fast").lower()
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, default=_default, separators=(",", ":")).encode()
+
+
+def field_selector(schema):
+    """Dependency turning ``fields=name,price`` into a tuple of ``schema`` fields.
+
+    Fields come back in schema order (all of them when the parameter is absent), so
+    equivalent requests share cache entries; unknown names are a 400.
+    """
+    all_fields = tuple(schema.model_fields)
+
+    def select_fields(
+        fields: Optional[str] = Query(None, description=f"Comma-separated subset of: {', '.join(all_fields)}")
+    ) -> Tuple[str, ...]:
+        if not fields:
+            return all_fields
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested - set(all_fields)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+            )
+        return tuple(name for name in all_fields if name in requested)
+
+    return select_fields
+
+
+@lru_cache(maxsize=None)
+def schema_columns(model, schema, fields: Optional[Tuple[str, ...]] = None, extra: tuple = ()) -> tuple:
+    """The columns of ``model`` behind ``fields`` of ``schema`` (default all), in schema order.
+
+    ``extra`` columns (e.g. the pagination sort key) are selected after them when not
+    already included; they are not part of the response.
+    """
+    fields = fields or tuple(schema.model_fields)
+    return tuple(getattr(model, name) for name in fields) + tuple(
+        column for column in extra if column.key not in fields
+    )
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema, fields: Tuple[str, ...], many: bool) -> TypeAdapter:
+    if fields != tuple(schema.model_fields):
+        schema = create_model(
+            schema.__name__,
+            **{name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in fields}
+        )
+    return TypeAdapter(List[schema] if many else schema)
+
+
+def _encode(value, schema, fields: Tuple[str, ...], many: bool) -> bytes:
+    with timed_serialization():
+        if RESPONSE_MODE == "validated":
+            adapter = _adapter(schema, fields, many)
+            return adapter.dump_json(adapter.validate_python(value))
+        return dumps(value)
+
+
+def rows_response(rows: Sequence, schema, response: Optional[Response] = None,
+                  fields: Optional[Tuple[str, ...]] = None) -> Response:
+    """JSON response for rows selected with ``schema_columns``, without building ORM objects.
+
+    Database output is trusted: in the default mode rows go straight to the encoder and
+    skip per-row validation. Headers already set on ``response`` (e.g. the next cursor)
+    are carried over.
+    """
+    fields = fields or tuple(schema.model_fields)
+    items = [dict(zip(fields, row)) for row in rows]
+    headers = dict(response.headers) if response is not None else None
+    return Response(content=_encode(items, schema, fields, many=True), media_type="application/json", headers=headers)
+
+
+def row_response(row, schema, fields: Optional[Tuple[str, ...]] = None) -> Response:
+    """Single-object counterpart of ``rows_response``."""
+    fields = fields or tuple(schema.model_fields)
+    return Response(content=_encode(dict(zip(fields, row)), schema, fields, many=False), media_type="application/json")
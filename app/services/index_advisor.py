@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+from typing import Dict
+
+from sqlalchemy import func, true
+from sqlalchemy.orm import Session
+
+from app.db.explain import QueryPlan, explain
+from app.models.category import Category
+from app.models.inventory import Inventory
+from app.models.product import Product
+from app.models.sale import Sale
+from app.models.sale_rollup import DailySaleRollup
+from app.services.comparison import Period, period_filter
+from app.services.pagination import keyset_filter
+from app.services.timeseries import revenue_series_statement
+
+
+def router_queries(db: Session) -> Dict[str, object]:
+    """Representative statements issued by each router endpoint, with sample parameters."""
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=30)
+    previous = Period(start_date - timedelta(days=30), start_date)
+    current = Period(start_date, end_date)
+
+    sales = db.query(Sale)
+    newest_first = (Sale.sale_date.desc(), Sale.id.desc())
+    return {
+        "list_sales": sales.order_by(*newest_first).limit(100).statement,
+        "list_sales[cursor]": (
+            sales.filter(keyset_filter([Sale.sale_date, Sale.id], [start_date, 1000], descending=True))
+            .order_by(*newest_first).limit(100).statement
+        ),
+        "list_sales[date range]": (
+            sales.filter(Sale.sale_date >= start_date, Sale.sale_date <= end_date)
+            .order_by(*newest_first).limit(100).statement
+        ),
+        "list_sales[product]": (
+            sales.filter(Sale.product_id == 1, Sale.sale_date >= start_date)
+            .order_by(*newest_first).limit(100).statement
+        ),
+        "list_sales[amount]": (
+            sales.filter(Sale.total_amount >= 100, Sale.total_amount <= 500)
+            .order_by(*newest_first).limit(100).statement
+        ),
+        "get_revenue_by_interval[edge]": (
+            db.query(func.sum(Sale.total_amount), func.count(Sale.id))
+            .filter(Sale.sale_date >= start_date, Sale.sale_date <= end_date).statement
+        ),
+        "get_revenue_by_interval[rollup]": (
+            db.query(DailySaleRollup.bucket_start, func.sum(DailySaleRollup.revenue))
+            .filter(DailySaleRollup.bucket_start >= start_date, DailySaleRollup.bucket_start < end_date)
+            .group_by(DailySaleRollup.bucket_start).statement
+        ),
+        "get_revenue_by_interval[tz]": revenue_series_statement(
+            [start_date + timedelta(days=day, hours=5) for day in range(1, 30)], start_date, end_date
+        ),
+        "compare_revenue": (
+            db.query(func.sum(Sale.total_amount))
+            .filter(period_filter(current) | period_filter(previous)).statement
+        ),
+        "get_product": db.query(Product).filter(Product.id == 1).limit(1).statement,
+        "list_products": db.query(Product).order_by(Product.id).limit(100).statement,
+        "get_category": db.query(Category).filter(Category.id == 1).limit(1).statement,
+        "list_categories": db.query(Category).order_by(Category.id).limit(100).statement,
+        "update_inventory": db.query(Inventory).filter(Inventory.product_id == 1).limit(1).statement,
+        "list_inventory": db.query(Inventory).order_by(Inventory.id).limit(100).statement,
+        "list_low_stock": (
+            db.query(Inventory).filter(Inventory.is_low_stock == true())
+            .order_by(Inventory.id).limit(100).statement
+        ),
+    }
+
+
+def audit_router_queries(db: Session) -> Dict[str, QueryPlan]:
+    conn = db.connection()
+    return {name: explain(conn, statement) for name, statement in router_queries(db).items()}
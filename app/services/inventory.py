@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.models.inventory import Inventory
+from app.models.low_stock_event import LowStockEvent
+
+
+def record_stock_change(db: Session, product_id: int, was_low: bool, quantity: int, low_stock_threshold: int) -> bool:
+    """Add a ``LowStockEvent`` to the current transaction if the product crossed its threshold.
+
+    Returns whether an event was recorded. The session is flagged so the low stock feed
+    is woken once the transaction commits.
+    """
+    is_low = quantity <= low_stock_threshold
+    if is_low == was_low:
+        return False
+    db.add(LowStockEvent(
+        product_id=product_id,
+        is_low_stock=is_low,
+        quantity=quantity,
+        low_stock_threshold=low_stock_threshold
+    ))
+    db.info["low_stock_changed"] = True
+    return True
+
+
+def decrement_stock(db: Session, product_id: int, quantity: int) -> bool:
+    """Take ``quantity`` units of ``product_id`` out of stock in one conditional UPDATE.
+
+    The stock check and the decrement happen in the same statement, so concurrent buyers
+    can neither oversell nor overwrite each other's decrements. Returns False (and
+    changes nothing) when there is not enough stock or no inventory record.
+    """
+    result = db.execute(
+        update(Inventory)
+        .where(Inventory.product_id == product_id, Inventory.quantity >= quantity)
+        .values(quantity=Inventory.quantity - quantity, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        return False
+
+    # The row stays locked by our UPDATE until commit, so this reads our own result
+    remaining, threshold = db.execute(
+        select(Inventory.quantity, Inventory.low_stock_threshold).where(Inventory.product_id == product_id)
+    ).one()
+    record_stock_change(db, product_id, remaining + quantity <= threshold, remaining, threshold)
+    return True
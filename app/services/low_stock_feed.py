@@ -0,0 +1,114 @@
+import asyncio
+import os
+import threading
+from typing import AsyncIterator, List, Optional
+
+from sqlalchemy import event, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.models.low_stock_event import LowStockEvent
+from app.schemas.inventory import LowStockEventResponse
+
+# Subscribers are woken immediately by commits in this process; this poll picks up
+# events committed by other workers
+LOW_STOCK_POLL_SECONDS = float(os.getenv("LOW_STOCK_POLL_SECONDS", "1"))
+LOW_STOCK_KEEPALIVE_SECONDS = 15
+LOW_STOCK_EVENT_BATCH = 100
+
+
+class LowStockNotifier:
+    """Wakes the feed subscribers of this process, from any thread."""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> asyncio.Event:
+        wake = asyncio.Event()
+        with self._lock:
+            self._subscribers.add((asyncio.get_running_loop(), wake))
+        return wake
+
+    def unsubscribe(self, wake: asyncio.Event):
+        with self._lock:
+            self._subscribers = {(loop, event) for loop, event in self._subscribers if event is not wake}
+
+    def notify(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, wake in subscribers:
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:  # loop already closed
+                self.unsubscribe(wake)
+
+
+notifier = LowStockNotifier()
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_after_commit(session):
+    if session.info.pop("low_stock_changed", False):
+        notifier.notify()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("low_stock_changed", None)
+
+
+def latest_event_id(bind: Engine) -> int:
+    with Session(bind) as db:
+        return db.query(func.max(LowStockEvent.id)).scalar() or 0
+
+
+def fetch_events(bind: Engine, after_id: int, limit: int = LOW_STOCK_EVENT_BATCH) -> List[LowStockEventResponse]:
+    with Session(bind) as db:
+        events = (
+            db.query(LowStockEvent)
+            .filter(LowStockEvent.id > after_id)
+            .order_by(LowStockEvent.id)
+            .limit(limit)
+            .all()
+        )
+        return [LowStockEventResponse.model_validate(event) for event in events]
+
+
+def format_event(event: LowStockEventResponse) -> str:
+    name = "low_stock" if event.is_low_stock else "restocked"
+    return f"id: {event.id}\nevent: {name}\ndata: {event.model_dump_json()}\n\n"
+
+
+async def low_stock_events(bind: Engine, last_event_id: Optional[int] = None) -> AsyncIterator[str]:
+    """Server-sent events for every threshold crossing after ``last_event_id``.
+
+    Without ``last_event_id`` only crossings from now on are sent. Each event carries
+    its id, so a client reconnecting with ``Last-Event-ID`` resumes without gaps.
+    """
+    wake = notifier.subscribe()
+    try:
+        if last_event_id is None:
+            last_event_id = await run_in_threadpool(latest_event_id, bind)
+        yield ": connected\n\n"
+        idle = 0.0
+        while True:
+            wake.clear()
+            events = await run_in_threadpool(fetch_events, bind, last_event_id)
+            for low_stock_event in events:
+                yield format_event(low_stock_event)
+                last_event_id = low_stock_event.id
+            if len(events) == LOW_STOCK_EVENT_BATCH:
+                continue
+            if events:
+                idle = 0.0
+            try:
+                await asyncio.wait_for(wake.wait(), LOW_STOCK_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                idle += LOW_STOCK_POLL_SECONDS
+            if idle >= LOW_STOCK_KEEPALIVE_SECONDS:
+                yield ": keep-alive\n\n"
+                idle = 0.0
+    finally:
+        notifier.unsubscribe(wake)
@@ -0,0 +1,33 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, Sequence
+
+# Upper bounds in milliseconds
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """Thread-safe cumulative histogram with fixed upper bounds (Prometheus semantics)."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative, buckets = 0, {}
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = cumulative + counts[-1]
+        return {"buckets": buckets, "count": buckets["+Inf"], "sum": round(total, 3)}
@@ -0,0 +1,66 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence) -> str:
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> List:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(payload, list) or len(payload) != len(columns):
+            raise ValueError("cursor does not match the sort key")
+        return [
+            datetime.fromisoformat(value) if column.type.python_type is datetime else column.type.python_type(value)
+            for column, value in zip(columns, payload)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid cursor '{cursor}'"
+        )
+
+
+def keyset_filter(columns: Sequence, values: Sequence, descending: bool = False):
+    """Rows strictly after ``values`` in ``columns`` order.
+
+    The lexicographic comparison is expanded to OR-ed predicates and AND-ed with a
+    plain range on the leading column, which is what lets MySQL and SQLite seek on the
+    index backing it instead of scanning the whole index.
+    """
+    clauses = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        after = column < value if descending else column > value
+        clauses.append(and_(*[c == v for c, v in zip(columns[:i], values[:i])], after))
+    leading = columns[0] <= values[0] if descending else columns[0] >= values[0]
+    return and_(leading, or_(*clauses))
+
+
+def paginate(query, columns: Sequence, skip: int, limit: int, cursor: Optional[str], descending: bool = False):
+    """Order ``query`` by ``columns`` and select one page.
+
+    With a ``cursor`` the page starts right after the row it encodes (an empty cursor
+    means the first page) and ``skip`` is ignored; otherwise ``skip``/``limit`` apply.
+    """
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in columns])
+    if cursor is None:
+        query = query.offset(skip)
+    elif cursor:
+        query = query.filter(keyset_filter(columns, decode_cursor(cursor, columns), descending))
+    return query.limit(limit)
+
+
+def set_next_cursor(response: Response, items: Sequence, columns: Sequence, limit: int):
+    """Advertise the cursor of the following page when this page is full."""
+    if items and len(items) == limit:
+        last = items[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(last, column.key) for column in columns])
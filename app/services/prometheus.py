@@ -0,0 +1,169 @@
+import asyncio
+import glob
+import os
+from typing import Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.db import session
+from app.db.pool_metrics import pool_snapshot
+from app.services.cache import response_cache
+from app.services.request_metrics import prometheus_histogram, request_metrics
+
+# Directory shared by the worker processes of one server (set by gunicorn.conf.py).
+# Each worker writes its metrics there and GET /metrics, answered by any worker, adds
+# them up. Unset with a single process.
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR")
+# How often each worker rewrites its file
+METRICS_WRITE_SECONDS = float(os.getenv("METRICS_WRITE_SECONDS", "5"))
+
+
+def process_lines() -> List[str]:
+    """Request, connection pool and cache metrics of this process, in the text format."""
+    lines = request_metrics.prometheus_lines()
+
+    pools = {"primary": pool_snapshot(session.engine)}
+    if session.async_engine:
+        pools["async_primary"] = pool_snapshot(session.async_engine.sync_engine)
+    for index, replica in enumerate(session.replicas.replicas):
+        pools[f"replica_{index}"] = pool_snapshot(replica.engine)
+    lines += [
+        "# HELP db_pool_checkout_wait_ms Time to check a connection out of the pool, in milliseconds.",
+        "# TYPE db_pool_checkout_wait_ms histogram",
+    ]
+    for name, snapshot in pools.items():
+        if snapshot is not None:
+            lines.extend(prometheus_histogram("db_pool_checkout_wait_ms", snapshot["checkout_wait_ms"], pool=name))
+    lines += [
+        "# HELP db_pool_checked_out Connections currently checked out.",
+        "# TYPE db_pool_checked_out gauge",
+    ]
+    for name, snapshot in pools.items():
+        if snapshot is not None:
+            lines.append(f'db_pool_checked_out{{pool="{name}"}} {snapshot["checked_out"]}')
+
+    if session.replicas:
+        lines += [
+            "# HELP db_replica_healthy Whether the read replica is in rotation.",
+            "# TYPE db_replica_healthy gauge",
+        ]
+        lines.extend(
+            f'db_replica_healthy{{replica="{index}"}} {int(replica.healthy)}'
+            for index, replica in enumerate(session.replicas.replicas)
+        )
+
+    cache = response_cache.stats()
+    for counter in ("hits", "misses", "not_modified", "invalidations"):
+        lines += [
+            f"# TYPE response_cache_{counter}_total counter",
+            f"response_cache_{counter}_total {cache[counter]}",
+        ]
+    return lines
+
+
+def _worker_path(directory: str, pid: int) -> str:
+    return os.path.join(directory, f"worker-{pid}.prom")
+
+
+def write_worker_file(directory: str, pid: Optional[int] = None):
+    """Replace this worker's file with its current metrics."""
+    path = _worker_path(directory, pid or os.getpid())
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as f:
+        f.write("\n".join(process_lines()) + "\n")
+    os.replace(temporary, path)
+
+
+def mark_process_dead(directory: str, pid: int):
+    """Keep the counters of an exited worker (totals must not go down) but drop its gauges."""
+    path = _worker_path(directory, pid)
+    if os.path.exists(path):
+        os.replace(path, os.path.join(directory, f"dead-{pid}.prom"))
+
+
+def clear_directory(directory: str):
+    """Remove the files of a previous server run; call before the workers start."""
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "*.prom")):
+        os.remove(path)
+
+
+def _with_label(sample: str, name: str, value: str) -> str:
+    if sample.endswith("}"):
+        return f'{sample[:-1]},{name}="{value}"}}'
+    return f'{sample}{{{name}="{value}"}}'
+
+
+def _number(value: str):
+    number = float(value)
+    return int(number) if number.is_integer() and "." not in value else number
+
+
+def merge_lines(directory: str) -> List[str]:
+    """Metrics of every worker in ``directory``: counters and histograms are summed,
+    gauges are kept per live worker with a ``pid`` label."""
+    families: Dict[str, Dict] = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.prom"))):
+        state, pid = os.path.basename(path)[:-len(".prom")].split("-", 1)
+        with open(path) as f:
+            lines = f.read().splitlines()
+        family = None
+        for line in lines:
+            if line.startswith("# HELP ") or line.startswith("# TYPE "):
+                _, kind, name, text = line.split(" ", 3)
+                family = families.setdefault(name, {"help": None, "type": "untyped", "samples": {}})
+                family["help" if kind == "HELP" else "type"] = text
+                continue
+            if not line or family is None:
+                continue
+            sample, value = line.rsplit(" ", 1)
+            if family["type"] == "gauge":
+                if state == "dead":
+                    continue
+                sample = _with_label(sample, "pid", pid)
+            samples = family["samples"]
+            samples[sample] = samples.get(sample, 0) + _number(value)
+
+    merged = []
+    for name, family in families.items():
+        if family["help"] is not None:
+            merged.append(f"# HELP {name} {family['help']}")
+        merged.append(f"# TYPE {name} {family['type']}")
+        merged.extend(
+            f"{sample} {round(value, 3) if isinstance(value, float) else value}"
+            for sample, value in family["samples"].items()
+        )
+    return merged
+
+
+def render_lines() -> List[str]:
+    """What GET /metrics serves: this process, or all workers in multiprocess mode."""
+    if not METRICS_MULTIPROC_DIR:
+        return process_lines()
+    write_worker_file(METRICS_MULTIPROC_DIR)
+    return merge_lines(METRICS_MULTIPROC_DIR)
+
+
+class WorkerMetricsWriter:
+    """Rewrites this worker's metrics file every ``METRICS_WRITE_SECONDS``, so scrapes
+    answered by any other worker see it."""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if METRICS_MULTIPROC_DIR:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await run_in_threadpool(write_worker_file, METRICS_MULTIPROC_DIR)
+            await asyncio.sleep(METRICS_WRITE_SECONDS)
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            write_worker_file(METRICS_MULTIPROC_DIR)
+
+
+worker_metrics = WorkerMetricsWriter()
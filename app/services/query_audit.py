@@ -0,0 +1,128 @@
+import os
+import threading
+from collections import Counter, OrderedDict
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy.engine import Engine
+
+from app.db.explain import QueryPlan, explain_sql
+
+# Audit the SQL of every request (tests and staging, not production: EXPLAINs add load)
+QUERY_AUDIT = os.getenv("QUERY_AUDIT", "False").lower() == "true"
+# Statements slower than this are reported
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+# The same statement this many times in one request is reported as an N+1
+REPEATED_STATEMENT_THRESHOLD = int(os.getenv("REPEATED_STATEMENT_THRESHOLD", "3"))
+# Reports kept in memory for inspection
+MAX_AUDIT_REPORTS = 1000
+# Plans kept per SQL text (least recently used dropped first); the text varies with
+# IN-list and CASE sizes, so it is not a fixed set
+MAX_CACHED_PLANS = 1000
+
+
+class QueryBudget(NamedTuple):
+    statements: Optional[int]
+    allow_repeats: bool = False
+
+
+def query_budget(statements: Optional[int], allow_repeats: bool = False):
+    """Declare the most SQL statements ``endpoint`` may run per request.
+
+    Checked in query audit mode, where exceeding it is reported as a violation (and
+    fails the endpoint tests). ``allow_repeats`` is for endpoints that run a statement
+    per input row by design (bulk writes), whose count is not bounded either.
+    """
+    def decorator(endpoint):
+        endpoint.query_budget = QueryBudget(statements, allow_repeats)
+        return endpoint
+    return decorator
+
+
+class AuditedStatement(NamedTuple):
+    engine: Engine
+    statement: str
+    parameters: object
+    executemany: bool
+    duration_ms: float
+
+
+class QueryAuditReport(NamedTuple):
+    request: str
+    statements: int
+    budget: QueryBudget
+    # Over budget and repeated statements: the endpoint needs fixing
+    violations: List[str]
+    # Slow statements and full table scans: worth a look, may be fine on small tables
+    warnings: List[str]
+
+
+def _short(statement: str, length: int = 200) -> str:
+    return " ".join(statement.split())[:length]
+
+
+class QueryAuditor:
+    """Checks the statements of each request against its budget, for repeated (N+1)
+    statements, for slow statements and, through EXPLAIN, for full table scans.
+
+    ``audit`` blocks on EXPLAIN queries: call it from a worker thread, not the event loop.
+    """
+
+    def __init__(self, enabled: bool = QUERY_AUDIT):
+        self.enabled = enabled
+        self.reports: List[QueryAuditReport] = []
+        self._plans: "OrderedDict[str, QueryPlan]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _plan(self, statement: AuditedStatement) -> Optional[QueryPlan]:
+        # EXPLAIN needs a blocking connection of its own, so async engines are skipped
+        if statement.engine.dialect.is_async or statement.engine.dialect.name not in ("sqlite", "mysql"):
+            return None
+        with self._lock:
+            plan = self._plans.get(statement.statement)
+            if plan is not None:
+                self._plans.move_to_end(statement.statement)
+        if plan is None:
+            with statement.engine.connect() as conn:
+                plan = explain_sql(conn, statement.statement, statement.parameters)
+            with self._lock:
+                self._plans[statement.statement] = plan
+                while len(self._plans) > MAX_CACHED_PLANS:
+                    self._plans.popitem(last=False)
+        return plan
+
+    def audit(self, request: str, statements: List[AuditedStatement],
+              budget: Optional[QueryBudget] = None) -> QueryAuditReport:
+        budget = budget or QueryBudget(None)
+        violations, warnings = [], []
+        if budget.statements is not None and len(statements) > budget.statements:
+            violations.append(f"{len(statements)} statements, over the budget of {budget.statements}")
+        if not budget.allow_repeats:
+            repeated = Counter(statement.statement for statement in statements if not statement.executemany)
+            for text, count in repeated.items():
+                if count >= REPEATED_STATEMENT_THRESHOLD:
+                    violations.append(f"Repeated {count} times (N+1): {_short(text)}")
+
+        explained = set()
+        for statement in statements:
+            if statement.duration_ms >= SLOW_QUERY_MS:
+                warnings.append(f"Slow ({statement.duration_ms:.1f} ms): {_short(statement.statement)}")
+            if statement.executemany or statement.statement in explained \
+                    or not statement.statement.lstrip().upper().startswith("SELECT"):
+                continue
+            explained.add(statement.statement)
+            plan = self._plan(statement)
+            if plan is not None and plan.full_scans:
+                warnings.append(f"Full scan of {', '.join(plan.full_scans)}: {_short(statement.statement)}")
+
+        report = QueryAuditReport(request, len(statements), budget, violations, warnings)
+        if violations or warnings:
+            print(f"Query audit: {request}: {len(statements)} statements")
+            for problem in violations + warnings:
+                print(f"  {problem}")
+        with self._lock:
+            self.reports.append(report)
+            del self.reports[:-MAX_AUDIT_REPORTS]
+        return report
+
+
+query_auditor = QueryAuditor()
@@ -0,0 +1,144 @@
+import asyncio
+import os
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+
+from app.db import session
+from app.db.session import Base
+from app.services.columnar import columnar_sales
+
+# Development default. In production run `python migrate.py` once per deploy and set
+# this to False, so workers neither run DDL nor reflect the schema when they boot
+CREATE_SCHEMA_ON_STARTUP = os.getenv("CREATE_SCHEMA_ON_STARTUP", "True").lower() == "true"
+# Database retries back off from the first delay, doubling up to the maximum
+STARTUP_RETRY_DELAY = float(os.getenv("STARTUP_RETRY_DELAY", "0.5"))
+STARTUP_MAX_RETRY_DELAY = float(os.getenv("STARTUP_MAX_RETRY_DELAY", "10"))
+
+
+def _pool_size(engine: Engine) -> int:
+    size = getattr(engine.pool, "size", None)
+    return size() if callable(size) else 1
+
+
+class Readiness:
+    """Background preparation of a worker and its state for ``/health/ready``.
+
+    The database is retried with exponential backoff on the event loop (blocking calls
+    go to the threadpool), then the connection pools are filled up to their size so
+    the first requests do not pay for connecting. The worker serves ``/health/live``
+    meanwhile; it is ready once the database is reachable and the pools are warm.
+    """
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.ready_at: Optional[float] = None
+        self.attempts = 0
+        self.last_error: Optional[str] = None
+        self.schema = "pending"
+        self.pool_target = 0
+        self.pool_warmed = 0
+        self.columnar = "disabled"
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_at is not None
+
+    def start(self, engine: Engine, create_schema: bool = CREATE_SCHEMA_ON_STARTUP, load_columnar: bool = False):
+        """Run ``initialize`` in the background of the running event loop."""
+        self.started_at = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self.initialize(engine, create_schema, load_columnar))
+
+    def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        columnar_sales.stop()
+
+    def _prepare_database(self, engine: Engine, create_schema: bool):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        if create_schema:
+            Base.metadata.create_all(bind=engine)
+            self.schema = "created"
+        else:
+            self.schema = "skipped"
+
+    def _warm_pool(self, engine: Engine) -> int:
+        # Hold them all at once, otherwise the pool would hand back the same connection
+        connections = []
+        try:
+            for _ in range(_pool_size(engine)):
+                connections.append(engine.connect())
+        finally:
+            for conn in connections:
+                conn.close()
+        return len(connections)
+
+    async def _warm_async_pool(self) -> int:
+        session.get_async_sessionmaker()
+        engine = session.async_engine
+        connections = []
+        try:
+            for _ in range(_pool_size(engine.sync_engine)):
+                connections.append(await engine.connect())
+        finally:
+            for conn in connections:
+                await conn.close()
+        return len(connections)
+
+    async def initialize(self, engine: Engine, create_schema: bool = CREATE_SCHEMA_ON_STARTUP,
+                         load_columnar: bool = False):
+        delay = STARTUP_RETRY_DELAY
+        while True:
+            self.attempts += 1
+            try:
+                await run_in_threadpool(self._prepare_database, engine, create_schema)
+                break
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Database not ready (attempt {self.attempts}): {e}. Retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, STARTUP_MAX_RETRY_DELAY)
+        self.last_error = None
+        print(f"Database reachable after {self.attempts} attempt(s), schema {self.schema}")
+
+        self.pool_target = _pool_size(engine)
+        self.pool_warmed = await run_in_threadpool(self._warm_pool, engine)
+        if session.DB_MODE == "async":
+            self.pool_warmed += await self._warm_async_pool()
+            self.pool_target += _pool_size(session.async_engine.sync_engine)
+        self.ready_at = time.monotonic()
+        print(f"Ready in {self.ready_at - self.started_at:.2f}s ({self.pool_warmed} connections warmed)")
+
+        # Analytics fall back to SQL until the arrays are loaded, so this does not gate readiness
+        if load_columnar:
+            self.columnar = "loading"
+            try:
+                await run_in_threadpool(columnar_sales.load, engine)
+                columnar_sales.start_refreshing(engine)
+                self.columnar = "loaded"
+                print(f"Loaded {len(columnar_sales)} sales into the columnar engine "
+                      f"in {columnar_sales.load_seconds:.1f}s")
+            except Exception as e:
+                self.columnar = "failed"
+                print(f"Could not load the columnar engine: {e}")
+
+    def snapshot(self) -> dict:
+        now = self.ready_at if self.ready else time.monotonic()
+        return {
+            "status": "ready" if self.ready else "starting",
+            "seconds_since_start": round(now - self.started_at, 3),
+            "database_attempts": self.attempts,
+            "last_error": self.last_error,
+            "schema_status": self.schema,
+            "pool_target": self.pool_target,
+            "pool_warmed": self.pool_warmed,
+            "columnar": self.columnar,
+        }
+
+
+readiness = Readiness()
@@ -0,0 +1,175 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.services.metrics import Histogram
+from app.services.query_audit import AuditedStatement
+
+# Requests slower than this are logged with their SQL
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+# Statements kept per request for the slow request log
+MAX_CAPTURED_STATEMENTS = 50
+MAX_STATEMENT_LENGTH = 500
+
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+SIZE_BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class RequestTimings:
+    """Database and serialization time of one request, filled while it is handled."""
+
+    def __init__(self, audit: bool = False):
+        self.statements = 0
+        self.db_ms = 0.0
+        self.serialize_ms = 0.0
+        self.captured: List[Tuple[float, str]] = []
+        # Every statement with its parameters, for the query auditor
+        self.audited: Optional[List[AuditedStatement]] = [] if audit else None
+
+    def record_statement(self, conn, statement: str, parameters, executemany: bool, duration_ms: float):
+        self.statements += 1
+        self.db_ms += duration_ms
+        if len(self.captured) < MAX_CAPTURED_STATEMENTS:
+            self.captured.append((duration_ms, " ".join(statement.split())[:MAX_STATEMENT_LENGTH]))
+        if self.audited is not None:
+            self.audited.append(AuditedStatement(conn.engine, statement, parameters, executemany, duration_ms))
+
+
+# Set by the instrumentation middleware; copied into the threadpool with the context
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("current_timings", default=None)
+
+
+@contextmanager
+def timed_serialization():
+    """Add the time spent in the block to the current request's serialization time."""
+    timings = current_timings.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings.serialize_ms += (time.perf_counter() - started) * 1000
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    if current_timings.get() is not None:
+        conn.info.setdefault("statement_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _finish_statement(conn, cursor, statement, parameters, context, executemany):
+    timings = current_timings.get()
+    started = conn.info.get("statement_started")
+    if timings is not None and started:
+        duration = (time.perf_counter() - started.pop()) * 1000
+        timings.record_statement(conn, statement, parameters, executemany, duration)
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_failed_statement(context):
+    started = context.connection.info.get("statement_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.duration_ms = Histogram()
+        self.db_ms = Histogram()
+        self.serialize_ms = Histogram()
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.response_bytes = Histogram(SIZE_BUCKETS_BYTES)
+
+
+class RequestMetrics:
+    """Latency, database time, statement count, serialization time and response size
+    histograms per route, plus request counts per route and status."""
+
+    def __init__(self):
+        self._routes: Dict[Tuple[str, str], RouteMetrics] = {}
+        self._statuses: Dict[Tuple[str, str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, method: str, route: str, status: int, duration_ms: float,
+                timings: RequestTimings, response_bytes: int):
+        with self._lock:
+            metrics = self._routes.get((method, route))
+            if metrics is None:
+                metrics = self._routes[(method, route)] = RouteMetrics()
+            self._statuses[(method, route, status)] = self._statuses.get((method, route, status), 0) + 1
+        metrics.duration_ms.observe(duration_ms)
+        metrics.db_ms.observe(timings.db_ms)
+        metrics.serialize_ms.observe(timings.serialize_ms)
+        metrics.statements.observe(timings.statements)
+        metrics.response_bytes.observe(response_bytes)
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+            self._statuses.clear()
+
+    def prometheus_lines(self) -> List[str]:
+        with self._lock:
+            routes = sorted(self._routes.items())
+            statuses = sorted(self._statuses.items())
+
+        lines = [
+            "# HELP http_requests_total Requests handled, by route and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in statuses:
+            lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+        for name, attribute, description in (
+            ("http_request_duration_ms", "duration_ms", "Request latency in milliseconds."),
+            ("http_request_db_ms", "db_ms", "Time spent executing SQL per request, in milliseconds."),
+            ("http_request_db_statements", "statements", "SQL statements executed per request."),
+            ("http_request_serialize_ms", "serialize_ms", "Response serialization time in milliseconds."),
+            ("http_response_size_bytes", "response_bytes", "Response body size as sent, in bytes."),
+        ):
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} histogram")
+            for (method, route), metrics in routes:
+                lines.extend(prometheus_histogram(
+                    name, getattr(metrics, attribute).snapshot(), method=method, route=route
+                ))
+        return lines
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        key + '="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def prometheus_histogram(name: str, snapshot: Dict, **labels) -> Iterable[str]:
+    """Prometheus text lines of a ``Histogram.snapshot()``."""
+    for bound, count in snapshot["buckets"].items():
+        yield f"{name}_bucket{_labels(**labels, le=bound)} {count}"
+    yield f"{name}_sum{_labels(**labels)} {snapshot['sum']}"
+    yield f"{name}_count{_labels(**labels)} {snapshot['count']}"
+
+
+def log_slow_request(method: str, path: str, status: int, duration_ms: float, timings: RequestTimings):
+    print(f"Slow request: {method} {path} -> {status} in {duration_ms:.1f} ms "
+          f"({timings.statements} SQL statements, {timings.db_ms:.1f} ms in the database, "
+          f"{timings.serialize_ms:.1f} ms serializing)")
+    for duration, statement in timings.captured:
+        print(f"  {duration:8.1f} ms  {statement}")
+    if timings.statements > len(timings.captured):
+        print(f"  ... {timings.statements - len(timings.captured)} more statements")
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,196 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.sale import Sale
+from app.models.sale_rollup import (
+    DailySaleRollup,
+    MonthlySaleRollup,
+    WeeklySaleRollup,
+    YearlySaleRollup,
+)
+from app.schemas.sale import IntervalType
+
+ROLLUP_MODELS = {
+    IntervalType.DAILY: DailySaleRollup,
+    IntervalType.WEEKLY: WeeklySaleRollup,
+    IntervalType.MONTHLY: MonthlySaleRollup,
+    IntervalType.YEARLY: YearlySaleRollup,
+}
+
+LABEL_FORMATS = {
+    IntervalType.DAILY: "%Y-%m-%d",
+    IntervalType.WEEKLY: "%G-W%V",  # ISO week of the Monday starting the bucket
+    IntervalType.MONTHLY: "%Y-%m",
+    IntervalType.YEARLY: "%Y",
+}
+
+ROLLUP_MEASURES = ("revenue", "quantity", "total_sales")
+
+
+def bucket_start(value: datetime, interval: IntervalType) -> datetime:
+    """Return the start of the bucket containing ``value``. Weeks start on Monday."""
+    day = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == IntervalType.DAILY:
+        return day
+    if interval == IntervalType.WEEKLY:
+        return day - timedelta(days=day.weekday())
+    if interval == IntervalType.MONTHLY:
+        return day.replace(day=1)
+    return day.replace(month=1, day=1)
+
+
+def next_bucket_start(start: datetime, interval: IntervalType) -> datetime:
+    if interval == IntervalType.DAILY:
+        return start + timedelta(days=1)
+    if interval == IntervalType.WEEKLY:
+        return start + timedelta(weeks=1)
+    if interval == IntervalType.MONTHLY:
+        if start.month == 12:
+            return start.replace(year=start.year + 1, month=1)
+        return start.replace(month=start.month + 1)
+    return start.replace(year=start.year + 1)
+
+
+def bucket_starts(start: datetime, end: datetime, interval: IntervalType,
+                  limit: Optional[int] = None) -> List[datetime]:
+    """Starts of every bucket from the one containing ``start`` to the one containing ``end``.
+
+    Raises ``ValueError`` as soon as there are more than ``limit`` buckets.
+    """
+    starts = [bucket_start(start, interval)]
+    while True:
+        following = next_bucket_start(starts[-1], interval)
+        if following > end:
+            return starts
+        starts.append(following)
+        if limit is not None and len(starts) > limit:
+            raise ValueError(f"The range spans more than {limit} {interval.value} buckets")
+
+
+def format_bucket(start: datetime, interval: IntervalType) -> str:
+    return start.strftime(LABEL_FORMATS[interval])
+
+
+def _upsert_rollups(db: Session, model, rows: List[dict]):
+    """Add ``rows`` onto the rollup table, inserting buckets that do not exist yet."""
+    dialect = db.bind.dialect.name
+    if dialect == "sqlite":
+        stmt = sqlite.insert(model)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["bucket_start", "product_id"],
+            set_={col: getattr(model, col) + getattr(stmt.excluded, col) for col in ROLLUP_MEASURES}
+        )
+        # executemany of one cached statement; multi-VALUES statements recompile every time
+        db.execute(stmt, rows)
+    elif dialect == "mysql":
+        stmt = mysql.insert(model)
+        stmt = stmt.on_duplicate_key_update(
+            {col: getattr(model, col) + getattr(stmt.inserted, col) for col in ROLLUP_MEASURES}
+        )
+        db.execute(stmt, rows)
+    else:
+        for values in rows:
+            row = db.get(model, (values["bucket_start"], values["product_id"]))
+            if row is None:
+                db.add(model(**values))
+            else:
+                for col in ROLLUP_MEASURES:
+                    setattr(row, col, getattr(row, col) + values[col])
+
+
+def apply_sales_to_rollups(db: Session, sales: Iterable[dict]):
+    """Add newly inserted sales to every rollup table (within the caller's transaction).
+
+    ``sales`` are mappings with ``product_id``, ``quantity``, ``total_amount`` and
+    ``sale_date``, plus ``total_sales`` when one mapping stands for several sales
+    (default 1). They are pre-aggregated per bucket so each rollup table gets one
+    executemany of the cached upsert statement, with one row per touched bucket.
+    """
+    sales = list(sales)
+    if not sales:
+        return
+    for interval, model in ROLLUP_MODELS.items():
+        buckets = defaultdict(lambda: [0.0, 0, 0])
+        for sale in sales:
+            bucket = buckets[(bucket_start(sale["sale_date"], interval), sale["product_id"])]
+            bucket[0] += sale["total_amount"]
+            bucket[1] += sale["quantity"]
+            bucket[2] += sale.get("total_sales", 1)
+        _upsert_rollups(db, model, [
+            {
+                "bucket_start": start,
+                "product_id": product_id,
+                "revenue": revenue,
+                "quantity": quantity,
+                "total_sales": total_sales,
+            }
+            # Sorted so concurrent writers lock the rollup rows in the same order
+            for (start, product_id), (revenue, quantity, total_sales) in sorted(buckets.items())
+        ])
+
+
+def remove_sales_from_rollups(db: Session, sales: Iterable[dict], before: datetime):
+    """Subtract ``sales`` (mappings as for ``apply_sales_to_rollups``) from every rollup
+    table, then delete the buckets starting before ``before`` that have no sales left."""
+    apply_sales_to_rollups(db, (
+        {
+            **sale,
+            "quantity": -sale["quantity"],
+            "total_amount": -sale["total_amount"],
+            "total_sales": -sale.get("total_sales", 1),
+        }
+        for sale in sales
+    ))
+    for model in ROLLUP_MODELS.values():
+        db.query(model).filter(
+            model.bucket_start < before, model.total_sales <= 0
+        ).delete(synchronize_session=False)
+
+
+def apply_sale_to_rollups(db: Session, sale: Sale):
+    apply_sales_to_rollups(db, [{
+        "product_id": sale.product_id,
+        "quantity": sale.quantity,
+        "total_amount": sale.total_amount,
+        "sale_date": sale.sale_date,
+    }])
+
+
+def rebuild_rollups(db: Session, chunk_size: int = 1000) -> Dict[IntervalType, int]:
+    """Recompute every rollup table from the raw sales table and commit the result."""
+    totals = {interval: defaultdict(lambda: [0.0, 0, 0]) for interval in ROLLUP_MODELS}
+    rows = (
+        db.query(Sale.product_id, Sale.quantity, Sale.total_amount, Sale.sale_date)
+        .filter(Sale.sale_date.isnot(None))
+        .yield_per(chunk_size)
+    )
+    for product_id, quantity, total_amount, sale_date in rows:
+        for interval, buckets in totals.items():
+            bucket = buckets[(bucket_start(sale_date, interval), product_id)]
+            bucket[0] += total_amount
+            bucket[1] += quantity
+            bucket[2] += 1
+
+    counts = {}
+    for interval, model in ROLLUP_MODELS.items():
+        db.query(model).delete(synchronize_session=False)
+        values = [
+            {
+                "bucket_start": start,
+                "product_id": product_id,
+                "revenue": revenue,
+                "quantity": quantity,
+                "total_sales": total_sales,
+            }
+            for (start, product_id), (revenue, quantity, total_sales) in totals[interval].items()
+        ]
+        for offset in range(0, len(values), chunk_size):
+            db.execute(insert(model), values[offset:offset + chunk_size])
+        counts[interval] = len(values)
+    db.commit()
+    return counts
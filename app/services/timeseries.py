@@ -0,0 +1,125 @@
+import os
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import case, func, literal, select
+from sqlalchemy.orm import Session
+
+from app.models.sale import Sale
+from app.schemas.sale import IntervalType
+from app.services.analytics import totals_statement
+from app.services.cold_storage import ColdSales
+from app.services.columnar import ColumnarSales
+from app.services.rollups import bucket_starts
+
+# Sale dates are stored as naive UTC (the SaleDate schema type converts offsets)
+UTC = ZoneInfo("UTC")
+# Most buckets a revenue series may have; every boundary is a bound parameter of the query
+MAX_SERIES_BUCKETS = int(os.getenv("MAX_SERIES_BUCKETS", "5000"))
+
+
+def resolve_timezone(name: str) -> ZoneInfo:
+    """The IANA zone ``name``; raises ``ValueError`` for unknown names."""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown time zone '{name}'")
+
+
+def to_local(value: datetime, zone: ZoneInfo) -> datetime:
+    """Naive local time in ``zone``. Naive values are taken as already local."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(zone).replace(tzinfo=None)
+
+
+def to_utc(local: datetime, zone: ZoneInfo) -> datetime:
+    """Naive UTC instant of the naive local time ``local`` in ``zone``."""
+    return local.replace(tzinfo=zone).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def utc_range(start_date: datetime, end_date: datetime, zone: ZoneInfo) -> Tuple[datetime, datetime]:
+    return to_utc(to_local(start_date, zone), zone), to_utc(to_local(end_date, zone), zone)
+
+
+def _bucket_index(column, boundaries: Sequence[datetime], low: int, high: int):
+    """Index ``i`` in ``[low, high)`` of the bucket holding ``column``, where bucket ``i``
+    ends at ``boundaries[i]``. A balanced ``CASE`` tree: log2(buckets) comparisons per row."""
+    if high - low == 1:
+        return literal(low)
+    middle = (low + high) // 2
+    return case(
+        (column < boundaries[middle - 1], _bucket_index(column, boundaries, low, middle)),
+        else_=_bucket_index(column, boundaries, middle, high)
+    )
+
+
+def revenue_series_statement(boundaries: Sequence[datetime], start: datetime, end: datetime, where=None):
+    """Revenue and sale count per bucket index for sales in ``[start, end]`` (naive UTC).
+
+    ``boundaries`` are the UTC instants between consecutive buckets, so there are
+    ``len(boundaries) + 1`` buckets. One scan of the ``sale_date`` index range.
+    """
+    index = _bucket_index(Sale.sale_date, boundaries, 0, len(boundaries) + 1)
+    statement = select(index.label("bucket"), func.sum(Sale.total_amount), func.count(Sale.id)) \
+        .where(Sale.sale_date >= start, Sale.sale_date <= end)
+    if where is not None:
+        statement = statement.where(where)
+    return statement.group_by(index)
+
+
+def revenue_series(
+    db: Session,
+    interval: IntervalType,
+    start_date: datetime,
+    end_date: datetime,
+    zone: ZoneInfo = UTC,
+    store: Optional[ColumnarSales] = None,
+    cold: Optional[ColdSales] = None
+) -> List[Tuple[datetime, float, int]]:
+    """Dense revenue series: ``(bucket start, revenue, sale count)`` for every bucket.
+
+    Buckets are calendar days, ISO weeks (from Monday), months or years in ``zone``,
+    from the one containing ``start_date`` to the one containing ``end_date``; buckets
+    without sales are zero. Bucket starts are aware datetimes in ``zone``. Naive
+    ``start_date``/``end_date`` are local times in ``zone``.
+
+    When every local bucket boundary in the range is also a UTC midnight (UTC itself, or
+    zones at UTC+0 for the whole range) the rollup tables are used; otherwise the raw
+    sales are bucketed by the database against the precomputed UTC boundaries, which
+    keeps daylight saving changes exact. Either way it is a single statement. With
+    ``store`` the columnar engine buckets the same boundaries in memory instead. With
+    ``cold``, the raw scan only reads hot rows and adds the cold snapshot's totals.
+
+    Raises ``ValueError`` when the range has more than ``MAX_SERIES_BUCKETS`` buckets.
+    """
+    start_local, end_local = to_local(start_date, zone), to_local(end_date, zone)
+    if start_local > end_local:
+        return []
+    starts = bucket_starts(start_local, end_local, interval, limit=MAX_SERIES_BUCKETS)
+    boundaries = [to_utc(start, zone) for start in starts[1:]]
+    start_utc, end_utc = to_utc(start_local, zone), to_utc(end_local, zone)
+
+    totals = [[0.0, 0] for _ in starts]
+    if store is not None:
+        totals = store.bucket_totals(boundaries, start_utc, end_utc)
+    elif all(to_utc(value, zone) == value for value in (start_local, end_local, *starts)):
+        statement = totals_statement(start_utc, end_utc, interval, group_by=None)
+        positions = {start: position for position, start in enumerate(starts)}
+        for bucket, _, revenue, _, total_sales in db.execute(statement):
+            totals[positions[bucket]] = [revenue or 0, total_sales or 0]
+    else:
+        where = None
+        if cold is not None:
+            totals = [list(bucket) for bucket in cold.bucket_totals(boundaries, start_utc, end_utc)]
+            where = cold.hot_filter()
+        statement = revenue_series_statement(boundaries, start_utc, end_utc, where)
+        for position, revenue, total_sales in db.execute(statement):
+            totals[position][0] += revenue or 0
+            totals[position][1] += total_sales or 0
+
+    return [
+        (start.replace(tzinfo=zone), revenue, total_sales)
+        for start, (revenue, total_sales) in zip(starts, totals)
+    ]
@@ -0,0 +1,9 @@
+from uvicorn_worker import UvicornWorker
+
+
+class ProductionUvicornWorker(UvicornWorker):
+    """Gunicorn worker running the app with the uvloop event loop and the httptools
+    HTTP parser (both part of uvicorn[standard]). Keep-alive, request limits and
+    timeouts come from gunicorn.conf.py."""
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools"}
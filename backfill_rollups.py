@@ -0,0 +1,17 @@
+from app.db.session import SessionLocal
+from app.services.rollups import rebuild_rollups
+
+
+def backfill_rollups():
+    db = SessionLocal()
+    try:
+        return rebuild_rollups(db)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    print("Rebuilding sales rollup tables...")
+    counts = backfill_rollups()
+    for interval, count in counts.items():
+        print(f"{interval.value}: {count} rollup rows")
+    print("Sales rollup tables rebuilt successfully!")
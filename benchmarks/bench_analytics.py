@@ -0,0 +1,106 @@
+"""Top products and revenue by category: rollup covering vs a raw GROUP BY over sales.
+
+    python -m benchmarks.bench_analytics --sales 10000000 --products 2000
+
+Sales are spread over ``--days`` (default three years) and the rollup tables are rebuilt
+before measuring. ``rollup`` is what the endpoints run (full years/months/days from the
+rollup tables, raw sales only for the partial days at the edges); ``raw`` joins and
+groups every sale in the window. The response cache is bypassed. Target: rollup p50
+under 100 ms at 10M sales.
+"""
+import argparse
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+from app.models.sale import Sale
+from app.schemas.sale import IntervalType
+from app.services.analytics import revenue_by_category, top_products
+from app.services.rollups import rebuild_rollups
+from benchmarks.common import make_engine, measure, populate
+
+TARGET_MS = 100
+
+
+def raw_top_products(db: Session, start: datetime, end: datetime, limit: int):
+    return (
+        db.query(Sale.product_id, func.sum(Sale.total_amount).label("revenue"))
+        .filter(Sale.sale_date >= start, Sale.sale_date <= end)
+        .group_by(Sale.product_id)
+        .order_by(func.sum(Sale.total_amount).desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def raw_revenue_by_category(db: Session, start: datetime, end: datetime):
+    return (
+        db.query(Product.category_id, func.sum(Sale.total_amount))
+        .join(Product, Product.id == Sale.product_id)
+        .filter(Sale.sale_date >= start, Sale.sale_date <= end)
+        .group_by(Product.category_id)
+        .all()
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=1000000)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=3 * 365)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    engine = make_engine(args.database_url)
+    populate(engine, args.sales, num_products=args.products, days=args.days)
+    with Session(engine) as db:
+        rebuild_rollups(db, chunk_size=10000)
+
+    end = datetime.utcnow()
+    windows = {
+        "30 days": end - timedelta(days=30),
+        "1 year": end - timedelta(days=365),
+        "all": end - timedelta(days=args.days + 1),
+    }
+
+    results = []
+    with Session(engine) as db:
+        for name, start in windows.items():
+            cases = {
+                "top-products": (
+                    lambda: top_products(db, start, end),
+                    lambda: raw_top_products(db, start, end, 10),
+                ),
+                "top-products monthly": (
+                    lambda: top_products(db, start, end, IntervalType.MONTHLY),
+                    None,
+                ),
+                "revenue-by-category": (
+                    lambda: revenue_by_category(db, start, end),
+                    lambda: raw_revenue_by_category(db, start, end),
+                ),
+                "revenue-by-category monthly": (
+                    lambda: revenue_by_category(db, start, end, IntervalType.MONTHLY),
+                    None,
+                ),
+            }
+            for endpoint, (rollup, raw) in cases.items():
+                result = {"endpoint": endpoint, "window": name, "rollup": measure(rollup, args.repeat)}
+                if raw is not None:
+                    result["raw"] = measure(raw, max(1, args.repeat // 4))
+                results.append(result)
+
+    print(f"{'endpoint':>28} {'window':>8} {'rollup p50 ms':>14} {'raw p50 ms':>11}")
+    for result in results:
+        raw = result["raw"]["p50_ms"] if "raw" in result else "-"
+        flag = "" if result["rollup"]["p50_ms"] < TARGET_MS else f"  over {TARGET_MS} ms"
+        print(f"{result['endpoint']:>28} {result['window']:>8} {result['rollup']['p50_ms']:>14} {raw:>11}{flag}")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
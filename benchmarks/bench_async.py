@@ -0,0 +1,58 @@
+"""Concurrent read throughput of the sync (threadpool) and async (DB_MODE=async) modes.
+
+    python -m benchmarks.bench_async --sales 100000 --concurrency 64 --duration 15
+
+Each mode runs under its own uvicorn process against the same database; use
+``--database-url`` to point both at a local MySQL instead of a SQLite file.
+"""
+import argparse
+import json
+from datetime import datetime, timedelta
+
+from benchmarks.common import make_engine, populate, run_load, serve
+
+
+def read_paths():
+    end = datetime.utcnow().replace(microsecond=0)
+    start = end - timedelta(days=30)
+    return [
+        "/products/?limit=100",
+        "/products/1",
+        "/categories/",
+        "/inventory/?limit=100",
+        "/inventory/low-stock",
+        "/sales/?limit=100",
+        f"/sales/?start_date={start.isoformat()}&end_date={end.isoformat()}&limit=100",
+        "/sales/revenue?interval=daily",
+        f"/sales/compare?current_start={start.isoformat()}&current_end={end.isoformat()}",
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=100000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    engine = make_engine(args.database_url)
+    populate(engine, args.sales)
+    database_url = args.database_url or engine.url.render_as_string(hide_password=False)
+    engine.dispose()
+
+    results = {}
+    for mode in ("sync", "async"):
+        with serve({"DATABASE_URL": database_url, "DB_MODE": mode}, args.port) as base_url:
+            results[mode] = run_load(base_url, read_paths(), args.concurrency, args.duration)
+
+    print(f"{'mode':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for mode, stats in results.items():
+        print(f"{mode:>6} {stats['throughput_rps']:>8} {stats['p50_ms']:>8} "
+              f"{stats['p95_ms']:>8} {stats['p99_ms']:>8} {stats['errors']:>7}")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Sale ingestion throughput: POST /sales/ per row vs POST /sales/bulk.
+
+    python -m benchmarks.bench_bulk_sales --rows 20000 --chunk-size 1000
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app.models.inventory import Inventory
+from benchmarks.common import bench_client, make_engine, populate
+
+
+def sale_payloads(count: int, num_products: int):
+    rng = random.Random(7)
+    start = datetime(2024, 1, 1)
+    for _ in range(count):
+        quantity = rng.randint(1, 5)
+        yield {
+            "product_id": rng.randint(1, num_products),
+            "quantity": quantity,
+            "unit_price": 10.0,
+            "total_amount": 10.0 * quantity,
+            "sale_date": (start + timedelta(minutes=rng.randint(0, 525600))).isoformat(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--single-rows", type=int, default=2000, help="rows sent through POST /sales/")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    engine = make_engine(args.database_url)
+    populate(engine, 0)
+    # Every benchmark row must be accepted: stock up well beyond what the runs sell
+    with engine.begin() as conn:
+        conn.execute(update(Inventory).values(quantity=10 ** 9))
+    client = bench_client(engine)
+    results = {}
+
+    payloads = list(sale_payloads(args.single_rows, 100))
+    started = time.perf_counter()
+    for payload in payloads:
+        client.post("/sales/", json=payload)
+    elapsed = time.perf_counter() - started
+    results["single"] = {"rows": len(payloads), "seconds": round(elapsed, 3), "rows_per_s": round(len(payloads) / elapsed)}
+
+    payloads = list(sale_payloads(args.rows, 100))
+    started = time.perf_counter()
+    response = client.post(f"/sales/bulk?chunk_size={args.chunk_size}", json=payloads)
+    elapsed = time.perf_counter() - started
+    assert response.json()["inserted"] == len(payloads), response.json()
+    results["bulk_json"] = {"rows": len(payloads), "seconds": round(elapsed, 3), "rows_per_s": round(len(payloads) / elapsed)}
+
+    body = "\n".join(json.dumps(payload) for payload in payloads)
+    started = time.perf_counter()
+    response = client.post(
+        f"/sales/bulk?chunk_size={args.chunk_size}",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    elapsed = time.perf_counter() - started
+    assert response.json()["inserted"] == len(payloads), response.json()
+    results["bulk_ndjson"] = {"rows": len(payloads), "seconds": round(elapsed, 3), "rows_per_s": round(len(payloads) / elapsed)}
+
+    print(f"{'mode':>12} {'rows':>8} {'seconds':>9} {'rows/s':>9}")
+    for mode, stats in results.items():
+        print(f"{mode:>12} {stats['rows']:>8} {stats['seconds']:>9} {stats['rows_per_s']:>9}")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
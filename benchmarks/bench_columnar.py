@@ -0,0 +1,89 @@
+"""Analytics queries answered by SQL vs the in-memory columnar engine.
+
+    python -m benchmarks.bench_columnar --sales 1000000 10000000
+
+For each size the database is populated (rollups rebuilt), the columnar engine is
+loaded, and /sales/revenue, /sales/compare and /sales/top-products style queries are
+timed through their service functions (the response cache is not involved). Load time
+and the arrays' memory are reported as well.
+"""
+import argparse
+import json
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from sqlalchemy.orm import Session
+
+from app.schemas.sale import IntervalType
+from app.services.analytics import top_products
+from app.services.columnar import ColumnarSales
+from app.services.comparison import Period, compare_periods
+from app.services.rollups import rebuild_rollups
+from app.services.timeseries import UTC, revenue_series
+from benchmarks.common import make_engine, measure, populate
+
+NEW_YORK = ZoneInfo("America/New_York")
+
+
+def cases(db: Session, end: datetime, days: int):
+    month, year = end - timedelta(days=30), end - timedelta(days=365)
+    everything = end - timedelta(days=days + 1)
+    periods = [Period(end - timedelta(days=7 * (i + 1)), end - timedelta(days=7 * i)) for i in range(12)]
+    return {
+        "revenue daily 30d": lambda store: revenue_series(db, IntervalType.DAILY, month, end, UTC, store),
+        "revenue daily 1y (New York)": lambda store: revenue_series(
+            db, IntervalType.DAILY, year, end, NEW_YORK, store
+        ),
+        "revenue monthly all": lambda store: revenue_series(db, IntervalType.MONTHLY, everything, end, UTC, store),
+        "compare 12 weeks": lambda store: store.period_totals(periods) if store else compare_periods(db, periods),
+        "top-products 1y": lambda store: top_products(db, year, end, store=store),
+        "top-products monthly all": lambda store: top_products(
+            db, everything, end, IntervalType.MONTHLY, store=store
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, nargs="+", default=[1000000])
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=3 * 365)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    results = []
+    for num_sales in args.sales:
+        engine = make_engine(args.database_url)
+        populate(engine, num_sales, num_products=args.products, days=args.days)
+        with Session(engine) as db:
+            rebuild_rollups(db, chunk_size=10000)
+
+        store = ColumnarSales()
+        store.load(engine)
+        arrays = store._columns()
+        memory_mb = sum(column.nbytes for column in arrays) / 1024 / 1024
+        print(f"{num_sales} sales: columnar load {store.load_seconds:.1f}s, {memory_mb:.0f} MB")
+
+        end = datetime.utcnow()
+        with Session(engine) as db:
+            for name, query in cases(db, end, args.days).items():
+                results.append({
+                    "sales": num_sales,
+                    "query": name,
+                    "sql": measure(lambda: query(None), args.repeat),
+                    "columnar": measure(lambda: query(store), args.repeat),
+                    "load_seconds": round(store.load_seconds, 2),
+                    "memory_mb": round(memory_mb, 1),
+                })
+        engine.dispose()
+
+    print(f"{'sales':>9} {'query':>28} {'sql p50 ms':>11} {'columnar':>9}")
+    for result in results:
+        print(f"{result['sales']:>9} {result['query']:>28} {result['sql']['p50_ms']:>11} "
+              f"{result['columnar']['p50_ms']:>9}")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Peak memory of GET /sales/export vs materializing the same rows as one page.
+
+    python -m benchmarks.bench_export --rows 10000 100000 500000
+
+Each measurement runs in a fresh subprocess, so the reported peak RSS belongs to that
+mode alone. ``page`` is what ``list_sales`` does for one (uncapped) page: load every
+row as an ORM object, validate it into ``SaleResponse`` and serialize the list. The
+export modes should stay flat as the row count grows.
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from typing import List
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from app.main import app
+from app.routers import sales
+from app.schemas.sale import SaleResponse
+from benchmarks.common import make_engine, peak_rss_mb, populate, use_engine
+
+MODES = ("csv", "ndjson", "page")
+
+
+async def drain(path: str, query: str) -> int:
+    """Run one GET through the ASGI app and discard the body as it is sent."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "root_path": "", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    received, requested, disconnected = 0, False, asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal received
+        if message["type"] == "http.response.body":
+            received += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return received
+
+
+def run_worker(mode: str, database_url: str, rows: int) -> dict:
+    engine = make_engine(database_url, reset=False)
+    use_engine(engine)
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    if mode == "page":
+        with Session(engine) as db:
+            page = sales.list_sales(
+                Response(), skip=0, limit=rows, cursor=None, start_date=None, end_date=None,
+                product_id=None, min_amount=None, max_amount=None, db=db
+            )
+            size = len(TypeAdapter(List[SaleResponse]).dump_json(page))
+    else:
+        size = asyncio.run(drain("/sales/export", f"format={mode}"))
+    return {
+        "mode": mode,
+        "rows": rows,
+        "seconds": round(time.perf_counter() - started, 3),
+        "bytes": size,
+        "peak_rss_mb": peak_rss_mb(),
+        "peak_rss_growth_mb": round(peak_rss_mb() - baseline, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 500000])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.database_url, args.rows[0])))
+        return
+
+    results = []
+    for rows in args.rows:
+        engine = make_engine(args.database_url)
+        populate(engine, rows)
+        database_url = engine.url.render_as_string(hide_password=False)
+        engine.dispose()
+        for mode in args.modes:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_export", "--worker", mode,
+                 "--database-url", database_url, "--rows", str(rows)],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{'rows':>9} {'mode':>7} {'seconds':>9} {'MB out':>8} {'peak RSS MB':>12} {'growth MB':>10}")
+    for result in results:
+        print(f"{result['rows']:>9} {result['mode']:>7} {result['seconds']:>9} "
+              f"{result['bytes'] / 1e6:>8.1f} {result['peak_rss_mb']:>12} {result['peak_rss_growth_mb']:>10}")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
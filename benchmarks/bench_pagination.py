@@ -0,0 +1,63 @@
+"""Offset vs keyset pagination latency on /sales/ and /products/.
+
+    python -m benchmarks.bench_pagination --sales 200000
+
+Page N is fetched with ``skip=(N-1)*limit`` in offset mode and with the cursor of the
+last row of page N-1 in cursor mode. Keyset latency should stay flat as N grows.
+"""
+import argparse
+import json
+
+from sqlalchemy.orm import Session
+
+from app.models.sale import Sale
+from app.services.pagination import encode_cursor
+from benchmarks.common import bench_client, make_engine, measure, populate
+
+
+def cursor_before_page(engine, page: int, limit: int) -> str:
+    if page == 1:
+        return ""
+    with Session(engine) as db:
+        row = (
+            db.query(Sale.sale_date, Sale.id)
+            .order_by(Sale.sale_date.desc(), Sale.id.desc())
+            .offset((page - 1) * limit - 1)
+            .first()
+        )
+    return encode_cursor([row.sale_date, row.id])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=200000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    engine = make_engine(args.database_url)
+    populate(engine, args.sales)
+    client = bench_client(engine)
+
+    results = []
+    for page in args.pages:
+        if (page - 1) * args.limit >= args.sales:
+            continue
+        skip = (page - 1) * args.limit
+        cursor = cursor_before_page(engine, page, args.limit)
+        results.append({
+            "page": page,
+            "offset": measure(lambda: client.get(f"/sales/?skip={skip}&limit={args.limit}"), args.repeat),
+            "cursor": measure(lambda: client.get(f"/sales/?cursor={cursor}&limit={args.limit}"), args.repeat),
+        })
+
+    print(f"{'page':>6} {'offset p50 ms':>14} {'cursor p50 ms':>14}")
+    for result in results:
+        print(f"{result['page']:>6} {result['offset']['p50_ms']:>14} {result['cursor']['p50_ms']:>14}")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
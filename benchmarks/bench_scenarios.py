@@ -0,0 +1,219 @@
+"""Load test of every router endpoint at a fixed concurrency, with results saved as JSON.
+
+    python -m benchmarks.bench_scenarios --sales 1000000 --concurrency 32 --duration 10
+    python -m benchmarks.bench_scenarios --database-url mysql+mysqlconnector://root:pw@localhost/bench --reuse
+    python -m benchmarks.bench_scenarios --compare results/before.json results/after.json
+
+The database is filled by ``benchmarks.generator`` (Zipf products, seasonal dates)
+unless ``--reuse`` points at one that already is. The API runs under uvicorn in a
+subprocess; each scenario then gets ``--duration`` seconds of requests from
+``--concurrency`` clients. Request parameters (ids, date windows) vary from request
+to request, skewed like the data. The response cache is off unless ``--cache memory``.
+p50/p95/p99, throughput and errors go to ``--output``, together with the commit and
+settings, so two runs can be compared with ``--compare``.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from sqlalchemy import func, select
+
+from app.models.sale import Sale
+from benchmarks.common import make_engine, run_load, serve
+from benchmarks.generator import populate_skewed, zipf_cumulative_weights
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+ZONES = ("UTC", "America/New_York", "Europe/Berlin", "Asia/Kolkata")
+
+
+class Sampler:
+    """Request parameters drawn like the generated data: popular products more often."""
+
+    def __init__(self, num_products: int, num_categories: int, first_sale: datetime, last_sale: datetime,
+                 seed: int = 7):
+        self.rng = random.Random(seed)
+        self.product_ids = list(range(1, num_products + 1))
+        self.product_weights = zipf_cumulative_weights(num_products, 1.1)
+        self.num_categories = num_categories
+        self.first_sale, self.last_sale = first_sale, last_sale
+        # Distinguishes names created by this run from earlier runs on the same database
+        self.run = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+
+    def product(self) -> int:
+        # Every 50th product was generated with almost no stock; writes avoid them
+        while True:
+            product_id = self.rng.choices(self.product_ids, cum_weights=self.product_weights)[0]
+            if product_id % 50:
+                return product_id
+
+    def category(self) -> int:
+        return self.rng.randint(1, self.num_categories)
+
+    def window(self, days: int, start_name: str = "start_date", end_name: str = "end_date") -> str:
+        """Query parameters of a ``days`` long range within the sales."""
+        span = max(0, int((self.last_sale - self.first_sale).total_seconds()) - days * 86400)
+        start = self.first_sale + timedelta(seconds=self.rng.randint(0, span))
+        end = start + timedelta(days=days)
+        return f"{start_name}={start:%Y-%m-%dT%H:%M:%S}&{end_name}={end:%Y-%m-%dT%H:%M:%S}"
+
+    def moment(self) -> str:
+        return (self.first_sale + (self.last_sale - self.first_sale) * self.rng.random()).strftime("%Y-%m-%dT%H:%M:%S")
+
+    def sale(self) -> dict:
+        return {"product_id": self.product(), "quantity": self.rng.randint(1, 3), "unit_price": 10.0,
+                "total_amount": 10.0, "sale_date": self.last_sale.isoformat()}
+
+
+def get(path: Callable[[], str]) -> Callable[[int], tuple]:
+    return lambda i: ("GET", path(), None)
+
+
+def scenarios(sampler: Sampler) -> Dict[str, List]:
+    """Requests per scenario; together they cover every endpoint except the SSE feed."""
+    s = sampler
+    return {
+        "root": ["/"],
+        "products list": [get(lambda: f"/products/?limit=100&skip={s.rng.randint(0, 10) * 100}")],
+        "products list fields": [get(lambda: f"/products/?limit=100&fields=id,name,price&category_id={s.category()}")],
+        "product by id": [get(lambda: f"/products/{s.product()}")],
+        "product create": [lambda i: ("POST", "/products/", {
+            "name": f"Bench {s.run} {i}", "description": "", "price": 9.99, "category_id": s.category()})],
+        "categories list": ["/categories/"],
+        "category by id": [get(lambda: f"/categories/{s.category()}")],
+        "category create": [lambda i: ("POST", "/categories/", {"name": f"Bench {s.run} {i}", "description": ""})],
+        "inventory list": [get(lambda: f"/inventory/?limit=100&skip={s.rng.randint(0, 10) * 100}")],
+        "inventory low stock": ["/inventory/low-stock"],
+        "inventory update": [lambda i: ("PATCH", f"/inventory/{s.product()}", {"low_stock_threshold": 10})],
+        "sales list": ["/sales/?limit=100"],
+        "sales list by product": [get(lambda: f"/sales/?limit=100&product_id={s.product()}")],
+        "sales list by window": [get(lambda: f"/sales/?limit=100&{s.window(30)}")],
+        "sales export 1 day": [get(lambda: f"/sales/export?format=ndjson&{s.window(1)}")],
+        "revenue daily 30d": [get(lambda: f"/sales/revenue?interval=daily&{s.window(30)}")],
+        "revenue daily 30d tz": [get(lambda: f"/sales/revenue?interval=daily&{s.window(30)}&tz={s.rng.choice(ZONES)}")],
+        "revenue monthly 1y": [get(lambda: f"/sales/revenue?interval=monthly&{s.window(365)}")],
+        "top products 90d": [get(lambda: f"/sales/top-products?{s.window(90)}")],
+        "top products weekly by category": [
+            get(lambda: f"/sales/top-products?interval=weekly&{s.window(90)}&category_id={s.category()}")
+        ],
+        "revenue by category 1y": [get(lambda: f"/sales/revenue-by-category?{s.window(365)}")],
+        "compare 30d": [get(lambda: f"/sales/compare?{s.window(30, 'current_start', 'current_end')}")],
+        "compare 12 weeks": [get(lambda: f"/sales/compare/periods?interval=weekly&count=12&end_date={s.moment()}")],
+        "sale create": [lambda i: ("POST", "/sales/", s.sale())],
+        "sales bulk 100": [lambda i: ("POST", "/sales/bulk", [s.sale() for _ in range(100)])],
+        "metrics": ["/metrics", "/metrics/db-pool", "/metrics/cache"],
+    }
+
+
+def git_revision() -> Dict[str, object]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+    return {"commit": commit, "dirty": dirty}
+
+
+def compare(before_path: str, after_path: str):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    def change(old, new):
+        return f"{(new - old) / old * 100:+.0f}%" if old else "-"
+
+    print(f"before: {before['meta'].get('commit')}  after: {after['meta'].get('commit')}")
+    print(f"{'scenario':>34} {'p50 ms':>15} {'p99 ms':>15} {'req/s':>15}")
+    for name, new in after["scenarios"].items():
+        old = before["scenarios"].get(name)
+        if old is None:
+            print(f"{name:>34} {'(new)':>15}")
+            continue
+        print(f"{name:>34} {new['p50_ms']:>8} {change(old['p50_ms'], new['p50_ms']):>6} "
+              f"{new['p99_ms']:>8} {change(old['p99_ms'], new['p99_ms']):>6} "
+              f"{new['throughput_rps']:>8} {change(old['throughput_rps'], new['throughput_rps']):>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=1000000)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--scenario", action="append", help="only these scenarios (repeatable, substring match)")
+    parser.add_argument("--db-mode", choices=("sync", "async"), default="sync")
+    parser.add_argument("--cache", choices=("none", "memory"), default="none")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--reuse", action="store_true", help="use --database-url as it is, without generating data")
+    parser.add_argument("--output", default=None, help=f"JSON results (default: {RESULTS_DIR}/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    if args.reuse and not args.database_url:
+        parser.error("--reuse needs --database-url")
+
+    engine = make_engine(args.database_url, reset=not args.reuse)
+    generated = None
+    if not args.reuse:
+        generated = populate_skewed(engine, args.sales, args.products, args.categories, args.days)
+        print(f"Generated {args.sales} sales in {generated['insert_seconds']}s "
+              f"(+{generated['rollup_seconds']}s rollups)")
+    with engine.connect() as conn:
+        num_sales, first_sale, last_sale = conn.execute(
+            select(func.count(), func.min(Sale.sale_date), func.max(Sale.sale_date))
+        ).one()
+    database_url = args.database_url or engine.url.render_as_string(hide_password=False)
+    engine.dispose()
+
+    sampler = Sampler(args.products, args.categories, first_sale, last_sale)
+    selected = {
+        name: requests for name, requests in scenarios(sampler).items()
+        if not args.scenario or any(wanted in name for wanted in args.scenario)
+    }
+    results = {}
+    # Slow request logging would print for every request under load
+    env = {"DATABASE_URL": database_url, "DB_MODE": args.db_mode, "CACHE_BACKEND": args.cache,
+           "SLOW_REQUEST_MS": "60000"}
+    with serve(env, args.port) as base_url:
+        for name, requests in selected.items():
+            results[name] = run_load(base_url, requests, args.concurrency, args.duration)
+            stats = results[name]
+            print(f"{name:>34} {stats['throughput_rps']:>8} req/s  p50 {stats['p50_ms']:>8}  "
+                  f"p95 {stats['p95_ms']:>8}  p99 {stats['p99_ms']:>8}  errors {stats['errors']}")
+
+    revision = git_revision()
+    output = args.output or os.path.join(RESULTS_DIR, f"{(revision['commit'] or 'results')[:12]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "meta": {
+                **revision,
+                "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+                "database": engine.dialect.name,
+                "sales": num_sales,
+                "generated": generated,
+                "concurrency": args.concurrency,
+                "duration_s": args.duration,
+                "db_mode": args.db_mode,
+                "cache": args.cache,
+                "python": platform.python_version(),
+            },
+            "scenarios": results,
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
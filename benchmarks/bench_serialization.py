@@ -0,0 +1,84 @@
+"""List endpoint serialization: ORM objects + response_model vs the fast JSON path.
+
+    python -m benchmarks.bench_serialization --sales 20000 --limit 100 1000
+
+Per endpoint and page size, times fetching one page and producing the JSON body:
+``orm`` is the previous path (ORM objects, ``from_attributes`` validation, then
+FastAPI's ``jsonable`` dump and ``json.dumps``), ``validated`` selects columns and
+validates them with a precompiled ``TypeAdapter``, ``fast`` encodes the rows directly.
+"""
+import argparse
+import json
+from typing import List
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session, raiseload
+
+from app.models.category import Category
+from app.models.inventory import Inventory
+from app.models.product import Product
+from app.models.sale import Sale
+from app.schemas.category import CategoryResponse
+from app.schemas.inventory import InventoryResponse
+from app.schemas.product import ProductResponse
+from app.schemas.sale import SaleResponse
+from app.services import fast_json
+from app.services.fast_json import rows_response, schema_columns
+from benchmarks.common import make_engine, measure, populate
+
+ENDPOINTS = {
+    "/products/": (Product, ProductResponse, [Product.id]),
+    "/categories/": (Category, CategoryResponse, [Category.id]),
+    "/inventory/": (Inventory, InventoryResponse, [Inventory.id]),
+    "/sales/": (Sale, SaleResponse, [Sale.sale_date.desc(), Sale.id.desc()]),
+}
+
+
+def orm_body(db: Session, model, schema, order_by, limit: int) -> bytes:
+    items = db.query(model).options(raiseload("*")).order_by(*order_by).limit(limit).all()
+    adapter = TypeAdapter(List[schema])
+    validated = adapter.validate_python(items, from_attributes=True)
+    return json.dumps(adapter.dump_python(validated, mode="json"), separators=(",", ":")).encode()
+
+
+def column_body(db: Session, model, schema, order_by, limit: int, mode: str) -> bytes:
+    fast_json.RESPONSE_MODE = mode
+    rows = db.query(*schema_columns(model, schema)).order_by(*order_by).limit(limit).all()
+    return rows_response(rows, schema, Response()).body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=20000)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--limit", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    engine = make_engine(args.database_url)
+    populate(engine, args.sales, num_products=args.products)
+
+    results = []
+    with Session(engine) as db:
+        for path, (model, schema, order_by) in ENDPOINTS.items():
+            for limit in args.limit:
+                result = {"endpoint": path, "limit": limit}
+                result["orm"] = measure(lambda: orm_body(db, model, schema, order_by, limit), args.repeat)
+                for mode in ("validated", "fast"):
+                    result[mode] = measure(
+                        lambda: column_body(db, model, schema, order_by, limit, mode), args.repeat
+                    )
+                results.append(result)
+
+    print(f"{'endpoint':>14} {'limit':>6} {'orm p50 ms':>11} {'validated':>10} {'fast':>8} {'speedup':>8}")
+    for result in results:
+        orm, fast = result["orm"]["p50_ms"], result["fast"]["p50_ms"]
+        print(f"{result['endpoint']:>14} {result['limit']:>6} {orm:>11} {result['validated']['p50_ms']:>10} "
+              f"{fast:>8} {orm / fast:>7.1f}x")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
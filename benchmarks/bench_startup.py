@@ -0,0 +1,92 @@
+"""Import time of app.main and time from process start to the first served request.
+
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --database-url mysql+mysqlconnector://root:pw@localhost/bench
+
+Each run starts a fresh interpreter, so nothing is cached between runs. The import
+is timed in a subprocess that only imports ``app.main``. The API is then started
+under uvicorn, once with ``CREATE_SCHEMA_ON_STARTUP=True`` and once with ``False``
+(production, after ``python migrate.py``), and polled until ``/health/live`` and
+then ``/health/ready`` answer 200.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict
+
+import httpx
+
+from benchmarks.common import make_engine
+
+IMPORT_SCRIPT = (
+    "import time; started = time.perf_counter(); import app.main; "
+    "print((time.perf_counter() - started) * 1000)"
+)
+POLL_INTERVAL = 0.005
+
+
+def import_ms(env: Dict[str, str]) -> float:
+    output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], env={**os.environ, **env},
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def wait_for(client: httpx.Client, path: str, process: subprocess.Popen, deadline: float):
+    while True:
+        try:
+            if client.get(path).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        if process.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError(f"API server did not answer {path}")
+        time.sleep(POLL_INTERVAL)
+
+
+def startup_ms(env: Dict[str, str], port: int) -> Dict[str, float]:
+    """Milliseconds from spawning uvicorn until live and until ready."""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env={**os.environ, **env}, stdout=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1) as client:
+            deadline = time.monotonic() + 60
+            wait_for(client, "/health/live", process, deadline)
+            live = (time.perf_counter() - started) * 1000
+            wait_for(client, "/health/ready", process, deadline)
+            ready = (time.perf_counter() - started) * 1000
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return {"live": live, "ready": ready}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    # An existing schema, as a migrated production database would have
+    engine = make_engine(args.database_url)
+    env = {"DATABASE_URL": engine.url.render_as_string(hide_password=False), "SLOW_REQUEST_MS": "60000"}
+    engine.dispose()
+
+    imports = [import_ms(env) for _ in range(args.runs)]
+    print(f"{'import app.main':>34}  median {statistics.median(imports):>8.1f} ms  min {min(imports):>8.1f} ms")
+    for create_schema in ("True", "False"):
+        runs = [startup_ms({**env, "CREATE_SCHEMA_ON_STARTUP": create_schema}, args.port) for _ in range(args.runs)]
+        for stage in ("live", "ready"):
+            timings = [run[stage] for run in runs]
+            print(f"{f'create schema {create_schema}: {stage}':>34}  median {statistics.median(timings):>8.1f} ms  "
+                  f"min {min(timings):>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Shared helpers for the benchmark scripts in this directory.
+
+Benchmarks run the real FastAPI app in-process against a throwaway SQLite file
+(or the database given with ``--database-url``) so they need no running server.
+"""
+import asyncio
+import contextlib
+import itertools
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+import httpx
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import Base, get_db
+from app.main import app
+from app.models.category import Category
+from app.models.inventory import Inventory
+from app.models.product import Product
+from app.models.sale import Sale
+
+
+def make_engine(database_url: str = None, reset: bool = True, connect_args: Dict = None):
+    if database_url is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="ecom-bench-"), "bench.db")
+        database_url = f"sqlite:///{path}"
+    connect_args = {**({"check_same_thread": False} if database_url.startswith("sqlite") else {}), **(connect_args or {})}
+    engine = create_engine(database_url, connect_args=connect_args)
+    if reset:
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def use_engine(engine):
+    """Bind the app's ``get_db`` dependency to ``engine``."""
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+
+
+def bench_client(engine) -> TestClient:
+    """A TestClient whose ``get_db`` dependency is bound to ``engine``."""
+    use_engine(engine)
+    return TestClient(app)
+
+
+def populate(engine, num_sales: int, num_products: int = 100, batch_size: int = 10000, days: int = 365):
+    """Insert categories, products with inventory and ``num_sales`` uniformly spread sales."""
+    now = datetime.utcnow()
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        conn.execute(insert(Category), [
+            {"id": i, "name": f"Category {i}", "description": "", "created_at": now, "updated_at": now}
+            for i in range(1, 11)
+        ])
+        prices = {i: round(rng.uniform(5, 500), 2) for i in range(1, num_products + 1)}
+        conn.execute(insert(Product), [
+            {"id": i, "name": f"Product {i}", "description": "", "price": price,
+             "category_id": (i % 10) + 1, "created_at": now, "updated_at": now}
+            for i, price in prices.items()
+        ])
+        conn.execute(insert(Inventory), [
+            {"product_id": i, "quantity": rng.randint(0, 100), "low_stock_threshold": 10,
+             "created_at": now, "updated_at": now}
+            for i in prices
+        ])
+        start = now - timedelta(days=days)
+        span = days * 86400
+        for offset in range(0, num_sales, batch_size):
+            rows = []
+            for _ in range(min(batch_size, num_sales - offset)):
+                product_id = rng.randint(1, num_products)
+                quantity = rng.randint(1, 5)
+                rows.append({
+                    "product_id": product_id,
+                    "quantity": quantity,
+                    "unit_price": prices[product_id],
+                    "total_amount": round(prices[product_id] * quantity, 2),
+                    "sale_date": start + timedelta(seconds=rng.randint(0, span)),
+                    "created_at": now,
+                    "updated_at": now,
+                })
+            conn.execute(insert(Sale), rows)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far."""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def measure(fn: Callable, repeat: int = 20) -> Dict[str, float]:
+    """Call ``fn`` ``repeat`` times and return latency statistics in milliseconds."""
+    fn()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+    }
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(timings_ms, elapsed_s: float, errors: int = 0) -> Dict[str, float]:
+    timings_ms = sorted(timings_ms)
+    return {
+        "requests": len(timings_ms),
+        "errors": errors,
+        "throughput_rps": round(len(timings_ms) / elapsed_s, 1) if elapsed_s else 0.0,
+        "p50_ms": round(percentile(timings_ms, 0.50), 3),
+        "p95_ms": round(percentile(timings_ms, 0.95), 3),
+        "p99_ms": round(percentile(timings_ms, 0.99), 3),
+    }
+
+
+@contextlib.contextmanager
+def serve(env: Dict[str, str], port: int, app_path: str = "app.main:app", extra_args=()):
+    """Run the API under uvicorn in a subprocess until the block exits."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app_path, "--port", str(port), "--log-level", "warning", *extra_args],
+        env={**os.environ, **env},
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                # Ready: database reachable, schema created and connection pool warmed
+                if httpx.get(f"{base_url}/health/ready", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("API server did not start")
+            time.sleep(0.2)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+async def _load(base_url: str, paths: List, concurrency: int, duration_s: float):
+    timings, errors = [], 0
+    deadline = time.perf_counter() + duration_s
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    sequence = itertools.count()
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker(offset: int):
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                i = next(sequence)
+                request = paths[i % len(paths)]
+                # A path is a GET; a callable returns (method, path, JSON body) for request i
+                method, path, body = request(i) if callable(request) else ("GET", request, None)
+                started = time.perf_counter()
+                response = await client.request(method, path, json=body)
+                timings.append((time.perf_counter() - started) * 1000)
+                if response.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker(i) for i in range(concurrency)])
+        elapsed = time.perf_counter() - started
+    return summarize(timings, elapsed, errors)
+
+
+def run_load(base_url: str, paths: List, concurrency: int = 50, duration_s: float = 10.0) -> Dict[str, float]:
+    """Issue requests round-robin over ``paths`` from ``concurrency`` clients for ``duration_s``.
+
+    Items are GET paths, or callables taking the request number and returning
+    ``(method, path, json_body)`` for writes.
+    """
+    return asyncio.run(_load(base_url, paths, concurrency, duration_s))
@@ -0,0 +1,225 @@
+"""Bulk data generator with realistic skew for benchmarks and load tests.
+
+    python -m benchmarks.generator --sales 10000000 --database-url mysql+mysqlconnector://root:pw@localhost/bench
+
+Product popularity follows a Zipf law (``--zipf``, rank 1 sells about as much as the
+next several together), and sale dates follow a seasonal curve: a December peak and
+a summer dip, busier weekends, evening hours, and year-on-year growth. Rows are
+inserted as driver-level executemany batches (no ORM objects), or on MySQL with
+``--load-data`` through ``LOAD DATA LOCAL INFILE`` from a temporary CSV, and the
+rollup tables are rebuilt at the end.
+"""
+import argparse
+import csv
+import itertools
+import math
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.category import Category
+from app.models.inventory import Inventory
+from app.models.product import Product
+from app.models.sale import Sale
+from app.services.rollups import rebuild_rollups
+from benchmarks.common import make_engine
+
+# Relative traffic per hour of day (UTC), quiet at night and peaking in the evening
+HOUR_WEIGHTS = (2, 1, 1, 1, 1, 2, 3, 5, 7, 8, 9, 10, 11, 10, 10, 10, 11, 12, 14, 15, 14, 11, 7, 4)
+# Monday first
+WEEKDAY_WEIGHTS = (0.9, 0.9, 0.95, 1.0, 1.1, 1.3, 1.25)
+YEARLY_GROWTH = 0.25
+SEASONAL_AMPLITUDE = 0.35
+SALE_COLUMNS = ("product_id", "quantity", "unit_price", "total_amount", "sale_date", "created_at", "updated_at")
+
+
+def zipf_cumulative_weights(n: int, s: float) -> List[float]:
+    """Cumulative weights of ranks 1..n with weight ``1 / rank**s``, for ``random.choices``."""
+    return list(itertools.accumulate(1 / rank ** s for rank in range(1, n + 1)))
+
+
+def seasonal_cumulative_weights(start: datetime, days: int) -> List[float]:
+    """Cumulative weight of each day from ``start``: December peak, weekends, growth."""
+    weights = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        # Cosine peaking around December 15th, lowest in mid-June
+        season = 1 + SEASONAL_AMPLITUDE * math.cos(2 * math.pi * (day.timetuple().tm_yday - 349) / 365.25)
+        growth = (1 + YEARLY_GROWTH) ** (offset / 365.25)
+        weights.append(season * growth * WEEKDAY_WEIGHTS[day.weekday()])
+    return list(itertools.accumulate(weights))
+
+
+def generate_sales(
+    rng: random.Random,
+    num_sales: int,
+    prices: Dict[int, float],
+    start: datetime,
+    days: int,
+    zipf: float = 1.1,
+    batch_size: int = 50000
+) -> Iterator[List[Tuple]]:
+    """Batches of sale rows (``SALE_COLUMNS`` order) with Zipf-distributed products and
+    seasonal dates. Popularity ranks are shuffled over product ids."""
+    product_ids = list(prices)
+    rng.shuffle(product_ids)
+    product_weights = zipf_cumulative_weights(len(product_ids), zipf)
+    day_weights = seasonal_cumulative_weights(start, days)
+    hour_weights = list(itertools.accumulate(HOUR_WEIGHTS))
+    day_starts = [start + timedelta(days=offset) for offset in range(days)]
+    now = datetime.utcnow().replace(microsecond=0)
+
+    for offset in range(0, num_sales, batch_size):
+        size = min(batch_size, num_sales - offset)
+        products = rng.choices(product_ids, cum_weights=product_weights, k=size)
+        dates = rng.choices(day_starts, cum_weights=day_weights, k=size)
+        hours = rng.choices(range(24), cum_weights=hour_weights, k=size)
+        quantities = rng.choices((1, 2, 3, 4, 5), weights=(50, 25, 12, 8, 5), k=size)
+        rows = []
+        for product_id, day, hour, quantity in zip(products, dates, hours, quantities):
+            price = prices[product_id]
+            sale_date = day + timedelta(seconds=hour * 3600 + rng.randrange(3600))
+            rows.append((product_id, quantity, price, round(price * quantity, 2), sale_date, now, now))
+        yield rows
+
+
+def insert_rows(conn, batches: Iterator[List[Tuple]]) -> int:
+    """Insert sale batches with the driver's executemany, bypassing SQL compilation per row."""
+    placeholder = "?" if conn.dialect.paramstyle == "qmark" else "%s"
+    sql = f"INSERT INTO sales ({', '.join(SALE_COLUMNS)}) VALUES ({', '.join([placeholder] * len(SALE_COLUMNS))})"
+    count = 0
+    for rows in batches:
+        conn.exec_driver_sql(sql, rows)
+        count += len(rows)
+    return count
+
+
+def load_data_rows(conn, batches: Iterator[List[Tuple]]) -> int:
+    """MySQL bulk load: each batch is written to a CSV and read with LOAD DATA LOCAL INFILE.
+
+    Needs ``local_infile`` on the server and ``allow_local_infile`` on the connection.
+    """
+    count = 0
+    with tempfile.TemporaryDirectory(prefix="ecom-load-") as directory:
+        path = os.path.join(directory, "sales.csv")
+        for rows in batches:
+            with open(path, "w", newline="") as f:
+                csv.writer(f).writerows(rows)
+            conn.exec_driver_sql(
+                f"LOAD DATA LOCAL INFILE '{path}' INTO TABLE sales "
+                "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' LINES TERMINATED BY '\\r\\n' "
+                f"({', '.join(SALE_COLUMNS)})"
+            )
+            count += len(rows)
+    return count
+
+
+def populate_skewed(
+    engine,
+    num_sales: int,
+    num_products: int = 2000,
+    num_categories: int = 20,
+    days: int = 730,
+    zipf: float = 1.1,
+    seed: int = 42,
+    batch_size: int = 50000,
+    load_data: bool = False,
+    rollups: bool = True
+) -> Dict[str, float]:
+    """Insert categories, products with ample stock and ``num_sales`` skewed sales."""
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(insert(Category), [
+            {"id": i, "name": f"Category {i}", "description": "", "created_at": now, "updated_at": now}
+            for i in range(1, num_categories + 1)
+        ])
+        # Log-normal prices: mostly cheap items, a long tail of expensive ones
+        prices = {i: round(min(2000.0, rng.lognormvariate(3.5, 0.9)) + 0.99, 2) for i in range(1, num_products + 1)}
+        conn.execute(insert(Product), [
+            {"id": i, "name": f"Product {i}", "description": "", "price": price,
+             "category_id": rng.randint(1, num_categories), "created_at": now, "updated_at": now}
+            for i, price in prices.items()
+        ])
+        # Enough stock that write scenarios never run out; a few products start low
+        conn.execute(insert(Inventory), [
+            {"product_id": i, "quantity": rng.randint(0, 9) if i % 50 == 0 else 10 ** 7,
+             "low_stock_threshold": 10, "created_at": now, "updated_at": now}
+            for i in prices
+        ])
+
+    start = (now - timedelta(days=days)).replace(hour=0, minute=0, second=0)
+    batches = generate_sales(rng, num_sales, prices, start, days, zipf, batch_size)
+    # Secondary indexes are built once at the end instead of maintained row by row. An
+    # index leading with a foreign key column stays: MySQL needs it for the constraint
+    # (error 1553 when dropped).
+    indexes = [index for index in Sale.__table__.indexes if not list(index.columns)[0].foreign_keys]
+    with engine.begin() as conn:
+        for index in indexes:
+            index.drop(conn)
+        if load_data:
+            load_data_rows(conn, batches)
+        else:
+            insert_rows(conn, batches)
+        for index in indexes:
+            index.create(conn)
+    insert_seconds = time.perf_counter() - started
+
+    rollup_seconds = 0.0
+    if rollups:
+        started = time.perf_counter()
+        with Session(engine) as db:
+            rebuild_rollups(db, chunk_size=batch_size)
+        rollup_seconds = time.perf_counter() - started
+    return {
+        "sales": num_sales,
+        "insert_seconds": round(insert_seconds, 1),
+        "sales_per_second": round(num_sales / insert_seconds) if insert_seconds else 0,
+        "rollup_seconds": round(rollup_seconds, 1),
+    }
+
+
+def top_share(counts: Sequence[int], fraction: float) -> float:
+    """Share of the total held by the top ``fraction`` of ``counts``."""
+    counts = sorted(counts, reverse=True)
+    top = counts[:max(1, int(len(counts) * fraction))]
+    return sum(top) / max(1, sum(counts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=1000000)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--zipf", type=float, default=1.1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=50000)
+    parser.add_argument("--load-data", action="store_true", help="MySQL only: LOAD DATA LOCAL INFILE")
+    parser.add_argument("--no-rollups", action="store_true")
+    parser.add_argument("--database-url", default=None, help="emptied first; default: a temporary SQLite file")
+    args = parser.parse_args()
+
+    engine = make_engine(args.database_url, connect_args={"allow_local_infile": True} if args.load_data else None)
+    stats = populate_skewed(
+        engine, args.sales, args.products, args.categories, args.days, args.zipf, args.seed,
+        args.batch_size, args.load_data, not args.no_rollups
+    )
+    with engine.connect() as conn:
+        per_product = conn.execute(select(func.count()).select_from(Sale).group_by(Sale.product_id)).scalars().all()
+    print(f"Inserted {stats['sales']} sales in {stats['insert_seconds']}s ({stats['sales_per_second']}/s), "
+          f"rollups rebuilt in {stats['rollup_seconds']}s")
+    print(f"Top 1% of products: {top_share(per_product, 0.01):.0%} of sales, "
+          f"top 20%: {top_share(per_product, 0.2):.0%}")
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import argparse
+from datetime import datetime
+
+from app.db.session import SessionLocal
+from app.services.cold_storage import COLD_STORAGE_DIR, compact_sales
+
+
+def months_ago(months: int) -> datetime:
+    """Start of the month ``months`` months before the current one (UTC)."""
+    now = datetime.utcnow()
+    index = now.year * 12 + now.month - 1 - months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+def compact(cutoff: datetime, directory: str):
+    db = SessionLocal()
+    try:
+        return compact_sales(db, cutoff, directory)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Snapshot old sales into monthly .npy files")
+    parser.add_argument("--hot-months", type=int, default=3,
+                        help="recent months (besides the current one) left to the sales table")
+    parser.add_argument("--cutoff", type=datetime.fromisoformat, default=None,
+                        help="compact the months before this date instead")
+    parser.add_argument("--directory", default=COLD_STORAGE_DIR)
+    args = parser.parse_args()
+
+    cutoff = args.cutoff or months_ago(args.hot_months)
+    print(f"Compacting sales before {cutoff:%Y-%m} into {args.directory}...")
+    months = compact(cutoff, args.directory)
+    for month, count in months.items():
+        print(f"{month}: {count} sales")
+    print("Cold sales snapshot written successfully!")
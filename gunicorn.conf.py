@@ -0,0 +1,61 @@
+"""Production server settings, read by ``gunicorn app.main:app`` from this directory.
+
+Every setting can be overridden from the environment (see .env.example).
+"""
+import multiprocessing
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+bind = f"{os.getenv('API_HOST', '0.0.0.0')}:{os.getenv('API_PORT', '8000')}"
+# Async workers: one per core is usually enough. Each worker has its own connection
+# pool, so the database sees up to WEB_CONCURRENCY * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "app.workers.ProductionUvicornWorker"
+
+# Longer than the load balancer's idle timeout, so it never reuses a connection the
+# worker has just closed
+keepalive = int(os.getenv("KEEPALIVE_SECONDS", "75"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+# Restart workers now and then (jittered so they do not restart together)
+max_requests = int(os.getenv("MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "1000"))
+
+# Import the app once in the master and fork the workers from it: faster boot and
+# shared memory. Engines are reset in post_fork so no pooled connection is shared.
+preload_app = os.getenv("PRELOAD_APP", "True").lower() == "true"
+
+# Workers write their metrics here and GET /metrics adds them up; set before the app
+# is imported, in the master or in the workers
+os.environ.setdefault("METRICS_MULTIPROC_DIR", os.path.join(os.getenv("TMPDIR", "/tmp"), "ecommerce-metrics"))
+
+# A memory cache per worker only sees its own invalidations, so the other workers
+# would keep serving stale bodies (and 304s) after a write: several workers need the
+# shared redis cache, or no cache. Set before the app is imported.
+if workers > 1 and os.getenv("CACHE_BACKEND", "memory").lower() == "memory":
+    print(f"CACHE_BACKEND=memory is per worker and {workers} workers would serve stale responses: "
+          "response cache disabled. Set CACHE_BACKEND=redis to share one.")
+    os.environ["CACHE_BACKEND"] = "none"
+
+accesslog = os.getenv("ACCESS_LOG", "-") or None
+
+
+def on_starting(server):
+    from app.services.prometheus import clear_directory
+
+    clear_directory(os.environ["METRICS_MULTIPROC_DIR"])
+
+
+def post_fork(server, worker):
+    from app.db.session import dispose_engines_after_fork
+
+    dispose_engines_after_fork()
+
+
+def child_exit(server, worker):
+    from app.services.prometheus import mark_process_dead
+
+    mark_process_dead(os.environ["METRICS_MULTIPROC_DIR"], worker.pid)
@@ -0,0 +1,31 @@
+import argparse
+import sys
+
+from app.db.session import SessionLocal
+from app.services.index_advisor import audit_router_queries
+
+
+def index_advisor(verbose: bool = False):
+    db = SessionLocal()
+    try:
+        plans = audit_router_queries(db)
+    finally:
+        db.close()
+
+    for name, plan in plans.items():
+        status = f"FULL SCAN of {', '.join(plan.full_scans)}" if plan.full_scans else "ok"
+        print(f"{name}: {status}")
+        if verbose or plan.full_scans:
+            for step in plan.steps:
+                print(f"    {step}")
+    return {name: plan.full_scans for name, plan in plans.items() if plan.full_scans}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EXPLAIN every router query and report full table scans.")
+    parser.add_argument("--verbose", action="store_true", help="print the plan of every query")
+    parser.add_argument("--strict", action="store_true", help="exit with status 1 if any query does a full scan")
+    args = parser.parse_args()
+
+    full_scans = index_advisor(verbose=args.verbose)
+    if args.strict and full_scans:
+        sys.exit(1)
@@ -0,0 +1,17 @@
+from app.db.migrations import add_missing_columns, add_missing_indexes
+from app.db.session import Base, engine
+
+
+def migrate():
+    # New tables are created outright; existing tables only get the columns and indexes they lack.
+    Base.metadata.create_all(bind=engine)
+    return add_missing_columns(engine), add_missing_indexes(engine)
+
+if __name__ == "__main__":
+    print("Migrating database schema...")
+    columns, indexes = migrate()
+    for name in columns:
+        print(f"Added column {name}")
+    for name in indexes:
+        print(f"Created index {name}")
+    print(f"Database schema up to date ({len(columns)} columns, {len(indexes)} indexes added)")
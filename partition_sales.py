@@ -0,0 +1,44 @@
+import argparse
+
+from app.db.partitioning import (
+    add_partitions,
+    enable_partitioning,
+    is_partitioned,
+    list_partitions,
+    remove_partitions,
+)
+from app.db.session import engine
+from compact_sales import months_ago
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the monthly partitions of the sales table")
+    parser.add_argument("--enable", action="store_true",
+                        help="partition the sales table (MySQL: rebuilds it; SQLite: restart the app afterwards)")
+    parser.add_argument("--ahead", type=int, default=3,
+                        help="months after the current one to have partitions for")
+    parser.add_argument("--retain-months", type=int, default=None,
+                        help="take the months older than this many months out of the sales table")
+    removal = parser.add_mutually_exclusive_group()
+    removal.add_argument("--archive", dest="archive", action="store_true", default=True,
+                         help="keep removed months as sales_archive_<partition> tables (default)")
+    removal.add_argument("--drop", dest="archive", action="store_false",
+                         help="drop removed months")
+    parser.add_argument("--list", action="store_true", help="only list the partitions")
+    args = parser.parse_args()
+
+    if not args.list:
+        if args.enable:
+            print(f"Partitioning sales by month, {args.ahead} months ahead...")
+            enable_partitioning(engine, args.ahead)
+        elif not is_partitioned(engine):
+            parser.error("the sales table is not partitioned; run with --enable first")
+        else:
+            added = add_partitions(engine, args.ahead)
+            print(f"Added partitions: {', '.join(added) or 'none'}")
+        if args.retain_months is not None:
+            removed = remove_partitions(engine, months_ago(args.retain_months), args.archive)
+            print(f"{'Archived' if args.archive else 'Dropped'} partitions: {', '.join(removed) or 'none'}")
+
+    for partition in list_partitions(engine):
+        bound = f"< {partition.upper:%Y-%m-%d}" if partition.upper else "MAXVALUE"
+        print(f"{partition.name}: {bound}, {partition.rows} rows")
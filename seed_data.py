@@ -9,6 +9,7 @@ from app.models.category import Category
 from app.models.inventory import Inventory
 from app.models.product import Product
 from app.models.sale import Sale
+from app.services.rollups import rebuild_rollups
 
 fake = Faker()
 
@@ -89,6 +90,9 @@ def seed_database():
         print("\nCreating sample sales records...")
         sales = create_sample_sales(db, products)
         print(f"Created {len(sales)} sales records")
+
+        print("\nRebuilding sales rollups...")
+        rebuild_rollups(db)
         
         print("\nDatabase seeding completed successfully!")
     except Exception as e:
@@ -0,0 +1,86 @@
+import asyncio
+import inspect
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.db.session import Base, get_async_db
+from app.routers import categories, inventory, products, sales
+from app.routers.async_support import make_async_router
+from app.services.cache import response_cache
+
+
+@pytest.fixture
+def async_client(tmp_path):
+    database_path = tmp_path / "async.db"
+    sync_engine = create_engine(f"sqlite:///{database_path}")
+    Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+    response_cache.clear()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}", poolclass=NullPool)
+    AsyncTestingSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
+
+    async_app = FastAPI()
+    for router_module in (categories, products, inventory, sales):
+        async_app.include_router(make_async_router(router_module.router))
+    async_app.dependency_overrides[get_async_db] = override_get_async_db
+
+    with TestClient(async_app) as test_client:
+        yield test_client
+    asyncio.run(async_engine.dispose())
+
+def test_async_routes_are_coroutines():
+    router = make_async_router(products.router)
+    assert all(inspect.iscoroutinefunction(route.endpoint) for route in router.routes)
+    assert {route.path for route in router.routes} == {route.path for route in products.router.routes}
+
+    # Streaming responses outlive the handler and stay on the sync engine
+    export = next(route for route in make_async_router(sales.router).routes if route.path == "/sales/export")
+    assert not inspect.iscoroutinefunction(export.endpoint)
+
+def test_async_crud_and_analytics(async_client):
+    category = async_client.post("/categories/", json={"name": "Async", "description": "Async"}).json()
+    product = async_client.post(
+        "/products/",
+        json={"name": "Async Product", "price": 20.0, "category_id": category["id"]}
+    ).json()
+    assert product["id"]
+    async_client.patch(f"/inventory/{product['id']}", json={"quantity": 10})
+
+    for day in (1, 2, 3):
+        response = async_client.post(
+            "/sales/",
+            json={
+                "product_id": product["id"],
+                "quantity": 1,
+                "unit_price": 20.0,
+                "total_amount": 20.0,
+                "sale_date": datetime(2024, 4, day, 12, 0).isoformat()
+            }
+        )
+        assert response.status_code == 200
+
+    response = async_client.get("/sales/?limit=2")
+    assert len(response.json()) == 2
+    assert "X-Next-Cursor" in response.headers
+
+    revenue = async_client.get(
+        "/sales/revenue?interval=daily&start_date=2024-04-01T00:00:00&end_date=2024-04-30T00:00:00"
+    ).json()
+    assert [r["revenue"] for r in revenue if r["total_sales"]] == [20.0, 20.0, 20.0]
+
+    inventory_item = async_client.patch(f"/inventory/{product['id']}", json={"quantity": 3}).json()
+    assert inventory_item["quantity"] == 3
+    assert async_client.get(f"/products/{product['id'] + 1}").status_code == 404
+    assert async_client.get(f"/products/{product['id']}").headers["X-Cache"] == "MISS"
+    assert async_client.get(f"/products/{product['id']}").headers["X-Cache"] == "HIT"
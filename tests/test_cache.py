@@ -0,0 +1,65 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.services.cache import CachedResponse, MemoryBackend, ResponseCache, revenue_tags, sale_tags
+
+
+def entry(body: bytes) -> CachedResponse:
+    return CachedResponse(body, '"etag"', {})
+
+
+def test_memory_backend_lru_ttl_and_tags(monkeypatch):
+    backend = MemoryBackend(max_entries=2, ttl=10)
+    backend.set("a", entry(b"a"), ["product:1"])
+    backend.set("b", entry(b"b"), ["product:2"])
+    assert backend.get("a").body == b"a"  # a is now the most recently used
+    backend.set("c", entry(b"c"), ["product:2"])
+    assert backend.get("b") is None
+    assert backend.evictions == 1
+
+    assert backend.invalidate(["product:2"]) == 1
+    assert backend.get("c") is None and backend.get("a") is not None
+
+    now = time.monotonic()
+    monkeypatch.setattr("app.services.cache.time.monotonic", lambda: now + 11)
+    assert backend.get("a") is None
+    assert backend.expirations == 1
+    assert len(backend) == 0
+
+
+def test_response_cache_skips_entries_computed_across_an_invalidation():
+    cache = ResponseCache(MemoryBackend())
+    generation = cache.generation
+    cache.invalidate("product:1")
+    cache.set("key", entry(b"stale"), ["product:1"], generation)
+    assert cache.get("key") is None
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_response_cache_generation_is_shared_through_the_backend():
+    # Two workers over one shared backend: B's invalidation stops A storing a stale response
+    backend = MemoryBackend()
+    worker_a, worker_b = ResponseCache(backend), ResponseCache(backend)
+    generation = worker_a.generation
+    worker_b.invalidate("product:1")
+    assert worker_a.generation == generation + 1
+    worker_a.set("key", entry(b"stale"), ["product:1"], generation)
+    assert worker_b.get("key") is None
+
+    worker_a.set("key", entry(b"fresh"), ["product:1"], worker_a.generation)
+    assert worker_b.get("key").body == b"fresh"
+
+
+def test_revenue_tags():
+    assert revenue_tags(datetime(2023, 11, 20), datetime(2024, 2, 1)) == [
+        "sales:2023-11", "sales:2023-12", "sales:2024-01", "sales:2024-02"
+    ]
+    assert revenue_tags(None, datetime(2024, 2, 1)) == ["sales:all"]
+    assert revenue_tags(datetime(2000, 1, 1), datetime(2024, 2, 1)) == ["sales:all"]
+
+    # Aware dates are tagged with their UTC month, like the stored sales
+    tokyo = timezone(timedelta(hours=9))
+    assert sale_tags(1, datetime(2024, 3, 1, 5, tzinfo=tokyo))[1] == "sales:2024-02"
+    assert revenue_tags(datetime(2024, 3, 1, 5, tzinfo=tokyo), datetime(2024, 3, 1, 8, tzinfo=tokyo)) == [
+        "sales:2024-02"
+    ]
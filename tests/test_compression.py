@@ -0,0 +1,15 @@
+from app.middleware import compression
+from app.middleware.compression import choose_encoding
+
+
+def test_choose_encoding(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert choose_encoding("gzip, deflate, br") == "gzip"
+    assert choose_encoding("identity") is None
+    assert choose_encoding("") is None
+    assert choose_encoding("gzip;q=0, *") is None
+
+    monkeypatch.setattr(compression, "brotli", object())
+    assert choose_encoding("gzip, deflate, br") == "br"
+    assert choose_encoding("br;q=0.5, gzip") == "gzip"
+    assert choose_encoding("*") == "br"
@@ -1,13 +1,23 @@
+import asyncio
+import json
 from datetime import datetime, timedelta
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from app.db.session import Base, get_db
 from app.main import app
+from app.models.product import Product
+from app.models.sale import Sale
+from app.routers import health, sales
+from app.services import cold_storage, columnar, fast_json, readiness
+from app.services.cold_storage import ColdSales, compact_sales
+from app.services.columnar import ColumnarSales
+from app.services.cache import response_cache
+from app.services.query_audit import query_auditor
 
 # Create in-memory SQLite database for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
@@ -29,12 +39,44 @@ def override_get_db():
 app.dependency_overrides[get_db] = override_get_db
 
 @pytest.fixture
-def client():
+def query_audit():
+    """Audits the SQL of every request; the test fails when an endpoint goes over its
+    ``query_budget`` or repeats a statement (N+1)."""
+    query_auditor.enabled, query_auditor.reports = True, []
+    yield query_auditor
+    query_auditor.enabled = False
+    violations = [
+        f"{report.request}: {violation}" for report in query_auditor.reports for violation in report.violations
+    ]
+    assert not violations, "\n".join(violations)
+
+@pytest.fixture
+def client(query_audit):
     Base.metadata.create_all(bind=engine)
+    response_cache.clear()
     with TestClient(app) as test_client:
         yield test_client
     Base.metadata.drop_all(bind=engine)
 
+@pytest.fixture
+def query_counter():
+    """Records the SQL statements executed and the ORM instances hydrated."""
+    counter = {"statements": [], "loaded": 0}
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        # Not the query auditor's EXPLAINs
+        if not statement.startswith("EXPLAIN"):
+            counter["statements"].append(statement)
+
+    def count_load(target, context):
+        counter["loaded"] += 1
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    event.listen(Base, "load", count_load, propagate=True)
+    yield counter
+    event.remove(engine, "before_cursor_execute", count_statement)
+    event.remove(Base, "load", count_load)
+
 @pytest.fixture
 def test_category(client):
     response = client.post(
@@ -54,7 +96,9 @@ def test_product(client, test_category):
             "category_id": test_category["id"]
         }
     )
-    return response.json()
+    product = response.json()
+    client.patch(f"/inventory/{product['id']}", json={"quantity": 1000})
+    return product
 
 # Product Endpoints Tests
 def test_create_product(client, test_category):
@@ -204,4 +248,770 @@ def test_compare_revenue(client, test_product):
     data = response.json()
     assert data["current_period"]["revenue"] > 0
     assert data["previous_period"]["revenue"] > 0
-    assert "percentage_change" in data 
\ No newline at end of file
+    assert "percentage_change" in data 
+
+
+def test_revenue_combines_rollups_and_edge_buckets(client, test_product):
+    sale_dates = [
+        datetime(2024, 1, 20, 12, 0),  # partial leading month
+        datetime(2024, 2, 10, 9, 30),  # full month, served from rollup
+        datetime(2024, 2, 28, 23, 0),  # full month, served from rollup
+        datetime(2024, 3, 5, 8, 0),    # partial trailing month
+        datetime(2024, 3, 25, 8, 0),   # after end_date, excluded
+    ]
+    for sale_date in sale_dates:
+        client.post(
+            "/sales/",
+            json={
+                "product_id": test_product["id"],
+                "quantity": 1,
+                "unit_price": 10.0,
+                "total_amount": 10.0,
+                "sale_date": sale_date.isoformat()
+            }
+        )
+
+    response = client.get(
+        "/sales/revenue?interval=monthly&start_date=2024-01-15T00:00:00&end_date=2024-03-10T00:00:00"
+    )
+    assert response.status_code == 200
+    assert response.json() == [
+        {"interval": "2024-01", "bucket_start": "2024-01-01T00:00:00Z", "revenue": 10.0, "total_sales": 1},
+        {"interval": "2024-02", "bucket_start": "2024-02-01T00:00:00Z", "revenue": 20.0, "total_sales": 2},
+        {"interval": "2024-03", "bucket_start": "2024-03-01T00:00:00Z", "revenue": 10.0, "total_sales": 1},
+    ]
+
+def test_revenue_series_is_dense_and_timezone_aware(client, test_product, query_counter):
+    sale_dates = [
+        "2024-03-09T12:00:00",  # Saturday
+        "2024-03-11T03:00:00",  # Sunday 23:00 in New York, Monday in UTC
+        "2024-03-11T05:00:00",  # Monday 01:00 in New York
+    ]
+    for sale_date in sale_dates:
+        client.post(
+            "/sales/",
+            json={
+                "product_id": test_product["id"],
+                "quantity": 1,
+                "unit_price": 10.0,
+                "total_amount": 10.0,
+                "sale_date": sale_date
+            }
+        )
+
+    window = "start_date=2024-03-08T00:00:00&end_date=2024-03-12T23:59:59"
+    utc = client.get(f"/sales/revenue?interval=daily&{window}").json()
+    assert [(r["bucket_start"], r["total_sales"]) for r in utc] == [
+        ("2024-03-08T00:00:00Z", 0),
+        ("2024-03-09T00:00:00Z", 1),
+        ("2024-03-10T00:00:00Z", 0),
+        ("2024-03-11T00:00:00Z", 2),
+        ("2024-03-12T00:00:00Z", 0),
+    ]
+
+    # Daylight saving starts on 2024-03-10 in New York: local midnights are 5h, then 4h behind UTC
+    query_counter["statements"].clear()
+    local = client.get(f"/sales/revenue?interval=daily&{window}&tz=America/New_York").json()
+    assert len(query_counter["statements"]) == 1
+    assert [(r["bucket_start"], r["total_sales"]) for r in local] == [
+        ("2024-03-08T00:00:00-05:00", 0),
+        ("2024-03-09T00:00:00-05:00", 1),
+        ("2024-03-10T00:00:00-05:00", 1),
+        ("2024-03-11T00:00:00-04:00", 1),
+        ("2024-03-12T00:00:00-04:00", 0),
+    ]
+
+    weekly = client.get(f"/sales/revenue?interval=weekly&{window}&tz=America/New_York").json()
+    assert [(r["interval"], r["bucket_start"], r["total_sales"]) for r in weekly] == [
+        ("2024-W10", "2024-03-04T00:00:00-05:00", 2),
+        ("2024-W11", "2024-03-11T00:00:00-04:00", 1),
+    ]
+
+    assert client.get("/sales/revenue?interval=daily&tz=Mars/Olympus").status_code == 400
+
+def test_revenue_series_rejects_too_many_buckets(client, query_counter):
+    window = "start_date=1900-01-01T00:00:00&end_date=2024-01-01T00:00:00&tz=Europe/Paris"
+    query_counter["statements"].clear()
+    response = client.get(f"/sales/revenue?interval=daily&{window}")
+    assert response.status_code == 400
+    assert "more than 5000 daily buckets" in response.json()["detail"]
+    assert query_counter["statements"] == []
+
+    assert len(client.get(f"/sales/revenue?interval=yearly&{window}").json()) == 125
+
+def test_sale_dates_with_an_offset_are_stored_in_utc(client, test_product):
+    sale = {
+        "product_id": test_product["id"],
+        "quantity": 1,
+        "unit_price": 10.0,
+        "total_amount": 10.0,
+        "sale_date": "2024-03-11T01:30:00+05:00"
+    }
+    window = "start_date=2024-02-01T00:00:00&end_date=2024-03-31T00:00:00"
+    assert client.get(f"/sales/revenue?interval=daily&{window}").json()[38]["total_sales"] == 0
+
+    created = client.post("/sales/", json=sale).json()
+    assert created["sale_date"] == "2024-03-10T20:30:00"
+    assert client.post("/sales/bulk", json=[{**sale, "sale_date": "2024-03-01T02:00:00+05:00"}]).json()["inserted"] == 1
+
+    # The cached February/March revenue was invalidated by the UTC months of the sales
+    revenue = client.get(f"/sales/revenue?interval=daily&{window}").json()
+    assert [(r["interval"], r["total_sales"]) for r in revenue if r["total_sales"]] == [
+        ("2024-02-29", 1), ("2024-03-10", 1)
+    ]
+    sales = client.get("/sales/?start_date=2024-02-29T00:00:00&end_date=2024-03-11T00:00:00").json()
+    assert sorted(s["sale_date"] for s in sales) == ["2024-02-29T21:00:00", "2024-03-10T20:30:00"]
+
+def test_compare_revenue_reports_order_metrics(client, test_product):
+    for quantity, sale_date in [(1, "2024-03-02T10:00:00"), (3, "2024-03-05T10:00:00"), (2, "2024-02-25T10:00:00")]:
+        client.post(
+            "/sales/",
+            json={
+                "product_id": test_product["id"],
+                "quantity": quantity,
+                "unit_price": 10.0,
+                "total_amount": 10.0 * quantity,
+                "sale_date": sale_date
+            }
+        )
+
+    response = client.get(
+        "/sales/compare?current_start=2024-03-01T00:00:00&current_end=2024-03-07T23:59:59"
+        "&previous_start=2024-02-23T00:00:00&previous_end=2024-02-29T23:59:59"
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["current_period"]["revenue"] == 40.0
+    assert data["current_period"]["total_sales"] == 2
+    assert data["current_period"]["units_sold"] == 4
+    assert data["current_period"]["average_order_value"] == 20.0
+    assert data["previous_period"]["revenue"] == 20.0
+    assert data["percentage_change"] == 100.0
+
+    # A start with an offset and a naive (UTC) end
+    response = client.get(
+        "/sales/compare?current_start=2024-03-01T02:00:00%2B02:00&current_end=2024-03-07T23:59:59"
+    )
+    assert response.status_code == 200
+    assert response.json()["current_period"]["total_sales"] == 2
+
+def test_compare_revenue_periods_single_query(client, test_product, query_counter):
+    for sale_date in ["2024-05-07T10:00:00", "2024-05-14T10:00:00", "2024-05-15T10:00:00", "2024-05-22T10:00:00"]:
+        client.post(
+            "/sales/",
+            json={
+                "product_id": test_product["id"],
+                "quantity": 1,
+                "unit_price": 10.0,
+                "total_amount": 10.0,
+                "sale_date": sale_date
+            }
+        )
+
+    query_counter["statements"].clear()
+    response = client.get("/sales/compare/periods?interval=weekly&count=4&end_date=2024-05-26T12:00:00")
+
+    assert response.status_code == 200
+    assert len(query_counter["statements"]) == 1
+    periods = response.json()["periods"]
+    assert [p["start_date"] for p in periods] == [
+        "2024-04-29T00:00:00", "2024-05-06T00:00:00", "2024-05-13T00:00:00", "2024-05-20T00:00:00"
+    ]
+    assert [p["total_sales"] for p in periods] == [0, 1, 2, 1]
+    assert periods[0]["percentage_change"] is None
+    assert periods[2]["percentage_change"] == 100.0
+
+    response = client.get(
+        "/sales/compare/periods?period=2024-05-01T00:00:00/2024-05-14T23:59:59"
+        "&period=2024-05-14T00:00:00/2024-05-31T00:00:00"
+    )
+    assert response.status_code == 200
+    assert [p["total_sales"] for p in response.json()["periods"]] == [2, 3]
+
+    # One side with an offset, the other naive (UTC)
+    response = client.get("/sales/compare/periods?period=2024-05-14T02:00:00%2B02:00/2024-05-31T00:00:00")
+    assert response.status_code == 200
+    assert response.json()["periods"][0]["total_sales"] == 3
+
+    assert client.get("/sales/compare/periods").status_code == 400
+    assert client.get("/sales/compare/periods?period=not-a-period").status_code == 400
+
+def test_list_sales_cursor_pagination(client, test_product):
+    base_date = datetime(2024, 6, 1, 12, 0)
+    for i in range(5):
+        client.post(
+            "/sales/",
+            json={
+                "product_id": test_product["id"],
+                "quantity": 1,
+                "unit_price": 10.0,
+                "total_amount": 10.0,
+                # Two sales share each timestamp so the id tie-breaker is exercised
+                "sale_date": (base_date + timedelta(hours=i // 2)).isoformat()
+            }
+        )
+
+    offset_ids = [s["id"] for s in client.get("/sales/?limit=5").json()]
+
+    cursor_ids = []
+    response = client.get("/sales/?limit=2&cursor=")
+    while True:
+        assert response.status_code == 200
+        cursor_ids.extend(s["id"] for s in response.json())
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if not next_cursor:
+            break
+        response = client.get(f"/sales/?limit=2&cursor={next_cursor}")
+
+    assert cursor_ids == offset_ids
+    assert len(set(cursor_ids)) == 5
+
+    response = client.get("/sales/?limit=2&skip=2")
+    assert [s["id"] for s in response.json()] == offset_ids[2:4]
+    assert "X-Next-Cursor" in response.headers
+
+    assert client.get("/sales/?cursor=garbage").status_code == 400
+
+def test_list_products_cursor_pagination(client, test_category):
+    for i in range(3):
+        client.post(
+            "/products/",
+            json={"name": f"Product {i}", "price": 10.0, "category_id": test_category["id"]}
+        )
+
+    first_page = client.get("/products/?limit=2&cursor=")
+    second_page = client.get(f"/products/?limit=2&cursor={first_page.headers['X-Next-Cursor']}")
+
+    assert [p["name"] for p in first_page.json()] == ["Product 0", "Product 1"]
+    assert [p["name"] for p in second_page.json()] == ["Product 2"]
+    assert "X-Next-Cursor" not in second_page.headers
+
+def test_read_endpoints_do_not_load_relationships(client, test_product, query_counter):
+    for i in range(20):
+        client.post(
+            "/sales/",
+            json={
+                "product_id": test_product["id"],
+                "quantity": 1,
+                "unit_price": 99.99,
+                "total_amount": 99.99,
+                "sale_date": datetime(2024, 1, 1 + i).isoformat()
+            }
+        )
+
+    urls = [
+        f"/products/{test_product['id']}",
+        "/products/",
+        f"/categories/{test_product['category_id']}",
+        "/categories/",
+        "/inventory/",
+        "/inventory/low-stock",
+        "/sales/?limit=5",
+    ]
+    for url in urls:
+        query_counter["statements"].clear()
+        response = client.get(url)
+        assert response.status_code == 200, url
+        assert len(query_counter["statements"]) == 1, (url, query_counter["statements"])
+        assert "JOIN" not in query_counter["statements"][0], url
+
+    # Loading products through the ORM hydrates only the products, not their relationships
+    query_counter["statements"].clear()
+    query_counter["loaded"] = 0
+    with TestingSessionLocal() as db:
+        products = db.query(Product).all()
+        assert query_counter["loaded"] == len(products) == 1
+        assert {"category", "inventory", "sales"} <= inspect(products[0]).unloaded
+    assert len(query_counter["statements"]) == 1
+    assert "JOIN" not in query_counter["statements"][0]
+
+def test_read_endpoints_build_no_orm_objects(client, test_product, query_counter):
+    client.post(
+        "/sales/",
+        json={
+            "product_id": test_product["id"],
+            "quantity": 1,
+            "unit_price": 99.99,
+            "total_amount": 99.99,
+            "sale_date": "2024-01-01T00:00:00"
+        }
+    )
+
+    # Read endpoints select plain columns
+    urls = [
+        f"/products/{test_product['id']}",
+        "/products/",
+        f"/categories/{test_product['category_id']}",
+        "/categories/",
+        "/inventory/",
+        "/inventory/low-stock",
+        "/sales/?limit=5",
+    ]
+    for url in urls:
+        query_counter["loaded"] = 0
+        assert client.get(url).status_code == 200, url
+        assert query_counter["loaded"] == 0, url
+
+def test_db_pool_metrics(client):
+    response = client.get("/metrics/db-pool")
+    assert response.status_code == 200
+    primary = response.json()["primary"]
+    assert primary["pool_class"] == "InstrumentedQueuePool"
+    assert "+Inf" in primary["checkout_wait_ms"]["buckets"]
+
+def test_prometheus_metrics(client, test_category):
+    response = client.get(f"/categories/{test_category['id']}")
+    assert 'db;dur=' in response.headers["Server-Timing"]
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_request_duration_ms_count{method="GET",route="/categories/{category_id}"}' in response.text
+    assert 'db_pool_checkout_wait_ms_bucket{pool="primary",le="+Inf"}' in response.text
+
+def test_health_live_and_ready(client, monkeypatch):
+    state = readiness.Readiness()
+    monkeypatch.setattr(health, "readiness", state)
+    monkeypatch.setattr(readiness, "STARTUP_RETRY_DELAY", 0.01)
+    assert client.get("/health/live").json() == {"status": "alive"}
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "starting"
+
+    # The first attempt fails as if the database were still starting
+    prepare = state._prepare_database
+    def flaky_prepare(*args):
+        if state.attempts == 1:
+            raise ConnectionError("database starting")
+        prepare(*args)
+    monkeypatch.setattr(state, "_prepare_database", flaky_prepare)
+    asyncio.run(state.initialize(engine, create_schema=False))
+
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready"
+    assert body["database_attempts"] == 2 and body["last_error"] is None
+    assert body["schema_status"] == "skipped"
+    assert body["pool_warmed"] == body["pool_target"] == 1
+
+def test_create_sales_bulk_reports_row_errors(client, test_product):
+    sale = {
+        "product_id": test_product["id"],
+        "quantity": 2,
+        "unit_price": 10.0,
+        "total_amount": 20.0,
+        "sale_date": "2024-08-01T10:00:00"
+    }
+    payload = [
+        sale,
+        {**sale, "quantity": 0},
+        {**sale, "product_id": 9999},
+        {**sale, "sale_date": "2024-08-02T10:00:00"},
+        {**sale, "sale_date": "2024-08-02T11:00:00"},
+    ]
+    response = client.post("/sales/bulk?chunk_size=2", json=payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["received"], data["inserted"], data["failed"]) == (5, 3, 2)
+    assert [e["index"] for e in data["errors"]] == [1, 2]
+    assert "quantity" in data["errors"][0]["error"]
+
+    revenue = client.get(
+        "/sales/revenue?interval=daily&start_date=2024-07-01T00:00:00&end_date=2024-09-01T00:00:00"
+    ).json()
+    assert [(r["interval"], r["total_sales"]) for r in revenue if r["total_sales"]] == [
+        ("2024-08-01", 1), ("2024-08-02", 2)
+    ]
+
+def test_create_sales_bulk_ndjson(client, test_product):
+    sale = {
+        "product_id": test_product["id"],
+        "quantity": 1,
+        "unit_price": 10.0,
+        "total_amount": 10.0,
+        "sale_date": "2024-08-01T10:00:00"
+    }
+    body = "\n".join([json.dumps(sale), "{not json", json.dumps(sale)]) + "\n"
+    response = client.post(
+        "/sales/bulk",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["received"], data["inserted"], data["failed"]) == (3, 2, 1)
+    assert data["errors"][0]["index"] == 1
+
+    assert client.post("/sales/bulk", json={"not": "a list"}).status_code == 400
+
+def test_create_sale_decrements_stock(client, test_product):
+    client.patch(f"/inventory/{test_product['id']}", json={"quantity": 3})
+    sale = {
+        "product_id": test_product["id"],
+        "quantity": 2,
+        "unit_price": 10.0,
+        "total_amount": 20.0,
+        "sale_date": "2024-08-01T10:00:00"
+    }
+    assert client.post("/sales/", json=sale).status_code == 200
+
+    response = client.post("/sales/", json=sale)
+    assert response.status_code == 409
+    assert client.get("/inventory/").json()[0]["quantity"] == 1
+    assert len(client.get("/sales/").json()) == 1
+
+    assert client.post("/sales/", json={**sale, "product_id": 9999}).status_code == 404
+
+def test_create_sales_bulk_rejects_rows_without_stock(client, test_product):
+    client.patch(f"/inventory/{test_product['id']}", json={"quantity": 5})
+    sale = {
+        "product_id": test_product["id"],
+        "quantity": 2,
+        "unit_price": 10.0,
+        "total_amount": 20.0,
+        "sale_date": "2024-08-01T10:00:00"
+    }
+    response = client.post("/sales/bulk", json=[sale, sale, sale, {**sale, "quantity": 1}])
+    data = response.json()
+    assert (data["inserted"], data["failed"]) == (3, 1)
+    assert data["errors"][0]["index"] == 2
+    assert "stock" in data["errors"][0]["error"]
+    assert client.get("/inventory/").json()[0]["quantity"] == 0
+
+def test_export_sales_streams_filtered_rows(client, test_product):
+    for day in (1, 2, 3):
+        client.post(
+            "/sales/",
+            json={
+                "product_id": test_product["id"],
+                "quantity": day,
+                "unit_price": 10.0,
+                "total_amount": 10.0 * day,
+                "sale_date": datetime(2024, 9, day, 12, 0).isoformat()
+            }
+        )
+
+    response = client.get("/sales/export?min_amount=15")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.splitlines()
+    assert lines[0].split(",")[:3] == ["id", "product_id", "quantity"]
+    assert [line.split(",")[2] for line in lines[1:]] == ["3", "2"]
+
+    response = client.get("/sales/export?format=ndjson&start_date=2024-09-02T00:00:00")
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["sale_date"] for row in rows] == ["2024-09-03T12:00:00", "2024-09-02T12:00:00"]
+
+    assert client.get("/sales/export?format=xml").status_code == 422
+    assert client.get("/sales/?limit=100000").status_code == 422
+
+def test_read_cache_hits_and_invalidation(client, test_product, query_counter):
+    url = f"/products/{test_product['id']}"
+    first = client.get(url)
+    assert first.headers["X-Cache"] == "MISS"
+    query_counter["statements"].clear()
+    second = client.get(url)
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+    assert query_counter["statements"] == []
+
+    revalidated = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == first.headers["ETag"]
+
+    client.get("/categories/")
+    assert client.get("/categories/").headers["X-Cache"] == "HIT"
+    client.post("/categories/", json={"name": "Second", "description": "Second"})
+    categories = client.get("/categories/")
+    assert categories.headers["X-Cache"] == "MISS"
+    assert len(categories.json()) == 2
+
+    # A sale only invalidates revenue ranges that contain it
+    march = "/sales/revenue?interval=daily&start_date=2024-03-01T00:00:00&end_date=2024-03-31T00:00:00"
+    may = "/sales/revenue?interval=daily&end_date=2024-05-31T00:00:00&start_date=2024-05-01T00:00:00"
+    client.get(march)
+    client.get(may)
+    client.post(
+        "/sales/",
+        json={
+            "product_id": test_product["id"],
+            "quantity": 1,
+            "unit_price": 10.0,
+            "total_amount": 10.0,
+            "sale_date": "2024-03-15T12:00:00"
+        }
+    )
+    assert client.get(march).headers["X-Cache"] == "MISS"
+    assert client.get(march).json()[14]["revenue"] == 10.0
+    assert client.get(may).headers["X-Cache"] == "HIT"
+    assert client.get(url).headers["X-Cache"] == "MISS"
+
+    stats = client.get("/metrics/cache").json()
+    assert stats["backend"] == "MemoryBackend"
+    assert stats["hits"] >= 3 and stats["not_modified"] == 1
+
+def test_fast_json_matches_validated_responses(client, test_product, monkeypatch):
+    client.post(
+        "/sales/",
+        json={
+            "product_id": test_product["id"],
+            "quantity": 2,
+            "unit_price": 12.5,
+            "total_amount": 25.0,
+            "sale_date": "2024-10-01T08:30:00.250000"
+        }
+    )
+    urls = ["/products/", "/inventory/", "/sales/?limit=1"]
+    fast = {url: client.get(url) for url in urls}
+    monkeypatch.setattr(fast_json, "RESPONSE_MODE", "validated")
+    for url in urls:
+        validated = client.get(url)
+        assert validated.content == fast[url].content, url
+        assert validated.headers.get("X-Next-Cursor") == fast[url].headers.get("X-Next-Cursor")
+    assert "X-Next-Cursor" in fast["/sales/?limit=1"].headers
+
+def test_sparse_fieldsets_narrow_the_select(client, test_product, query_counter):
+    for i in range(3):
+        client.post(
+            "/products/",
+            json={"name": f"Grid {i}", "description": "x" * 500, "price": 5.0 + i, "category_id": test_product["category_id"]}
+        )
+
+    query_counter["statements"].clear()
+    response = client.get("/products/?fields=price,name&limit=2")
+    assert response.json() == [{"name": "Test Product", "price": 99.99}, {"name": "Grid 0", "price": 5.0}]
+    assert "description" not in query_counter["statements"][0]
+    assert "created_at" not in query_counter["statements"][0]
+
+    # The cursor still works although id was not requested
+    next_page = client.get(f"/products/?fields=name&limit=2&cursor={response.headers['X-Next-Cursor']}")
+    assert next_page.json() == [{"name": "Grid 1"}, {"name": "Grid 2"}]
+
+    assert client.get(f"/products/{test_product['id']}?fields=id,price").json() == {"id": test_product["id"], "price": 99.99}
+    assert client.get("/sales/?fields=quantity,sale_date").status_code == 200
+    response = client.get("/products/?fields=name,secret")
+    assert response.status_code == 400
+    assert "secret" in response.json()["detail"]
+
+def test_responses_are_compressed_when_accepted(client, test_product):
+    for i in range(20):
+        client.post("/categories/", json={"name": f"Category {i}", "description": "Compressible " * 5})
+
+    response = client.get("/categories/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.headers["ETag"].startswith("W/")
+    assert len(response.json()) == 21
+
+    response = client.get("/categories/", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in response.headers
+
+    response = client.get("/sales/export", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.text.startswith("id,product_id")
+
+def test_top_products_and_revenue_by_category(client, test_product):
+    other_category = client.post("/categories/", json={"name": "Other", "description": "Other"}).json()
+    other = client.post(
+        "/products/",
+        json={"name": "Other Product", "price": 5.0, "category_id": other_category["id"]}
+    ).json()
+    client.patch(f"/inventory/{other['id']}", json={"quantity": 1000})
+
+    sales = [
+        (test_product["id"], 1, 50.0, datetime(2024, 1, 20, 12, 0)),
+        (other["id"], 10, 60.0, datetime(2024, 1, 31, 23, 0)),
+        (test_product["id"], 2, 100.0, datetime(2024, 2, 15, 9, 0)),
+        (other["id"], 4, 20.0, datetime(2024, 2, 16, 9, 0)),
+        (other["id"], 1, 5.0, datetime(2024, 3, 2, 9, 0)),
+        (test_product["id"], 1, 50.0, datetime(2024, 4, 1, 0, 0)),  # after end_date
+    ]
+    for product_id, quantity, total_amount, sale_date in sales:
+        client.post(
+            "/sales/",
+            json={
+                "product_id": product_id,
+                "quantity": quantity,
+                "unit_price": total_amount / quantity,
+                "total_amount": total_amount,
+                "sale_date": sale_date.isoformat()
+            }
+        )
+
+    window = "start_date=2024-01-15T00:00:00&end_date=2024-03-31T23:59:59"
+    top = client.get(f"/sales/top-products?{window}").json()
+    assert [(p["rank"], p["product_name"], p["revenue"], p["quantity"], p["total_sales"]) for p in top] == [
+        (1, "Test Product", 150.0, 3, 2),
+        (2, "Other Product", 85.0, 15, 3),
+    ]
+    assert top[0]["interval"] is None
+    top = client.get(f"/sales/top-products?{window}&order_by=quantity&limit=1").json()
+    assert [p["product_id"] for p in top] == [other["id"]]
+    top = client.get(f"/sales/top-products?{window}&category_id={other_category['id']}").json()
+    assert [p["product_id"] for p in top] == [other["id"]]
+
+    monthly = client.get(f"/sales/top-products?{window}&interval=monthly&limit=1").json()
+    assert [(p["interval"], p["product_name"]) for p in monthly] == [
+        ("2024-01", "Other Product"), ("2024-02", "Test Product"), ("2024-03", "Other Product")
+    ]
+
+    categories = client.get(f"/sales/revenue-by-category?{window}").json()
+    assert [(c["category_name"], c["revenue"], c["total_sales"]) for c in categories] == [
+        ("Test Category", 150.0, 2), ("Other", 85.0, 3)
+    ]
+    monthly = client.get(f"/sales/revenue-by-category?{window}&interval=monthly").json()
+    assert [(c["interval"], c["category_name"], c["revenue"]) for c in monthly] == [
+        ("2024-01", "Other", 60.0), ("2024-01", "Test Category", 50.0),
+        ("2024-02", "Test Category", 100.0), ("2024-02", "Other", 20.0),
+        ("2024-03", "Other", 5.0),
+    ]
+
+    # A start with an offset and a naive end: both taken as UTC, like stored sale dates
+    mixed = "start_date=2024-01-15T02:00:00%2B02:00&end_date=2024-03-31T23:59:59"
+    for path in ("top-products?", "top-products?interval=monthly&", "revenue-by-category?"):
+        response = client.get(f"/sales/{path}{mixed}")
+        assert response.status_code == 200
+        assert response.json() == client.get(f"/sales/{path}{window}").json()
+
+def normalized(value):
+    """Round floats so results summed in a different order compare equal."""
+    if isinstance(value, dict):
+        return {key: normalized(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [normalized(item) for item in value]
+    return round(value, 6) if isinstance(value, float) else value
+
+@pytest.mark.skipif(columnar.np is None, reason="the columnar engine needs numpy")
+def test_columnar_engine_matches_sql(client, test_product, monkeypatch):
+    other = client.post(
+        "/products/",
+        json={"name": "Other Product", "price": 5.0, "category_id": test_product["category_id"]}
+    ).json()
+    client.patch(f"/inventory/{other['id']}", json={"quantity": 1000})
+    origin = datetime(2024, 1, 1)
+    for i in range(60):
+        client.post(
+            "/sales/",
+            json={
+                "product_id": (test_product, other)[i % 3 == 0]["id"],
+                "quantity": i % 4 + 1,
+                "unit_price": 1.1,
+                "total_amount": round(1.1 * (i % 4 + 1) + i / 7, 2),
+                "sale_date": (origin + timedelta(hours=i * 37, minutes=i)).isoformat()
+            }
+        )
+
+    store = ColumnarSales()
+    store.load(engine)
+    monkeypatch.setattr(columnar, "columnar_sales", store)
+    monkeypatch.setattr(sales, "columnar_sales", store)
+
+    window = "start_date=2024-01-03T10:00:00&end_date=2024-03-20T12:00:00"
+    queries = [
+        f"/sales/revenue?interval=daily&{window}",
+        f"/sales/revenue?interval=weekly&{window}&tz=America/New_York",
+        f"/sales/revenue?interval=monthly&{window}&tz=Asia/Kolkata",
+        f"/sales/top-products?{window}",
+        f"/sales/top-products?{window}&interval=weekly&limit=1&order_by=quantity",
+        f"/sales/top-products?{window}&category_id={test_product['category_id']}",
+        "/sales/compare?current_start=2024-02-01T00:00:00&current_end=2024-02-29T23:59:59",
+        "/sales/compare/periods?interval=monthly&count=3&end_date=2024-03-15T00:00:00",
+    ]
+
+    def check():
+        for query in queries:
+            expected = client.get(f"{query}&engine=sql")
+            actual = client.get(f"{query}&engine=columnar")
+            assert expected.headers["X-Analytics-Engine"] == "sql"
+            assert actual.headers["X-Analytics-Engine"] == "columnar"
+            assert normalized(actual.json()) == normalized(expected.json()), query
+    check()
+
+    # Refreshes merge committed sales; rolled back ones are not there to merge
+    sale = {"product_id": other["id"], "quantity": 2, "unit_price": 2.0, "total_amount": 4.0}
+    client.post("/sales/", json={**sale, "sale_date": "2024-02-10T08:00:00"})
+    client.post("/sales/bulk", json=[{**sale, "sale_date": "2024-01-05T08:00:00"}] * 3)
+    client.post("/sales/", json={**sale, "quantity": 10**6, "sale_date": "2024-02-11T08:00:00"})
+    assert store.refresh(engine) == 4
+    assert len(store) == 64
+    check()
+
+    # Sales written by other processes, including ids that commit after higher ones
+    with TestingSessionLocal() as db:
+        for sale_id in (200, 150):
+            db.add(Sale(id=sale_id, sale_date=datetime(2024, 2, 20), **sale))
+            db.commit()
+            assert store.refresh(engine) == 1
+    assert store.refresh(engine) == 0
+    assert len(store) == 66
+    check()
+
+@pytest.mark.skipif(cold_storage.np is None, reason="cold storage needs numpy")
+def test_cold_storage_matches_sales_table(client, test_product, tmp_path, monkeypatch):
+    origin = datetime(2024, 1, 1)
+    sale = {"product_id": test_product["id"], "unit_price": 1.5}
+    for i in range(40):
+        client.post("/sales/", json={
+            **sale,
+            "quantity": i % 3 + 1,
+            "total_amount": round(1.5 * (i % 3 + 1) + i / 9, 2),
+            "sale_date": (origin + timedelta(hours=i * 61, minutes=i)).isoformat()
+        })
+
+    queries = [
+        "/sales/revenue?interval=daily&start_date=2024-01-03T10:00:00&end_date=2024-04-20T12:00:00"
+        "&tz=America/New_York",
+        "/sales/revenue?interval=monthly&start_date=2024-01-01T00:00:00&end_date=2024-04-30T00:00:00"
+        "&tz=Asia/Kolkata",
+        "/sales/compare?current_start=2024-02-10T00:00:00&current_end=2024-03-10T12:00:00",
+        "/sales/compare/periods?interval=monthly&count=4&end_date=2024-04-15T00:00:00",
+    ]
+
+    def responses():
+        response_cache.clear()
+        return [normalized(client.get(query).json()) for query in queries]
+
+    expected = responses()
+    store = ColdSales(str(tmp_path))
+    monkeypatch.setattr(cold_storage, "cold_sales", store)
+    db = TestingSessionLocal()
+    try:
+        months = compact_sales(db, datetime(2024, 3, 15), str(tmp_path))
+    finally:
+        db.close()
+    assert list(months) == ["2024-01", "2024-02"]
+    assert store.refresh() and store.cutoff == datetime(2024, 3, 1)
+    assert responses() == expected
+
+    # A back-dated sale recorded after compaction is read from the table, once
+    client.post("/sales/", json={
+        **sale, "quantity": 1, "total_amount": 100.0, "sale_date": "2024-02-20T08:00:00"
+    })
+    compare = client.get(queries[2]).json()
+    assert compare["current_period"]["total_sales"] == expected[2]["current_period"]["total_sales"] + 1
+    assert compare["current_period"]["revenue"] == pytest.approx(expected[2]["current_period"]["revenue"] + 100)
+
+    # A new compaction replaces the snapshot and is picked up by the next query
+    db = TestingSessionLocal()
+    try:
+        compact_sales(db, datetime(2024, 4, 1), str(tmp_path))
+    finally:
+        db.close()
+    assert store.refresh() and store.cutoff == datetime(2024, 4, 1)
+    assert len(list(tmp_path.glob("snapshot-*"))) == 1
+    assert normalized(client.get(queries[2]).json()) == normalized(compare)
+
+    # A back-dated sale whose id was allocated before the compaction but committed after
+    # it (below the highest id) is still read from the table: the snapshot stops before it
+    row = {"product_id": test_product["id"], "quantity": 1, "unit_price": 1.5}
+    with TestingSessionLocal() as db:
+        db.add(Sale(id=1000, total_amount=1.5, sale_date=datetime(2024, 4, 10), **row))
+        db.commit()
+        compact_sales(db, datetime(2024, 4, 1), str(tmp_path))
+        db.add(Sale(id=900, total_amount=50.0, sale_date=datetime(2024, 2, 21), **row))
+        db.commit()
+    assert store.refresh() and store.manifest["max_sale_id"] < 900
+    late = client.get(queries[2]).json()
+    assert late["current_period"]["total_sales"] == compare["current_period"]["total_sales"] + 1
+    assert late["current_period"]["revenue"] == pytest.approx(compare["current_period"]["revenue"] + 50)
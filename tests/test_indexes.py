@@ -0,0 +1,63 @@
+import pytest
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.migrations import add_missing_columns, add_missing_indexes, missing_columns, missing_indexes
+from app.db.session import Base
+from app.services.index_advisor import audit_router_queries
+
+# Create in-memory SQLite database for testing
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+def test_sale_indexes_declared(db_session):
+    indexes = {index["name"]: index["column_names"] for index in inspect(engine).get_indexes("sales")}
+    assert indexes["ix_sales_sale_date"] == ["sale_date"]
+    assert indexes["ix_sales_product_id_sale_date"] == ["product_id", "sale_date"]
+    assert indexes["ix_sales_total_amount"] == ["total_amount"]
+
+def test_sales_queries_avoid_full_scans(db_session):
+    plans = audit_router_queries(db_session)
+    for name, plan in plans.items():
+        if name.startswith(("list_sales", "get_revenue_by_interval", "compare_revenue")):
+            assert plan.full_scans == [], f"{name}: {plan.steps}"
+    assert plans["list_low_stock"].full_scans == []
+
+def test_add_missing_indexes(db_session):
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_sales_total_amount")
+    assert [index.name for index in missing_indexes(engine)] == ["ix_sales_total_amount"]
+
+    assert add_missing_indexes(engine) == ["ix_sales_total_amount"]
+    assert missing_indexes(engine) == []
+
+def test_add_missing_generated_column(db_session):
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_inventory_is_low_stock")
+        conn.exec_driver_sql("ALTER TABLE inventory DROP COLUMN is_low_stock")
+    assert [column.name for column in missing_columns(engine)] == ["is_low_stock"]
+
+    assert add_missing_columns(engine) == ["inventory.is_low_stock"]
+    assert add_missing_indexes(engine) == ["ix_inventory_is_low_stock"]
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO inventory (product_id, quantity, low_stock_threshold) VALUES (1, 3, 10), (2, 30, 10)"
+        )
+        flags = conn.exec_driver_sql("SELECT is_low_stock FROM inventory ORDER BY product_id").scalars().all()
+    assert flags == [1, 0]
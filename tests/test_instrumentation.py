@@ -0,0 +1,125 @@
+import asyncio
+import re
+from collections import OrderedDict
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.middleware.instrumentation import InstrumentationMiddleware
+from app.services import prometheus, query_audit
+from app.services.query_audit import query_auditor, query_budget
+from app.services.request_metrics import request_metrics
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+with engine.begin() as conn:
+    conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+    conn.execute(text("INSERT INTO items (id, name) VALUES (1, 'a'), (2, 'b'), (3, 'c')"))
+
+inner = FastAPI()
+
+@inner.get("/items/{item_id}")
+def read_item(item_id: int):
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        conn.execute(text("SELECT :id"), {"id": item_id})
+    return {"id": item_id}
+
+@inner.get("/names")
+@query_budget(2)
+def list_names():
+    with engine.connect() as conn:
+        ids = conn.execute(text("SELECT id FROM items")).scalars().all()
+        # One query per item: the N+1 the auditor is for
+        return [conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": i}).scalar() for i in ids]
+
+
+def test_requests_are_timed_per_route(capsys):
+    request_metrics.clear()
+    client = TestClient(InstrumentationMiddleware(inner, slow_request_ms=0))
+    for item_id in (1, 2):
+        response = client.get(f"/items/{item_id}")
+        assert response.status_code == 200
+        assert re.fullmatch(
+            r'app;dur=[\d.]+, db;dur=[\d.]+;desc="2 queries", serialize;dur=[\d.]+',
+            response.headers["Server-Timing"]
+        )
+    client.get("/missing")
+
+    text_format = "\n".join(request_metrics.prometheus_lines())
+    assert 'http_requests_total{method="GET",route="/items/{item_id}",status="200"} 2' in text_format
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"} 1' in text_format
+    assert 'http_request_db_statements_bucket{method="GET",route="/items/{item_id}",le="2"} 2' in text_format
+    assert 'http_request_db_statements_bucket{method="GET",route="/items/{item_id}",le="1"} 0' in text_format
+    assert 'http_response_size_bytes_count{method="GET",route="/items/{item_id}"} 2' in text_format
+
+    # slow_request_ms=0: every request is logged with its SQL
+    output = capsys.readouterr().out
+    assert "Slow request: GET /items/2 -> 200" in output
+    assert "SELECT ?" in output
+
+def test_query_audit_reports_budget_overruns_and_repeats(monkeypatch):
+    monkeypatch.setattr(query_auditor, "enabled", True)
+    monkeypatch.setattr(query_auditor, "reports", [])
+    client = TestClient(InstrumentationMiddleware(inner))
+    assert client.get("/names").json() == ["a", "b", "c"]
+    client.get("/items/1")
+
+    names, item = query_auditor.reports
+    assert names.statements == 4 and names.budget.statements == 2
+    assert names.violations == [
+        "4 statements, over the budget of 2",
+        "Repeated 3 times (N+1): SELECT name FROM items WHERE id = ?",
+    ]
+    assert names.warnings == ["Full scan of items: SELECT id FROM items"]
+    assert item.violations == [] and item.budget.statements is None
+
+def test_query_audit_runs_off_the_event_loop_with_bounded_plans(monkeypatch):
+    monkeypatch.setattr(query_auditor, "enabled", True)
+    monkeypatch.setattr(query_auditor, "reports", [])
+    monkeypatch.setattr(query_audit, "MAX_CACHED_PLANS", 2)
+    monkeypatch.setattr(query_auditor, "_plans", OrderedDict())
+    audit, loops = query_auditor.audit, []
+
+    def audit_in_thread(*args):
+        try:
+            loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            loops.append(None)
+        return audit(*args)
+
+    monkeypatch.setattr(query_auditor, "audit", audit_in_thread)
+    client = TestClient(InstrumentationMiddleware(inner))
+    client.get("/names")
+    client.get("/items/1")
+    assert loops == [None, None]
+    # Four distinct SELECTs: the two least recently used plans were dropped
+    assert list(query_auditor._plans) == ["SELECT 1", "SELECT ?"]
+
+def test_worker_metrics_are_summed(tmp_path):
+    (tmp_path / "worker-11.prom").write_text(
+        '# TYPE http_requests_total counter\n'
+        'http_requests_total{method="GET",route="/",status="200"} 3\n'
+        '# TYPE http_request_db_ms histogram\n'
+        'http_request_db_ms_sum{method="GET",route="/"} 1.5\n'
+        '# TYPE db_pool_checked_out gauge\n'
+        'db_pool_checked_out{pool="primary"} 2\n'
+    )
+    (tmp_path / "dead-12.prom").write_text(
+        '# TYPE http_requests_total counter\n'
+        'http_requests_total{method="GET",route="/",status="200"} 4\n'
+        'http_requests_total{method="GET",route="/",status="500"} 1\n'
+        '# TYPE db_pool_checked_out gauge\n'
+        'db_pool_checked_out{pool="primary"} 5\n'
+    )
+    prometheus.write_worker_file(str(tmp_path), pid=13)
+
+    merged = prometheus.merge_lines(str(tmp_path))
+    assert 'http_requests_total{method="GET",route="/",status="200"} 7' in merged
+    assert 'http_requests_total{method="GET",route="/",status="500"} 1' in merged
+    assert 'http_request_db_ms_sum{method="GET",route="/"} 1.5' in merged
+    # Gauges per live worker; the exited worker's are dropped
+    assert 'db_pool_checked_out{pool="primary",pid="11"} 2' in merged
+    assert 'db_pool_checked_out{pool="primary",pid="12"} 5' not in merged
+    assert merged.count("# TYPE http_requests_total counter") == 1
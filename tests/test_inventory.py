@@ -0,0 +1,111 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import Base
+from app.models.category import Category
+from app.models.inventory import Inventory
+from app.models.product import Product
+from app.models.sale import Sale
+from app.routers import inventory, sales
+from app.schemas.inventory import InventoryUpdate
+from app.schemas.sale import SaleCreate
+from app.services.low_stock_feed import low_stock_events
+
+INITIAL_STOCK = 20
+BUYERS = 60
+
+
+def make_database(tmp_path, quantity: int):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'inventory.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    with SessionLocal() as db:
+        category = Category(name="Stock", description="Stock")
+        db.add(category)
+        db.flush()
+        product = Product(name="Scarce", price=10.0, category_id=category.id)
+        db.add(product)
+        db.flush()
+        db.add(Inventory(product_id=product.id, quantity=quantity))
+        db.commit()
+        return engine, SessionLocal, product.id
+
+def sale_of(product_id: int, quantity: int = 1) -> SaleCreate:
+    return SaleCreate(
+        product_id=product_id,
+        quantity=quantity,
+        unit_price=10.0,
+        total_amount=10.0 * quantity,
+        sale_date=datetime(2024, 6, 1, 12, 0)
+    )
+
+def test_concurrent_sales_never_oversell(tmp_path):
+    engine, SessionLocal, product_id = make_database(tmp_path, INITIAL_STOCK)
+
+    def buy(_):
+        sale = sale_of(product_id)
+        with SessionLocal() as db:
+            try:
+                sales.create_sale(sale, db=db)
+                return True
+            except HTTPException as e:
+                assert e.status_code == 409
+                return False
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(buy, range(BUYERS)))
+
+    with SessionLocal() as db:
+        assert sum(results) == INITIAL_STOCK
+        assert db.query(Inventory.quantity).filter(Inventory.product_id == product_id).scalar() == 0
+        assert db.query(func.count(Sale.id)).scalar() == INITIAL_STOCK
+    engine.dispose()
+
+def test_low_stock_feed_streams_threshold_crossings(tmp_path):
+    engine, SessionLocal, product_id = make_database(tmp_path, 12)
+
+    def sell(quantity):
+        with SessionLocal() as db:
+            sales.create_sale(sale_of(product_id, quantity), db=db)
+
+    def restock(quantity):
+        with SessionLocal() as db:
+            inventory.update_inventory(product_id, InventoryUpdate(quantity=quantity), db=db)
+
+    async def scenario():
+        feed = low_stock_events(engine)
+        assert await anext(feed) == ": connected\n\n"
+
+        await asyncio.to_thread(sell, 1)  # 11: still above the threshold
+        await asyncio.to_thread(sell, 2)  # 9: crosses into low stock
+        await asyncio.to_thread(sell, 1)  # 8: already low
+        low = await asyncio.wait_for(anext(feed), 5)
+        assert low.splitlines()[1] == "event: low_stock"
+        assert json.loads(low.splitlines()[2][len("data: "):])["quantity"] == 9
+
+        await asyncio.to_thread(restock, 50)
+        restocked = await asyncio.wait_for(anext(feed), 5)
+        assert restocked.splitlines()[1] == "event: restocked"
+        await feed.aclose()
+
+        # Reconnecting with Last-Event-ID replays what was missed
+        replay = low_stock_events(engine, last_event_id=0)
+        await anext(replay)
+        assert [await anext(replay) for _ in range(2)] == [low, restocked]
+        await replay.aclose()
+
+    asyncio.run(scenario())
+
+    with SessionLocal() as db:
+        assert db.query(Inventory.is_low_stock).filter(Inventory.product_id == product_id).scalar() is False
+    engine.dispose()
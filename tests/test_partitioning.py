@@ -0,0 +1,114 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db.partitioning import (
+    add_months,
+    add_partitions,
+    enable_partitioning,
+    is_partitioned,
+    list_partitions,
+    month_start,
+    remove_partitions,
+)
+from app.db.session import Base
+from app.models.category import Category
+from app.models.product import Product
+from app.models.sale import Sale
+from app.services.cold_storage import compact_sales
+from app.services.rollups import ROLLUP_MODELS, rebuild_rollups
+
+
+def add_sale(db, product_id: int, sale_date: datetime) -> Sale:
+    sale = Sale(product_id=product_id, quantity=1, unit_price=10.0, total_amount=10.0, sale_date=sale_date)
+    db.add(sale)
+    db.commit()
+    return sale
+
+def table_ids(engine, table: str):
+    with engine.connect() as conn:
+        return conn.exec_driver_sql(f"SELECT id FROM {table} ORDER BY id").scalars().all()
+
+def rollup_rows(db):
+    return {
+        interval: sorted(
+            (row.bucket_start, row.product_id, row.revenue, row.quantity, row.total_sales)
+            for row in db.query(model)
+        )
+        for interval, model in ROLLUP_MODELS.items()
+    }
+
+def assert_rollups_match_sales(Session):
+    with Session() as db:
+        rows = rollup_rows(db)
+        rebuild_rollups(db)
+        assert rollup_rows(db) == rows
+
+
+def test_sqlite_sales_split_per_month(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'sales.db'}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    now = month_start(datetime.utcnow())
+    old, last_month, later = add_months(now, -14), add_months(now, -1), add_months(now, 6)
+    with Session() as db:
+        category = Category(name="Category", description="")
+        db.add(category)
+        db.commit()
+        product = Product(name="Product", price=10.0, category_id=category.id)
+        db.add(product)
+        db.commit()
+        for sale_date in (old, last_month, now, later):
+            add_sale(db, product.id, sale_date)
+
+    partitions = enable_partitioning(engine, ahead_months=3)
+    assert is_partitioned(engine)
+    assert partitions[0].name == f"p{old:%Y%m}" and partitions[-1].name == "p_future"
+    assert [p.rows for p in list_partitions(engine) if p.rows] == [1, 1, 1, 1]
+    assert table_ids(engine, f"sales_p{now:%Y%m}") == [3]
+    assert table_ids(engine, "sales_p_future") == [4]
+
+    # New connections see the view: the ORM allocates ids and queries go through the view
+    engine.dispose()
+    with Session() as db:
+        sale = add_sale(db, 1, now.replace(day=15))
+        assert sale.id == 5
+        assert table_ids(engine, f"sales_p{now:%Y%m}") == [3, 5]
+        # Without an id the insert trigger takes the next one; NULL dates go to the first month
+        db.execute(insert(Sale), [
+            {"product_id": 1, "quantity": 1, "unit_price": 1.0, "total_amount": 1.0, "sale_date": last_month},
+        ])
+        db.execute(text("INSERT INTO sales (product_id, quantity, unit_price, total_amount) VALUES (1, 1, 1, 1)"))
+        db.commit()
+        assert table_ids(engine, f"sales_p{last_month:%Y%m}") == [2, 6]
+        assert table_ids(engine, f"sales_p{old:%Y%m}") == [1, 7]
+        in_range = db.query(Sale.id).filter(Sale.sale_date >= last_month, Sale.sale_date < add_months(now, 1))
+        assert sorted(id for id, in in_range) == [2, 3, 5, 6]
+        assert db.get(Sale, 4).sale_date == later
+
+    # Months ahead are split off the future partition with their rows
+    assert add_partitions(engine, ahead_months=6)[-1] == f"p{later:%Y%m}"
+    assert table_ids(engine, f"sales_p{later:%Y%m}") == [4]
+    assert table_ids(engine, "sales_p_future") == []
+
+    with Session() as db:
+        rebuild_rollups(db)
+        compact_sales(db, now, tmp_path / "cold")
+
+    # Old months are archived or dropped without touching the others; the rollups and the
+    # cold snapshot stop counting them
+    assert remove_partitions(engine, add_months(now, -13), archive=True, cold_directory=tmp_path / "cold") == [
+        f"p{old:%Y%m}"
+    ]
+    assert table_ids(engine, f"sales_archive_p{old:%Y%m}") == [1, 7]
+    assert_rollups_match_sales(Session)
+    with open(tmp_path / "cold" / "manifest.json") as f:
+        assert list(json.load(f)["months"]) == [f"{last_month:%Y-%m}"]
+
+    removed = remove_partitions(engine, now, archive=False, cold_directory=tmp_path / "cold")
+    assert removed[-1] == f"p{last_month:%Y%m}"
+    assert f"sales_p{last_month:%Y%m}" not in inspect(engine).get_table_names()
+    assert table_ids(engine, "sales") == [3, 4, 5]
+    assert_rollups_match_sales(Session)
@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.db.pool_metrics import InstrumentedQueuePool, instrument_engine, pool_snapshot
+
+
+@pytest.fixture
+def pool_engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+        pool_pre_ping=True,
+    )
+    instrument_engine(engine)
+    yield engine
+    engine.dispose()
+
+def test_pool_metrics_track_checkouts_and_timeouts(pool_engine):
+    with pool_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        snapshot = pool_snapshot(pool_engine)
+        assert snapshot["checked_out"] == 1
+        assert snapshot["pool_size"] == 1
+
+        with pytest.raises(exc.TimeoutError):
+            pool_engine.connect()
+
+    with pool_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    snapshot = pool_snapshot(pool_engine)
+    assert snapshot["checked_out"] == 0
+    assert snapshot["checkouts"] == 2
+    assert snapshot["connections_created"] == 1
+    assert snapshot["checkout_timeouts"] == 1
+    assert snapshot["checkout_wait_ms"]["count"] == 3
+    # The timed-out checkout waited for the full pool_timeout
+    assert snapshot["checkout_wait_ms"]["buckets"]["50"] < 3
+
+def test_pool_metrics_survive_dispose(pool_engine):
+    with pool_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    pool_engine.dispose()
+    pool_engine.dispose()
+    with pool_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    snapshot = pool_snapshot(pool_engine)
+    assert snapshot["checkouts"] == 2
+    assert snapshot["connections_created"] == 2
+    # One set of listeners, however many times the pool was recreated
+    assert len(pool_engine.pool.dispatch.checkout) == 1
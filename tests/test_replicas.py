@@ -0,0 +1,106 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import session
+from app.db.replicas import READ_PRIMARY_COOKIE, ReplicaSet, RoutingSession
+from app.db.session import Base, get_db
+from app.main import app
+from app.models.category import Category
+from app.services.cache import response_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    response_cache.clear()
+
+def make_database(path, category_name: str):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add(Category(name=category_name, description=""))
+        db.commit()
+    return engine
+
+def use_databases(monkeypatch, primary, replica_engines, retry_seconds: float = 60):
+    """Route the app's get_db (not the test override) to ``primary`` and the replicas."""
+    monkeypatch.delitem(app.dependency_overrides, get_db, raising=False)
+    monkeypatch.setattr(session, "SessionLocal", sessionmaker(
+        autocommit=False, autoflush=False, bind=primary, class_=RoutingSession
+    ))
+    monkeypatch.setattr(session, "replicas", ReplicaSet(replica_engines, retry_seconds))
+
+def category_names(client, path="/categories/"):
+    response = client.get(path)
+    assert response.status_code == 200
+    return [category["name"] for category in response.json()]
+
+
+def test_reads_go_to_replicas_and_writes_to_the_primary(tmp_path, monkeypatch):
+    # Two SQLite files standing in for a primary and a replica that has not caught up
+    primary = make_database(tmp_path / "primary.db", "On primary")
+    replica = make_database(tmp_path / "replica.db", "On replica")
+    use_databases(monkeypatch, primary, [replica])
+    client = TestClient(app)
+
+    assert category_names(client) == ["On replica"]
+    # Single-row lookups are not marked @read_replica
+    assert client.get("/categories/1").json()["name"] == "On primary"
+
+    response = client.post("/categories/", json={"name": "Written", "description": ""})
+    assert response.status_code == 200
+    assert READ_PRIMARY_COOKIE in response.cookies
+    # Read your writes: the client reads from the primary until the cookie expires
+    assert category_names(client) == ["On primary", "Written"]
+    client.cookies.clear()
+    assert category_names(client) == ["On replica"]
+
+    # A session with a replica still flushes to the primary
+    with session.SessionLocal(replica=replica) as db:
+        db.add(Category(name="Flushed", description=""))
+        db.commit()
+        assert [c.name for c in db.query(Category).order_by(Category.id)] == ["On replica"]
+    with sessionmaker(bind=primary)() as db:
+        assert db.query(Category).filter(Category.name == "Flushed").count() == 1
+
+def test_failed_replica_is_taken_out_of_rotation(tmp_path, monkeypatch):
+    primary = make_database(tmp_path / "primary.db", "On primary")
+    replica = make_database(tmp_path / "replica.db", "On replica")
+    broken = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    use_databases(monkeypatch, primary, [broken, replica])
+    client = TestClient(app, raise_server_exceptions=False)
+
+    # The request sent to the broken replica fails and takes it out of rotation
+    assert client.get("/categories/").status_code == 500
+    assert [category_names(client) for _ in range(3)] == [["On replica"]] * 3
+    healthy = [r.healthy for r in session.replicas.replicas]
+    assert healthy == [False, True]
+
+    # With no healthy replica left, reads fall back to the primary
+    use_databases(monkeypatch, primary, [broken])
+    assert client.get("/categories/").status_code == 500
+    assert category_names(client) == ["On primary"]
+
+def test_cache_is_not_filled_from_replicas(tmp_path, monkeypatch):
+    primary = make_database(tmp_path / "primary.db", "On primary")
+    replica = make_database(tmp_path / "replica.db", "On replica")
+    use_databases(monkeypatch, primary, [replica])
+    client = TestClient(app)
+
+    # Reads from the lagging replica are served but not cached
+    response = client.get("/categories/")
+    assert response.headers["X-Cache"] == "BYPASS"
+    assert category_names(client) == ["On replica"]
+
+    assert client.post("/categories/", json={"name": "Written", "description": ""}).status_code == 200
+    # The writer reads its own write, not a cached replica response
+    response = client.get("/categories/")
+    assert response.headers["X-Cache"] == "BYPASS"
+    assert [category["name"] for category in response.json()] == ["On primary", "Written"]
+
+    # Reads from the primary (all replicas down) are cached as usual
+    client.cookies.clear()
+    use_databases(monkeypatch, primary, [])
+    assert client.get("/categories/").headers["X-Cache"] == "MISS"
+    assert client.get("/categories/").headers["X-Cache"] == "HIT"
@@ -0,0 +1,124 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.session import Base
+from app.models.category import Category
+from app.models.product import Product
+from app.models.sale import Sale
+from app.models.sale_rollup import DailySaleRollup, WeeklySaleRollup
+from app.schemas.sale import IntervalType
+from app.services.analytics import sales_totals
+from app.services.timeseries import revenue_series
+from app.services.rollups import (
+    apply_sale_to_rollups,
+    bucket_start,
+    next_bucket_start,
+    rebuild_rollups,
+)
+
+# Create in-memory SQLite database for testing
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def product(db_session):
+    category = Category(name="Test Category", description="Test Description")
+    db_session.add(category)
+    db_session.commit()
+    product = Product(name="Test Product", price=10.0, category_id=category.id)
+    db_session.add(product)
+    db_session.commit()
+    return product
+
+def add_sale(db_session, product, sale_date, quantity=1):
+    sale = Sale(
+        product_id=product.id,
+        quantity=quantity,
+        unit_price=10.0,
+        total_amount=10.0 * quantity,
+        sale_date=sale_date
+    )
+    db_session.add(sale)
+    apply_sale_to_rollups(db_session, sale)
+    db_session.commit()
+    return sale
+
+def test_bucket_boundaries():
+    value = datetime(2024, 12, 18, 15, 45)
+    assert bucket_start(value, IntervalType.DAILY) == datetime(2024, 12, 18)
+    assert bucket_start(value, IntervalType.WEEKLY) == datetime(2024, 12, 16)
+    assert bucket_start(value, IntervalType.MONTHLY) == datetime(2024, 12, 1)
+    assert bucket_start(value, IntervalType.YEARLY) == datetime(2024, 1, 1)
+    assert next_bucket_start(datetime(2024, 12, 1), IntervalType.MONTHLY) == datetime(2025, 1, 1)
+
+def test_incremental_rollups_accumulate(db_session, product):
+    add_sale(db_session, product, datetime(2024, 5, 6, 10, 0), quantity=2)
+    add_sale(db_session, product, datetime(2024, 5, 6, 18, 0), quantity=3)
+    add_sale(db_session, product, datetime(2024, 5, 8, 9, 0))
+
+    daily = db_session.query(DailySaleRollup).filter(
+        DailySaleRollup.bucket_start == datetime(2024, 5, 6)
+    ).one()
+    assert (daily.revenue, daily.quantity, daily.total_sales) == (50.0, 5, 2)
+
+    weekly = db_session.query(WeeklySaleRollup).one()
+    assert weekly.bucket_start == datetime(2024, 5, 6)
+    assert weekly.total_sales == 3
+
+def test_rebuild_matches_incremental(db_session, product):
+    for day in (1, 2, 2, 15, 31):
+        add_sale(db_session, product, datetime(2024, 1, day, 12, 0))
+    before = revenue_series(db_session, IntervalType.DAILY, datetime(2023, 12, 1), datetime(2024, 3, 1))
+
+    db_session.query(DailySaleRollup).delete()
+    db_session.commit()
+    counts = rebuild_rollups(db_session)
+
+    assert counts[IntervalType.DAILY] == 4
+    assert counts[IntervalType.MONTHLY] == 1
+    after = revenue_series(db_session, IntervalType.DAILY, datetime(2023, 12, 1), datetime(2024, 3, 1))
+    assert after == before
+    assert [total_sales for _, _, total_sales in after if total_sales] == [1, 2, 1, 1]
+
+def test_sales_totals_match_raw_sales(db_session, product):
+    rng = random.Random(7)
+    origin = datetime(2023, 11, 1)
+    sale_dates = [origin + timedelta(minutes=rng.randint(0, 60 * 24 * 500)) for _ in range(300)]
+    for sale_date in sale_dates:
+        add_sale(db_session, product, sale_date)
+
+    for _ in range(20):
+        start = origin + timedelta(minutes=rng.randint(0, 60 * 24 * 500))
+        end = start + timedelta(minutes=rng.randint(0, 60 * 24 * 400))
+        expected = sum(start <= sale_date <= end for sale_date in sale_dates)
+        totals = sales_totals(db_session, start, end)
+        assert sum(t.total_sales for t in totals.values()) == expected
+
+        for interval in IntervalType:
+            totals = sales_totals(db_session, start, end, interval)
+            buckets = {}
+            for sale_date in sale_dates:
+                if start <= sale_date <= end:
+                    bucket = bucket_start(sale_date, interval)
+                    buckets[bucket] = buckets.get(bucket, 0) + 1
+            assert {bucket: t.total_sales for (bucket, _), t in totals.items()} == buckets